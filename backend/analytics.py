@@ -0,0 +1,157 @@
+from spacing import STAGES, DIFFICULTIES
+from graph_cache import WriteGeneration
+
+
+class AnalyticsRollup(WriteGeneration):
+    """Daily review rollups and per-topic totals behind the analytics endpoints.
+
+    Filled from Cypher aggregations (one row per day and difficulty, per
+    stage and per studied topic, never one per Review node), then patched
+    by the writes made through the connection, so dashboards don't rescan
+    the reviews. Writes whose effect isn't known here, such as deleting a
+    topic with its reviews or applying a sync batch, invalidate it and the
+    next read aggregates again. Like GraphCache, a fill that raced with a
+    write is refused rather than installed without it.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._stages = None   # stage -> active topics
+        self._days = None     # (day, difficulty) -> [reviews, sum of intervals]
+        self._studied = None  # topic -> [minutes, sessions]
+        self.version = 0
+
+    @property
+    def is_warm(self):
+        return self._days is not None
+
+    def fill(self, stages, days, studied, generation=None):
+        """Warm the rollup from the rows of the three aggregation queries.
+
+        `generation` is the value read before the queries ran. Returns False,
+        leaving the rollup as it was, if a write landed since.
+        """
+        with self._lock:
+            if not self._can_fill(generation):
+                return False
+            self._stages = {row["stage"]: row["topics"] for row in stages}
+            self._days = {
+                (row["day"], row["difficulty"]): [row["reviews"], row["interval_total"]]
+                for row in days
+            }
+            self._studied = {row["topic_id"]: [row["minutes"], row["sessions"]] for row in studied}
+            self.version += 1
+            return True
+
+    def invalidate(self):
+        with self._lock:
+            self.generation += 1
+            self._stages = self._days = self._studied = None
+            self.version += 1
+
+    def add_topic(self, topic_data):
+        """Count a created topic and the review history it was created with."""
+        with self._lock:
+            self.generation += 1
+            if self._days is None:
+                return
+            if topic_data['status'] == 'active':
+                _increment(self._stages, topic_data['stage'])
+            for review in topic_data.get('review_history', []):
+                self._add_review(review)
+            self.version += 1
+
+    def add_review(self, review, previous_stage, new_stage, status):
+        with self._lock:
+            self.generation += 1
+            if self._days is None:
+                return
+            self._add_review(review)
+            if status == 'active' and previous_stage != new_stage:
+                _increment(self._stages, previous_stage, -1)
+                _increment(self._stages, new_stage)
+            self.version += 1
+
+    def add_study(self, included):
+        """Add the {topic_id, duration} links of newly created study sessions."""
+        with self._lock:
+            self.generation += 1
+            if self._studied is None:
+                return
+            for link in included:
+                totals = self._studied.setdefault(link['topic_id'], [0, 0])
+                totals[0] += link['duration']
+                totals[1] += 1
+            self.version += 1
+
+    def stage_distribution(self):
+        """Active topics per stage, every stage included."""
+        with self._lock:
+            counts = dict.fromkeys(STAGES, 0)
+            counts.update((stage, topics) for stage, topics in self._stages.items() if topics)
+            return counts
+
+    def reviews_per_day(self, since=None, until=None):
+        """Reviews per day, split by difficulty, oldest day first."""
+        days = {}
+        for (day, difficulty), (reviews, _) in self._select(since, until):
+            row = days.setdefault(day, {'date': day, 'reviews': 0, **dict.fromkeys(DIFFICULTIES, 0)})
+            row['reviews'] += reviews
+            row[difficulty] = row.get(difficulty, 0) + reviews
+        return [days[day] for day in sorted(days)]
+
+    def difficulty_mix(self, since=None, until=None):
+        """Reviews per difficulty rating, with each one's share of the total."""
+        counts = dict.fromkeys(DIFFICULTIES, 0)
+        for (_, difficulty), (reviews, _) in self._select(since, until):
+            counts[difficulty] = counts.get(difficulty, 0) + reviews
+        total = sum(counts.values())
+        return {
+            'total': total,
+            'counts': counts,
+            'shares': {difficulty: count / total if total else 0.0 for difficulty, count in counts.items()}
+        }
+
+    def interval_progression(self, since=None, until=None):
+        """Mean interval handed out per day, overall and by difficulty."""
+        days = {}
+        for (day, difficulty), (reviews, interval_total) in self._select(since, until):
+            days.setdefault(day, {})[difficulty] = (reviews, interval_total)
+        return [
+            {
+                'date': day,
+                'mean_interval': sum(total for _, total in days[day].values()) / sum(count for count, _ in days[day].values()),
+                'by_difficulty': {difficulty: total / count for difficulty, (count, total) in days[day].items()}
+            }
+            for day in sorted(days)
+        ]
+
+    def time_studied(self, limit=None):
+        """Minutes and sessions per topic from study sessions, most studied first."""
+        with self._lock:
+            totals = sorted(self._studied.items(), key=lambda item: (-item[1][0], item[0]))
+        return [
+            {'topic_id': topic_id, 'minutes': minutes, 'sessions': sessions}
+            for topic_id, (minutes, sessions) in totals[:limit]
+        ]
+
+    def _add_review(self, review):
+        date = review['date']
+        day = (date if isinstance(date, str) else date.isoformat())[:10]
+        totals = self._days.setdefault((day, review['difficulty']), [0, 0])
+        totals[0] += 1
+        totals[1] += review['interval']
+
+    def _select(self, since, until):
+        # Days are ISO strings, so they compare in date order
+        since = since.isoformat() if since else None
+        until = until.isoformat() if until else None
+        with self._lock:
+            return [
+                (key, tuple(totals)) for key, totals in self._days.items()
+                if (since is None or key[0] >= since) and (until is None or key[0] <= until)
+            ]
+
+
+def _increment(counts, key, amount=1):
+    counts[key] = counts.get(key, 0) + amount
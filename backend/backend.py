@@ -1,11 +1,23 @@
 import uuid
-from fastapi import FastAPI, HTTPException
+import base64
+import asyncio
+from fastapi import FastAPI, HTTPException, Response
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Dict, Optional
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 import json
-from database import Neo4jConnection
+import os
+from database import AsyncNeo4jConnection
+from search_index import SearchIndex
+from embeddings import EmbeddingWorker, VectorIndex, create_embedder, content_text, topic_text
+from schedulers import create_scheduler
+from prerequisites import PrerequisiteIndex
+from session_planner import ENERGY_LEVELS, plan_session
+from spacing import STATUSES
+from sync import SyncBatch, SyncConfirm, prepare_batch, finish_results, change_entry, change_from_record
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -27,7 +39,25 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-db = Neo4jConnection()
+db = AsyncNeo4jConnection()
+
+SEARCH_INDEX_SNAPSHOT = os.getenv(
+    "SEARCH_INDEX_SNAPSHOT", os.path.join(os.path.dirname(__file__), "search_index.json")
+)
+search_index = SearchIndex()
+
+embedder = create_embedder()
+semantic_indexes = {
+    'content': VectorIndex(embedder.dimensions),
+    'topic': VectorIndex(embedder.dimensions),
+}
+embedding_worker = EmbeddingWorker(embedder, semantic_indexes, store=db.set_embeddings)
+
+scheduler = create_scheduler()
+
+# Transitive PREREQUISITE_OF closure, built at startup and kept current by
+# the endpoints that add or remove prerequisite edges
+prerequisite_index = PrerequisiteIndex()
 
 class TopicCreate(BaseModel):
     path: str
@@ -45,12 +75,33 @@ class TopicEdit(BaseModel):
     status: Optional[str] = None
     prerequisites: List[str] = []
 
+class PrerequisiteLink(BaseModel):
+    prerequisite: str
+
+class StudySessionCreate(BaseModel):
+    start_time: datetime
+    end_time: datetime
+    topics: List[str]
+    durations: List[int]  # minutes, one per topic
+
+class StudySessionBatch(BaseModel):
+    sessions: List[StudySessionCreate]
+
+class SessionPlanRequest(BaseModel):
+    start_time: datetime
+    end_time: datetime
+    energy: str = 'any'  # "low", "high" or "any"
+    block_minutes: Optional[int] = None
+    break_minutes: Optional[int] = None
+
 @app.post("/topics/")
 async def create_topic(topic: TopicCreate):
     try:
         parts = topic.path.split('/')
         if len(parts) < 2:
             raise HTTPException(status_code=400, detail="Path must include subject and topic name")
+        if topic.status not in STATUSES:
+            raise HTTPException(status_code=400, detail=f"status must be one of: {', '.join(STATUSES)}")
         
         # Create topic data
         topic_data = {
@@ -64,21 +115,23 @@ async def create_topic(topic: TopicCreate):
             'review_history': []
         }
         
-        # Create topic in database
+        prerequisites = [prereq.replace('/', ':') for prereq in topic.prerequisites]
+
+        # Create topic, its subject and prerequisite links in one transaction
         try:
-            db.create_topic_node(topic_data)
+            linked = await db.create_topic_node(topic_data, prerequisites)
         except Exception as e:
             print(f"Database error: {str(e)}")
             raise HTTPException(status_code=500, detail="Failed to create topic in database")
-        
-        # Create prerequisite relationships
-        for prereq in topic.prerequisites:
-            try:
-                db.create_relationship(prereq.replace('/', ':'), topic_data['id'])
-            except Exception as e:
-                print(f"Error creating prerequisite relationship: {str(e)}")
-                # Don't fail the whole request if a prerequisite fails
-                continue
+
+        # Don't fail the whole request if a prerequisite doesn't exist
+        for prereq in set(prerequisites) - set(linked or []):
+            print(f"Error creating prerequisite relationship: topic {prereq} not found")
+        for prereq in linked or []:
+            prerequisite_index.add_edge(prereq, topic_data['id'])
+
+        await _log_change('topic', 'create', topic_data['id'], topic_data)
+        embedding_worker.submit('topic', topic_data['id'], topic_text(topic_data))
         
         return {"topic_id": topic_data['id'], "status": "created"}
     except HTTPException:
@@ -88,13 +141,167 @@ async def create_topic(topic: TopicCreate):
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @app.get("/topics/")
-async def get_topics():
-    graph_data = db.get_full_graph()
+async def get_topics(
+    stream: bool = False,
+    fields: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None
+):
+    """Get the knowledge graph.
+
+    Without parameters the whole graph is returned from the cache. `fields`
+    picks which topic properties to return (e.g. `id,stage,next_review`;
+    review_history is only loaded if listed). `limit`/`cursor` page through
+    topics in id order, and `stream=true` sends NDJSON lines as Neo4j
+    produces them instead of building the response in memory.
+    """
+    if limit is not None and limit < 1:
+        raise HTTPException(status_code=400, detail="limit must be positive")
+    selected = [field.strip() for field in fields.split(',') if field.strip()] if fields else None
+    after = _decode_cursor(cursor) if cursor else None
+
+    if stream:
+        return StreamingResponse(
+            _stream_topics(selected, limit, after),
+            media_type="application/x-ndjson"
+        )
+
+    if limit is None and after is None:
+        graph_data = await db.get_full_graph()
+        if selected:
+            graph_data["topics"] = {
+                topic_id: _select_fields(topic, selected)
+                for topic_id, topic in graph_data["topics"].items()
+            }
+        return graph_data
+
+    graph_data = {"subjects": {}, "topics": {}, "relationships": [], "next_cursor": None}
+    last_id = None
+    count = 0
+    async for topic, relationships in db.iter_topics(limit, after, _wants_history(selected)):
+        subject = graph_data["subjects"].setdefault(
+            topic["subject"], {"name": topic["subject"], "topics": []}
+        )
+        subject["topics"].append(topic["id"])
+        graph_data["topics"][topic["id"]] = _select_fields(topic, selected)
+        graph_data["relationships"].extend(relationships)
+        last_id = topic["id"]
+        count += 1
+
+    if limit is not None and count == limit:
+        graph_data["next_cursor"] = _encode_cursor(last_id)
     return graph_data
 
+async def _stream_topics(selected, limit, after):
+    """NDJSON lines: each subject when first seen, then each topic and its relationships."""
+    seen_subjects = set()
+    last_id = None
+    count = 0
+    async for topic, relationships in db.iter_topics(limit, after, _wants_history(selected)):
+        if topic["subject"] not in seen_subjects:
+            seen_subjects.add(topic["subject"])
+            yield _ndjson({"type": "subject", "data": {"name": topic["subject"]}})
+        yield _ndjson({"type": "topic", "data": _select_fields(topic, selected)})
+        for relationship in relationships:
+            yield _ndjson({"type": "relationship", "data": relationship})
+        last_id = topic["id"]
+        count += 1
+
+    if limit is not None and count == limit:
+        yield _ndjson({"type": "cursor", "data": {"next_cursor": _encode_cursor(last_id)}})
+
+def _wants_history(selected):
+    return selected is None or 'review_history' in selected
+
+def _select_fields(topic, selected):
+    if selected is None:
+        return topic
+    return {field: topic[field] for field in selected if field in topic}
+
+def _ndjson(item):
+    return json.dumps(jsonable_encoder(item)) + "\n"
+
+@app.get("/schema")
+async def get_schema_status():
+    """Which of the expected Neo4j constraints and indexes are present."""
+    try:
+        return await db.get_schema_status()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error reading schema: {str(e)}")
+
+@app.get("/cache/stats")
+async def get_cache_stats():
+    """Hit/miss counters and version of the in-process topic graph cache."""
+    return db.get_cache_stats()
+
+@app.post("/cache/invalidate")
+async def invalidate_caches():
+    """Reload everything held in memory after a write that bypassed the API.
+
+    The content importer calls this when it finishes; call it by hand after
+    editing the database directly. The topic graph and analytics reload on
+    their next read, the prerequisite index is rebuilt, the search index
+    picks up content that was added, changed or deleted, and stored or
+    pending embeddings are loaded as on startup.
+    """
+    db.invalidate_caches()
+    await _load_prerequisites()
+    if search_index.ready:
+        try:
+            await _reconcile_search_index(search_index)
+        except Exception as e:
+            print(f"Error refreshing search index: {str(e)}")
+    else:
+        await _load_search_index()
+    await _load_embeddings()
+    return {"status": "invalidated", "cache": db.get_cache_stats()}
+
+@app.get("/analytics/stages")
+async def get_stage_distribution():
+    """Active topics in each learning stage"""
+    return (await _analytics()).stage_distribution()
+
+@app.get("/analytics/reviews-per-day")
+async def get_reviews_per_day(since: Optional[date] = None, until: Optional[date] = None):
+    """Reviews per day, split by difficulty, for days in [since, until]"""
+    _check_date_range(since, until)
+    return (await _analytics()).reviews_per_day(since, until)
+
+@app.get("/analytics/difficulty")
+async def get_difficulty_mix(since: Optional[date] = None, until: Optional[date] = None):
+    """How reviews were rated, as counts and shares"""
+    _check_date_range(since, until)
+    return (await _analytics()).difficulty_mix(since, until)
+
+@app.get("/analytics/intervals")
+async def get_interval_progression(since: Optional[date] = None, until: Optional[date] = None):
+    """Mean interval given per day, overall and by difficulty"""
+    _check_date_range(since, until)
+    return (await _analytics()).interval_progression(since, until)
+
+@app.get("/analytics/time-studied")
+async def get_time_studied(limit: int = 50):
+    """Minutes planned per topic across study sessions, most studied first"""
+    if limit < 1 or limit > 1000:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 1000")
+    return (await _analytics()).time_studied(limit)
+
+async def _analytics():
+    try:
+        return await db.get_analytics()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error loading analytics: {str(e)}")
+
+def _check_date_range(since, until):
+    if since and until and since > until:
+        raise HTTPException(status_code=400, detail="since must not be after until")
+
 @app.delete("/topics/{topic_id}")
 async def delete_topic(topic_id: str):
-    db.delete_topic(topic_id)
+    await db.delete_topic(topic_id)
+    await _log_change('topic', 'delete', topic_id, {'id': topic_id})
+    semantic_indexes['topic'].remove(topic_id)
+    prerequisite_index.remove_topic(topic_id)
     return {"status": "deleted"}
 
 @app.put("/topics/{topic_id}")
@@ -131,7 +338,7 @@ def update_topic(self, topic_id, topic_data):
             status=topic_data['status'],
             stage=topic_data['stage'],
             created_at=topic_data['created_at'].isoformat(),
-            next_review=topic_data['next_review'].isoformat()
+            next_review=topic_data['next_review']
         )
 
        
@@ -151,75 +358,162 @@ def update_topic(self, topic_id, topic_data):
             )
 
 @app.get("/topics/review")
-async def get_due_reviews():
-    """Get all topics that are due for review."""
-    graph_data = db.get_full_graph()
-    
+async def get_due_reviews(response: Response, limit: Optional[int] = None, cursor: Optional[str] = None):
+    """Get all topics that are due for review.
+
+    Pass `limit` to page through the results; when more topics are due the
+    cursor for the next page is returned in the X-Next-Cursor header.
+    """
+    if limit is not None and limit < 1:
+        raise HTTPException(status_code=400, detail="limit must be positive")
+    after = _decode_review_cursor(cursor) if cursor else None
+
+    topics = await db.get_due_reviews(datetime.now(), limit=limit, after=after)
+
     due_topics = {}
-    current_time = datetime.now()
-    
-    for topic_id, topic in graph_data["topics"].items():
-        if topic['status'] == 'active':
-            if isinstance(topic['next_review'], str):
-                next_review = datetime.fromisoformat(topic['next_review'])
-            else:
-                next_review = topic['next_review']
-                
-            if next_review <= current_time:
-                due_topics[topic_id] = {
-                    'id': topic_id,
-                    'subject': topic['subject'],
-                    'topic': topic['name'],
-                    'stage': topic['stage'],
-                    'next_review': next_review.isoformat()  
-                }
-    
+    for topic in topics:
+        due_topics[topic['id']] = {
+            'id': topic['id'],
+            'subject': topic['subject'],
+            'topic': topic['name'],
+            'stage': topic['stage'],
+            'next_review': topic['next_review'].isoformat()
+        }
+
+    if limit is not None and len(topics) == limit:
+        last = topics[-1]
+        response.headers["X-Next-Cursor"] = _encode_cursor(last['next_review'].isoformat(), last['id'])
+
     return due_topics
 
+def _encode_cursor(*parts):
+    return base64.urlsafe_b64encode("|".join(parts).encode()).decode()
+
+def _decode_cursor(cursor):
+    try:
+        decoded = base64.b64decode(cursor.encode(), altchars=b'-_', validate=True).decode()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not decoded:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return decoded
+
+def _decode_review_cursor(cursor):
+    try:
+        next_review, topic_id = _decode_cursor(cursor).split("|", 1)
+        return datetime.fromisoformat(next_review), topic_id
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+@app.get("/topics/{topic_id}")
+async def get_topic(topic_id: str, include_history: bool = False):
+    topic = await db.get_topic(topic_id, include_history=include_history)
+    if topic is None:
+        raise HTTPException(status_code=404, detail="Topic not found")
+    return topic
+
+@app.get("/topics/{topic_id}/similar")
+async def get_similar_topics(topic_id: str, limit: int = 10):
+    """Topics whose embeddings are closest to this one's"""
+    if limit < 1 or limit > 100:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 100")
+    vector = semantic_indexes['topic'].get(topic_id)
+    if vector is None:
+        # Not embedded yet (the worker may still be catching up)
+        topic = await db.get_topic(topic_id)
+        if topic is None:
+            raise HTTPException(status_code=404, detail="Topic not found")
+        vector = (await asyncio.to_thread(embedder.embed, [topic_text(topic)]))[0]
+    matches = semantic_indexes['topic'].search(vector, limit, exclude=(topic_id,))
+    return [{"topic_id": match_id, "score": score} for match_id, score in matches]
+
+@app.get("/topics/{topic_id}/prerequisites")
+async def get_prerequisites(topic_id: str, transitive: bool = True):
+    """Prerequisites of a topic, each listed after its own prerequisites."""
+    index = await _prerequisite_index()
+    prerequisites = index.prerequisites(topic_id, transitive=transitive)
+    if not prerequisites:
+        await _require_topic(topic_id)
+    return {"topic_id": topic_id, "prerequisites": prerequisites}
+
+@app.get("/topics/{topic_id}/unlocks")
+async def get_unlocked_topics(topic_id: str, transitive: bool = True):
+    """Topics that build on this one, in the order they can be learned."""
+    index = await _prerequisite_index()
+    unlocks = index.unlocks(topic_id, transitive=transitive)
+    if not unlocks:
+        await _require_topic(topic_id)
+    return {"topic_id": topic_id, "unlocks": unlocks}
+
+@app.get("/topics/{topic_id}/learning-order")
+async def get_learning_order(topic_id: str):
+    """Everything needed to learn a topic, in order, ending with the topic.
+
+    Topics on a prerequisite cycle (possible with imported vault links)
+    can't be strictly ordered; they are listed under `cycle`.
+    """
+    index = await _prerequisite_index()
+    order, cycle = index.learning_order(topic_id)
+    if len(order) == 1:
+        await _require_topic(topic_id)
+    return {"topic_id": topic_id, "order": order, "cycle": cycle}
+
+@app.post("/topics/{topic_id}/prerequisites")
+async def add_prerequisite(topic_id: str, link: PrerequisiteLink):
+    prerequisite_id = link.prerequisite.replace('/', ':')
+    index = await _prerequisite_index()
+    if index.creates_cycle(prerequisite_id, topic_id):
+        raise HTTPException(status_code=409, detail=f"{prerequisite_id} depends on {topic_id}; the link would create a cycle")
+    if not await db.create_relationship(prerequisite_id, topic_id):
+        raise HTTPException(status_code=404, detail="Topic not found")
+    index.add_edge(prerequisite_id, topic_id)
+    return {"topic_id": topic_id, "prerequisite": prerequisite_id, "status": "linked"}
+
+@app.delete("/topics/{topic_id}/prerequisites/{prerequisite_id}")
+async def remove_prerequisite(topic_id: str, prerequisite_id: str):
+    if not await db.delete_relationship(prerequisite_id, topic_id):
+        raise HTTPException(status_code=404, detail="Prerequisite not found")
+    (await _prerequisite_index()).remove_edge(prerequisite_id, topic_id)
+    return {"status": "deleted"}
+
+async def _prerequisite_index():
+    # Built on first use if loading it at startup failed
+    if not prerequisite_index.ready:
+        try:
+            prerequisite_index.build(await db.get_prerequisite_edges())
+        except Exception as e:
+            print(f"Database error loading prerequisites: {str(e)}")
+            raise HTTPException(status_code=503, detail="Prerequisite index unavailable")
+    return prerequisite_index
+
+async def _require_topic(topic_id):
+    if await db.get_topic(topic_id) is None:
+        raise HTTPException(status_code=404, detail="Topic not found")
+
 @app.post("/topics/{topic_id}/review")
 async def review_topic(topic_id: str, update: TopicUpdate):
-    graph_data = db.get_full_graph()
-    if topic_id not in graph_data["topics"]:
+    # A point lookup of this topic, with its reviews only if the scheduler uses them
+    topic_data = await db.get_topic(topic_id, include_history=scheduler.needs_history)
+    if topic_data is None:
         raise HTTPException(status_code=404, detail="Topic not found")
+
+    now = datetime.now()
+    interval, new_stage = scheduler.schedule(topic_data, update.difficulty, now)
+    next_review = now + timedelta(days=interval)
     
-    topic_data = graph_data["topics"][topic_id].copy()  
-    
-  
-    current_stage = topic_data['stage']
-    stage_intervals = {
-        'first_time': 1,
-        'early_stage': 3,
-        'mid_stage': 7,
-        'late_stage': 14,
-        'mastered': 30
-    }
-    
-    base_interval = stage_intervals[current_stage]
-    
-    if update.difficulty == 'hard':
-        interval = max(1, round(base_interval * 0.6))
-        new_stage = _decrease_stage(current_stage)
-    elif update.difficulty == 'easy':
-        interval = round(base_interval * 1.4)
-        new_stage = _increase_stage(current_stage)
-    else:
-        interval = base_interval
-        new_stage = current_stage
-    
-    
-    next_review = datetime.now() + timedelta(days=interval)
-    
-    
-    topic_data['stage'] = new_stage
-    topic_data['next_review'] = next_review
-    topic_data['review_history'].append({
-        'date': datetime.now(),
+    review = {
+        'date': now,
         'difficulty': update.difficulty,
         'interval': interval
-    })
+    }
     
-    # Update in database
-    db.update_topic(topic_id, topic_data)
+    # Append the review in place instead of rewriting the topic
+    if not await db.record_review(topic_id, review, new_stage, next_review):
+        raise HTTPException(status_code=404, detail="Topic not found")
+
+    await _log_change('review', 'create', topic_id, {
+        'topic_id': topic_id, **review, 'stage': new_stage, 'next_review': next_review
+    })
     
     return {
         "next_review": next_review.isoformat(),
@@ -227,16 +521,6 @@ async def review_topic(topic_id: str, update: TopicUpdate):
         "interval": interval
     }
 
-def _decrease_stage(current_stage):
-    stages = ['first_time', 'early_stage', 'mid_stage', 'late_stage', 'mastered']
-    current_idx = stages.index(current_stage)
-    return stages[max(0, current_idx - 1)]
-
-def _increase_stage(current_stage):
-    stages = ['first_time', 'early_stage', 'mid_stage', 'late_stage', 'mastered']
-    current_idx = stages.index(current_stage)
-    return stages[min(len(stages) - 1, current_idx + 1)]
-
 @app.post("/content/")
 async def create_content(content: ContentCreate):
     content_id = f"content:{uuid.uuid4()}"
@@ -248,26 +532,25 @@ async def create_content(content: ContentCreate):
         "created_at": datetime.now()
     }
     
-    db.create_content_node(content_data)
+    await db.create_content_node(content_data)
     
     # Create relationships to topics
     for topic_id in content.related_topics:
-        db.create_content_relationship(content_id, topic_id)
+        await db.create_content_relationship(content_id, topic_id)
+
+    await _log_change('content', 'create', content_id, {
+        **content_data, 'related_topics': content.related_topics
+    })
+    search_index.add({**content_data, 'related_topic_ids': content.related_topics})
+    embedding_worker.submit('content', content_id, content_text(content_data))
     
     return {"content_id": content_id, "status": "created"}
 
-@app.get("/content/{content_id}")
-async def get_content(content_id: str):
-    content = db.get_content(content_id)
-    if not content:
-        raise HTTPException(status_code=404, detail="Content not found")
-    return content
-
 @app.get("/content/by-topic/{topic_id}")
 async def get_content_by_topic(topic_id: str):
     """Get all content related to a specific topic"""
     try:
-        content_list = db.get_content_by_topic(topic_id)
+        content_list = await db.get_content_by_topic(topic_id)
         return content_list
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting content: {str(e)}")
@@ -286,11 +569,11 @@ async def create_content(content: ContentCreate):
         }
         
         # Create content node in Neo4j
-        db.create_content_node(content_data)
+        await db.create_content_node(content_data)
         
         # Create relationships to topics
         for topic_id in content.related_topics:
-            db.create_content_relationship(content_id, topic_id)
+            await db.create_content_relationship(content_id, topic_id)
         
         return {"content_id": content_id, "status": "created"}
     except Exception as e:
@@ -298,49 +581,318 @@ async def create_content(content: ContentCreate):
 
 @app.get("/content/by-subject/{subject}")
 async def get_content_by_subject(subject: str):
-    content_list = db.get_content_by_subject(subject)
+    content_list = await db.get_content_by_subject(subject)
     return content_list
 
 @app.get("/content/by-type/{content_type}")
 async def get_content_by_type(content_type: str):
-    content_list = db.get_content_by_type(content_type)
+    content_list = await db.get_content_by_type(content_type)
     return content_list
 
 @app.get("/content/search")
-async def search_content(query: str):
-    content_list = db.search_content(query)
-    return content_list
+async def search_content(query: str, limit: int = 20, offset: int = 0, source: str = 'index'):
+    """Ranked full-text search over content titles and bodies.
+
+    Answered from the in-process search index unless `source=database` is
+    passed or the index hasn't been built yet.
+    """
+    if limit < 1 or limit > 100:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 100")
+    if offset < 0:
+        raise HTTPException(status_code=400, detail="offset must not be negative")
+    if source not in ('index', 'database'):
+        raise HTTPException(status_code=400, detail="source must be 'index' or 'database'")
+    if source == 'index' and search_index.ready:
+        return search_index.search(query, limit=limit, offset=offset)
+    try:
+        return await db.search_content(query, limit=limit, skip=offset)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error searching content: {str(e)}")
+
+@app.get("/content/semantic-search")
+async def semantic_search_content(query: str, limit: int = 10):
+    """Content closest in meaning to the query, by embedding similarity"""
+    if limit < 1 or limit > 100:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 100")
+    vector = (await asyncio.to_thread(embedder.embed, [query]))[0]
+    matches = dict(semantic_indexes['content'].search(vector, limit))
+    content_list = await db.get_content_by_ids(list(matches))
+    return [{**content, 'score': matches[content['id']]} for content in content_list]
+
+# Registered after the fixed /content/... paths so it doesn't shadow them
+@app.get("/content/{content_id}")
+async def get_content(content_id: str):
+    content = await db.get_content(content_id)
+    if not content:
+        raise HTTPException(status_code=404, detail="Content not found")
+    return content
 
 @app.post("/study-sessions/")
-async def create_study_session(session_data: dict):
+async def create_study_session(session: StudySessionCreate):
     """Record a planned study session"""
+    session_data = _session_data(session)
     try:
-        # Create a study session record in the database
-        session_id = db.create_study_session({
-            "id": f"session:{uuid.uuid4()}",
-            "start_time": session_data["start_time"],
-            "end_time": session_data["end_time"],
-            "topics": session_data["topics"],
-            "durations": session_data["durations"],
-            "created_at": datetime.now().isoformat()
-        })
-        
+        session_id = await db.create_study_session(session_data)
         return {"session_id": session_id, "status": "created"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating study session: {str(e)}")
 
+MAX_SESSION_BATCH = 1000
+
+@app.post("/study-sessions/bulk")
+async def create_study_sessions(batch: StudySessionBatch):
+    """Record many study sessions, e.g. a week planned while offline.
+
+    All sessions and their topic links are written in one transaction, so
+    either every session is created or none is.
+    """
+    if len(batch.sessions) > MAX_SESSION_BATCH:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_SESSION_BATCH} sessions per batch")
+    sessions = [_session_data(session) for session in batch.sessions]
+    try:
+        session_ids = await db.create_study_sessions(sessions)
+        return {"session_ids": session_ids, "status": "created"}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error creating study sessions: {str(e)}")
+
+def _session_data(session):
+    if len(session.topics) != len(session.durations):
+        raise HTTPException(status_code=400, detail="topics and durations must have the same length")
+    if any(duration < 1 for duration in session.durations):
+        raise HTTPException(status_code=400, detail="durations must be positive")
+    # Comparing an aware time with a naive one would raise, so both are
+    # first brought to naive local time like the other stored times
+    start, end = _local_time(session.start_time), _local_time(session.end_time)
+    if end <= start:
+        raise HTTPException(status_code=400, detail="end_time must be after start_time")
+    return {
+        "id": f"session:{uuid.uuid4()}",
+        "start_time": start.isoformat(),
+        "end_time": end.isoformat(),
+        "topics": session.topics,
+        "durations": session.durations,
+        "created_at": datetime.now().isoformat()
+    }
+
+MAX_PLAN_TOPICS = 2000
+
+@app.post("/study-sessions/plan")
+async def plan_study_session(request: SessionPlanRequest):
+    """Plan a session from the topics due at its start.
+
+    Due topics come from the (status, next_review) index, most overdue
+    first, and are packed into focus blocks in prerequisite order. The plan
+    is not stored; its `topics` and `durations` can be posted to
+    /study-sessions/ once the user accepts it.
+    """
+    start, end = _local_time(request.start_time), _local_time(request.end_time)
+    if request.energy not in ENERGY_LEVELS:
+        raise HTTPException(status_code=400, detail=f"energy must be one of: {', '.join(ENERGY_LEVELS)}")
+    if not start < end <= start + timedelta(days=1):
+        raise HTTPException(status_code=400, detail="end_time must be after start_time and at most a day later")
+    if request.block_minutes is not None and request.block_minutes < 1:
+        raise HTTPException(status_code=400, detail="block_minutes must be positive")
+    if request.break_minutes is not None and request.break_minutes < 0:
+        raise HTTPException(status_code=400, detail="break_minutes must not be negative")
+
+    try:
+        topics = await db.get_due_reviews(start, limit=MAX_PLAN_TOPICS)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error loading due topics: {str(e)}")
+    return plan_session(
+        topics, start, end, request.energy, await _prerequisite_index(),
+        block_minutes=request.block_minutes, break_minutes=request.break_minutes
+    )
+
+def _local_time(value):
+    # Topic times are stored as naive local times
+    return value.astimezone().replace(tzinfo=None) if value.tzinfo else value
+
 @app.get("/content/")
 async def get_all_content():
     """Get all content resources"""
     try:
-        content_list = db.get_all_content()
+        content_list = await db.get_all_content()
         return content_list
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting content: {str(e)}")
 
+@app.post("/sync")
+async def sync_changes(batch: SyncBatch):
+    """Apply a batch of client changes in one transaction.
+
+    Returns a result per submitted change and, when the client sends its
+    last seen `since` version, the server changes it hasn't seen yet.
+    """
+    operations, results, log = prepare_batch(batch.changes)
+    try:
+        applied, duplicates, version = await db.apply_sync_batch(operations, log)
+    except Exception as e:
+        print(f"Database error in sync: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to apply sync batch")
+    _index_synced_changes(operations, log, applied, duplicates)
+
+    server_changes = []
+    if batch.since is not None:
+        # Leave out what this batch just wrote; the client already has it
+        own = {entry['id'] for entry in log.values()}
+        server_changes = [
+            {'type': change['type'], 'action': change['action'], 'data': change['data']}
+            for change in await _changes_since(batch.since, MAX_CHANGES)
+            if change['change_id'] not in own
+        ]
+
+    return {
+        "results": finish_results(results, log, applied, duplicates),
+        "server_changes": server_changes,
+        "version": version
+    }
+
+@app.get("/changes")
+async def get_changes(since: int = 0, limit: int = 500):
+    """Change-log entries newer than the client's `since` version."""
+    if limit < 1 or limit > MAX_CHANGES:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {MAX_CHANGES}")
+    changes = await _changes_since(since, limit + 1)
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    # Versions are unique, so the last one returned is a safe next watermark
+    version = changes[-1]['version'] if changes else max(since, await db.get_sync_version())
+    return {"changes": changes, "version": version, "has_more": has_more}
+
+@app.get("/unsynced")
+async def get_unsynced(limit: int = 100):
+    """Logged changes no client has confirmed yet, oldest first."""
+    if limit < 1 or limit > MAX_CHANGES:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {MAX_CHANGES}")
+    return [change_from_record(change) for change in await db.get_unsynced(limit)]
+
+@app.post("/sync/confirm")
+async def confirm_changes(confirm: SyncConfirm):
+    confirmed = await db.confirm_changes(confirm.change_ids)
+    return {"confirmed": confirmed}
+
+MAX_CHANGES = 1000
+
+async def _changes_since(since, limit):
+    return [change_from_record(change) for change in await db.get_changes(since, limit)]
+
+def _index_synced_changes(operations, log, applied, duplicates):
+    """Bring the search and embedding indexes in line with an applied sync batch."""
+    # Index content as it was written, so its stamps match what reconcile
+    # reads back from the database on the next start
+    content_rows = {row['key']: row for row in operations.get('content_upsert', [])}
+    for key, entry in log.items():
+        if entry['type'] not in ('content', 'topic') or key not in applied or entry['id'] in duplicates:
+            continue
+        if entry['action'] == 'delete':
+            semantic_indexes[entry['type']].remove(entry['entity_id'])
+            if entry['type'] == 'content':
+                search_index.remove(entry['entity_id'])
+            else:
+                prerequisite_index.remove_topic(entry['entity_id'])
+            continue
+        data = json.loads(entry['data'])
+        if entry['type'] == 'topic':
+            embedding_worker.submit('topic', data['id'], topic_text(data))
+            continue
+        row = content_rows[key]
+        properties = row['properties']
+        updated_at = row['updated_at']
+        indexed = search_index.get(row['id'])
+        if indexed and indexed['title'] == properties['title'] and indexed['content'] == properties['content']:
+            # content_upsert leaves updated_at alone when nothing changed
+            updated_at = indexed.get('updated_at')
+        search_index.add({
+            'id': row['id'],
+            **properties,
+            'updated_at': updated_at,
+            'related_topic_ids': row['related_topics']
+        })
+        embedding_worker.submit('content', data['id'], content_text(data))
+
+async def _log_change(entity_type, action, entity_id, data):
+    # The write itself has already succeeded, so a change-log failure is
+    # reported but doesn't fail the request
+    try:
+        await db.log_changes([change_entry(entity_type, action, entity_id, data)])
+    except Exception as e:
+        print(f"Error logging {entity_type} change: {str(e)}")
+
+@app.on_event("startup")
+async def startup_event():
+    await db.ensure_schema()
+    await _load_search_index()
+    await _load_embeddings()
+    await _load_prerequisites()
+
 @app.on_event("shutdown")
 async def shutdown_event():
-    db.close()
+    if search_index.ready:
+        search_index.save(SEARCH_INDEX_SNAPSHOT)
+    await embedding_worker.stop()
+    await db.close()
+
+async def _load_search_index():
+    """Restore the search index from its snapshot, or build it from scratch.
+
+    The snapshot is checked against when each content item last changed, so
+    content created, edited or deleted while the server was down (by the
+    importer, say) is re-indexed or dropped without reading every body.
+    """
+    global search_index
+    try:
+        snapshot = SearchIndex.load(SEARCH_INDEX_SNAPSHOT)
+        if snapshot is not None:
+            await _reconcile_search_index(snapshot)
+            search_index = snapshot
+        else:
+            search_index.build(await db.get_all_content())
+        print(f"Search index ready with {len(search_index)} content items")
+    except Exception as e:
+        # Searches fall back to the database until the index is ready
+        print(f"Error building search index: {str(e)}")
+
+async def _reconcile_search_index(index):
+    changed = index.reconcile(await db.get_content_stamps())
+    if changed:
+        for content in await db.get_content_by_ids(changed):
+            index.add(content)
+
+async def _load_prerequisites():
+    """Build the prerequisite closure from every PREREQUISITE_OF edge.
+
+    Edges the vault importer writes are picked up here, on the next start
+    or when the importer calls /cache/invalidate.
+    """
+    try:
+        prerequisite_index.build(await db.get_prerequisite_edges())
+        print(f"Prerequisite index ready with {len(prerequisite_index)} edges")
+        if prerequisite_index.cycles():
+            print(f"Prerequisite cycles through: {', '.join(prerequisite_index.cycles())}")
+    except Exception as e:
+        print(f"Error building prerequisite index: {str(e)}")
+
+async def _load_embeddings():
+    """Load stored vectors and queue whatever has no embedding from this model yet.
+
+    That covers content and topics written by the importer or before a
+    change of EMBEDDING_MODEL, and content whose body changed, since every
+    writer clears the embedding then; the worker embeds them in the
+    background.
+    """
+    embedding_worker.start()
+    try:
+        for kind, index in semantic_indexes.items():
+            stored = await db.get_embeddings(kind, embedder.name)
+            if stored:
+                index.upsert([item_id for item_id, _ in stored], [vector for _, vector in stored])
+        for content in await db.get_pending_embeddings('content', embedder.name):
+            embedding_worker.submit('content', content['id'], content_text(content))
+        for topic in await db.get_pending_embeddings('topic', embedder.name):
+            embedding_worker.submit('topic', topic['id'], topic_text(topic))
+    except Exception as e:
+        print(f"Error loading embeddings: {str(e)}")
 
 if __name__ == "__main__":
     import uvicorn
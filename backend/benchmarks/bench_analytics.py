@@ -0,0 +1,92 @@
+"""Compare the analytics rollup with tallying every review per request.
+
+The scan row walks a flat list of reviews the way LearningVisualization
+walks each topic's review_history; the rollup rows read the per-day
+aggregates the analytics endpoints serve. Also times patching the rollup
+for one review, which record_review does on every review.
+
+    python benchmarks/bench_analytics.py --reviews 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from analytics import AnalyticsRollup
+from spacing import DIFFICULTIES
+
+
+def synthetic_reviews(count, days, seed=0):
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1)
+    return [
+        {
+            "date": start + timedelta(days=rng.randrange(days), seconds=rng.randrange(86400)),
+            "difficulty": rng.choice(DIFFICULTIES),
+            "interval": rng.choice((1, 3, 7, 14, 30))
+        }
+        for _ in range(count)
+    ]
+
+
+def scan_reviews_per_day(reviews):
+    days = defaultdict(lambda: defaultdict(int))
+    for review in reviews:
+        days[review["date"].date()][review["difficulty"]] += 1
+    return days
+
+
+def best_of(call, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        call()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reviews", type=int, default=1_000_000)
+    parser.add_argument("--days", type=int, default=365, help="Days the reviews are spread over")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement; the best is reported")
+    args = parser.parse_args()
+
+    reviews = synthetic_reviews(args.reviews, args.days)
+    # The rows the "days" aggregation in database.ANALYTICS_QUERIES returns
+    rows = defaultdict(lambda: [0, 0])
+    for review in reviews:
+        totals = rows[(review["date"].date().isoformat(), review["difficulty"])]
+        totals[0] += 1
+        totals[1] += review["interval"]
+    rollup = AnalyticsRollup()
+    rollup.fill([], [
+        {"day": day, "difficulty": difficulty, "reviews": count, "interval_total": total}
+        for (day, difficulty), (count, total) in rows.items()
+    ], [])
+
+    month = (date(2025, 6, 1), date(2025, 6, 30))
+    print(f"{args.reviews} reviews over {args.days} days ({len(rows)} rollup rows)")
+    print(f"{'query':<26} {'time':>10}")
+    print(f"{'scan reviews per day':<26} {best_of(lambda: scan_reviews_per_day(reviews), args.repeat) * 1000:>7.1f} ms")
+    for name, call in (
+        ("rollup reviews per day", rollup.reviews_per_day),
+        ("rollup difficulty mix", rollup.difficulty_mix),
+        ("rollup intervals", rollup.interval_progression),
+        ("rollup one month", lambda: rollup.reviews_per_day(*month)),
+    ):
+        print(f"{name:<26} {best_of(call, args.repeat) * 1000:>7.2f} ms")
+
+    added = reviews[:10_000]
+    started = time.perf_counter()
+    for review in added:
+        rollup.add_review(review, "mid_stage", "late_stage", "active")
+    print(f"{'add_review':<26} {(time.perf_counter() - started) / len(added) * 1e6:>7.2f} us")
+
+
+if __name__ == "__main__":
+    main()
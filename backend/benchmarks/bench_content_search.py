@@ -0,0 +1,96 @@
+"""Compare content search latency between the in-process index and Neo4j.
+
+Without --db the index is built over a synthetic corpus. With --db both
+paths search the content already stored in Neo4j: the index is built from
+get_all_content and the same queries are sent to search_content.
+
+    python benchmarks/bench_content_search.py --docs 5000
+    python benchmarks/bench_content_search.py --db
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from search_index import SearchIndex, tokenize
+
+QUERIES = ["spaced repetition", "active recall", "focus", "energy levels", "pomod", "habit form", "interleav"]
+
+
+def synthetic_corpus(count, words_per_doc, seed=0):
+    """Markdown-sized documents drawn from the vocabulary of the bundled content."""
+    rng = random.Random(seed)
+    content_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "content")
+    vocabulary = set()
+    for name in os.listdir(content_dir):
+        if name.endswith(".md"):
+            with open(os.path.join(content_dir, name)) as f:
+                vocabulary.update(tokenize(f.read()))
+    vocabulary = sorted(vocabulary)
+    start = datetime(2024, 1, 1)
+    return [
+        {
+            "id": f"content:{i}",
+            "title": " ".join(rng.choices(vocabulary, k=4)),
+            "type": "article",
+            "content": " ".join(rng.choices(vocabulary, k=words_per_doc)),
+            "created_at": start + timedelta(minutes=i),
+            "related_topic_ids": []
+        }
+        for i in range(count)
+    ]
+
+
+def time_queries(search, repeat):
+    timings = []
+    for _ in range(repeat):
+        for query in QUERIES:
+            started = time.perf_counter()
+            search(query)
+            timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.95) - 1]
+
+
+def report(name, timings):
+    print(f"{name:<10} p50 {timings[0]:8.3f} ms   p95 {timings[1]:8.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=5000, help="Synthetic documents to index")
+    parser.add_argument("--words", type=int, default=300, help="Words per synthetic document")
+    parser.add_argument("--repeat", type=int, default=20, help="Passes over the query set")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--db", action="store_true", help="Search the content stored in Neo4j")
+    args = parser.parse_args()
+
+    connection = None
+    if args.db:
+        load_dotenv()
+        from database import Neo4jConnection
+        connection = Neo4jConnection()
+        corpus = connection.get_all_content()
+    else:
+        corpus = synthetic_corpus(args.docs, args.words)
+
+    index = SearchIndex()
+    started = time.perf_counter()
+    index.build(corpus)
+    print(f"Indexed {len(index)} documents in {time.perf_counter() - started:.2f} s")
+
+    report("index", time_queries(lambda query: index.search(query, limit=args.limit), args.repeat))
+    if connection is not None:
+        try:
+            report("database", time_queries(lambda query: connection.search_content(query, limit=args.limit), args.repeat))
+        finally:
+            connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Compare batch interval scheduling with the per-topic paths.
+
+Random days-since-last-review, stages and difficulties are scheduled three
+ways: one fuzzy-pipeline evaluation per topic (the uncompiled path), one
+next_interval call per topic (a compiled-table lookup), and a single
+adjust_intervals_batch call. Per-topic paths are timed on at most
+--scalar-limit topics and scaled up.
+
+    python benchmarks/bench_day_spacing.py
+    python benchmarks/bench_day_spacing.py --sizes 10000 100000 1000000
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from day_spacing_alogirthm import EnhancedSpacedLearningSystem, STAGES, DIFFICULTIES
+
+
+def workload(count, seed=0):
+    rng = np.random.default_rng(seed)
+    # Stay inside the covered range so the per-topic 'hard' branch never sees None
+    days = rng.integers(1, 60, count)
+    stages = rng.integers(0, len(STAGES), count)
+    difficulties = rng.integers(0, len(DIFFICULTIES), count)
+    return days, stages, difficulties
+
+
+def time_fuzzy(learning_system, days, stages, difficulties):
+    difficulty_names = [DIFFICULTIES[code] for code in difficulties]
+    started = time.perf_counter()
+    for day, difficulty in zip(days.tolist(), difficulty_names):
+        learning_system._fuzzy_interval(day, difficulty)
+    return time.perf_counter() - started
+
+
+def time_compiled(learning_system, days, stages, difficulties):
+    stage_names = [STAGES[code] for code in stages]
+    difficulty_names = [DIFFICULTIES[code] for code in difficulties]
+    started = time.perf_counter()
+    for day, stage, difficulty in zip(days.tolist(), stage_names, difficulty_names):
+        learning_system.next_interval(day, stage, difficulty)
+    return time.perf_counter() - started
+
+
+def time_batch(learning_system, days, stages, difficulties, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        learning_system.adjust_intervals_batch(days, stages, difficulties)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--scalar-limit", type=int, default=100_000, help="Most topics to time one by one")
+    parser.add_argument("--repeat", type=int, default=5, help="Batch runs per size; the best is reported")
+    args = parser.parse_args()
+
+    learning_system = EnhancedSpacedLearningSystem()
+    print(f"{'topics':>10} {'fuzzy':>13} {'compiled':>13} {'batch':>10} {'speedup':>9}")
+    for count in args.sizes:
+        days, stages, difficulties = workload(count)
+        sample = min(count, args.scalar_limit)
+        scale = count / sample
+        fuzzy = time_fuzzy(learning_system, days[:sample], stages[:sample], difficulties[:sample]) * scale
+        compiled = time_compiled(learning_system, days[:sample], stages[:sample], difficulties[:sample]) * scale
+        batch = time_batch(learning_system, days, stages, difficulties, args.repeat)
+        marker = "*" if sample < count else " "
+        print(f"{count:>10} {fuzzy * 1000:>10.1f}{marker} ms {compiled * 1000:>10.1f}{marker} ms "
+              f"{batch * 1000:>7.1f} ms {fuzzy / batch:>8.0f}x")
+    if any(count > args.scalar_limit for count in args.sizes):
+        print(f"* extrapolated from {args.scalar_limit} topics")
+
+
+if __name__ == "__main__":
+    main()
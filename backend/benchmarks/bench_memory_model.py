@@ -0,0 +1,68 @@
+"""Time memory-model fitting and re-planning on simulated review logs.
+
+Logs are simulated from a model with perturbed parameters: each topic is
+reviewed around its scheduled interval and recalled with the probability
+that model predicts. The default model is then fitted to the logs and used
+to re-plan every topic.
+
+    python benchmarks/bench_memory_model.py
+    python benchmarks/bench_memory_model.py --reviews 1000000 --iterations 50
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from memory_model import MemoryModel, ReviewLogs, DEFAULT_PARAMETERS, DECAY, FACTOR, GRADES, LOWER, UPPER
+
+
+def simulate(model, topics, reviews_per_topic, seed=0):
+    """Flat (topic_index, time, grade) arrays for `topics` topics."""
+    rng = np.random.default_rng(seed)
+    grades = np.where(rng.random(topics) < 0.3, GRADES['hard'], GRADES['normal']).astype(np.int8)
+    times = rng.uniform(0, 365, topics)
+    stability, difficulty = model.update(np.full(topics, np.nan), np.full(topics, np.nan), np.zeros(topics), grades)
+    columns = [(times, grades)]
+    for _ in range(reviews_per_topic - 1):
+        elapsed = model.interval(stability) * rng.uniform(0.3, 2.5, topics)
+        recall = (1 + FACTOR * elapsed / stability) ** DECAY
+        recalled = rng.random(topics) < recall
+        grades = np.where(recalled, np.where(rng.random(topics) < 0.2, GRADES['easy'], GRADES['normal']), GRADES['hard']).astype(np.int8)
+        times = times + elapsed
+        stability, difficulty = model.update(stability, difficulty, elapsed, grades)
+        columns.append((times, grades))
+    topic_index = np.tile(np.arange(topics), reviews_per_topic)
+    return topic_index, np.concatenate([c[0] for c in columns]), np.concatenate([c[1] for c in columns])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reviews", type=int, default=100_000, help="Review logs to simulate")
+    parser.add_argument("--per-topic", type=int, default=10, help="Reviews per topic")
+    parser.add_argument("--iterations", type=int, default=100, help="Fitting iterations")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    truth = np.clip(np.array(DEFAULT_PARAMETERS) * rng.uniform(0.6, 1.6, len(DEFAULT_PARAMETERS)), LOWER, UPPER)
+    topics = args.reviews // args.per_topic
+    topic_index, times, grades = simulate(MemoryModel(truth), topics, args.per_topic)
+
+    started = time.perf_counter()
+    logs = ReviewLogs.from_arrays(np.arange(topics), topic_index, times, grades)
+    print(f"Packed {logs.review_count} reviews of {len(logs)} topics in {time.perf_counter() - started:.2f} s")
+
+    model = MemoryModel()
+    print(f"Log loss: default {model.loss(logs):.4f}, true parameters {MemoryModel(truth).loss(logs):.4f}")
+    started = time.perf_counter()
+    model.fit(logs, iterations=args.iterations)
+    print(f"Fitted {args.iterations} iterations in {time.perf_counter() - started:.2f} s, log loss {model.loss(logs):.4f}")
+
+    started = time.perf_counter()
+    model.replan(logs)
+    print(f"Re-planned {len(logs)} topics from {logs.review_count} reviews in {time.perf_counter() - started:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Time the prerequisite closure against walking the edges per query.
+
+Builds a layered synthetic prerequisite DAG, then compares
+PrerequisiteIndex queries with a breadth-first walk over the direct edges
+(what a variable-length Cypher expansion does server-side, minus the round
+trip) followed by a topological sort of what it found, along with the cost
+of adding and removing single edges.
+
+    python benchmarks/bench_prerequisites.py --topics 20000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from prerequisites import PrerequisiteIndex
+
+
+def layered_edges(topics, layers, fan_in, seed=0):
+    """Each topic depends on `fan_in` topics from the layer below."""
+    rng = random.Random(seed)
+    width = topics // layers
+    edges = set()
+    for layer in range(1, layers):
+        below = range((layer - 1) * width, layer * width)
+        for topic in range(layer * width, (layer + 1) * width):
+            for prerequisite in rng.sample(below, fan_in):
+                edges.add((f"t{prerequisite}", f"t{topic}"))
+    return sorted(edges)
+
+
+def walk_prerequisites(prerequisites, topic_id):
+    seen, queue = set(), deque(prerequisites.get(topic_id, ()))
+    while queue:
+        current = queue.popleft()
+        if current not in seen:
+            seen.add(current)
+            queue.extend(prerequisites.get(current, ()))
+    return seen
+
+
+def walk_learning_order(prerequisites, topic_id):
+    topics = walk_prerequisites(prerequisites, topic_id) | {topic_id}
+    remaining = {topic: sum(p in topics for p in prerequisites.get(topic, ())) for topic in topics}
+    dependents = {}
+    for topic in topics:
+        for prerequisite_id in prerequisites.get(topic, ()):
+            dependents.setdefault(prerequisite_id, []).append(topic)
+    ready = sorted(topic for topic, count in remaining.items() if not count)
+    order = []
+    while ready:
+        topic = ready.pop()
+        order.append(topic)
+        for dependent_id in dependents.get(topic, ()):
+            remaining[dependent_id] -= 1
+            if not remaining[dependent_id]:
+                ready.append(dependent_id)
+    return order
+
+
+def median_us(call, arguments):
+    timings = []
+    for argument in arguments:
+        started = time.perf_counter()
+        call(argument)
+        timings.append((time.perf_counter() - started) * 1e6)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--topics", type=int, default=20_000)
+    parser.add_argument("--layers", type=int, default=8, help="Depth of the prerequisite chains")
+    parser.add_argument("--fan-in", type=int, default=2, help="Direct prerequisites per topic")
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    edges = layered_edges(args.topics, args.layers, args.fan_in)
+    prerequisites = {}
+    for prerequisite_id, topic_id in edges:
+        prerequisites.setdefault(topic_id, []).append(prerequisite_id)
+
+    index = PrerequisiteIndex()
+    started = time.perf_counter()
+    index.build(edges)
+    print(f"{len(edges)} edges over {args.topics} topics; closure built in {time.perf_counter() - started:.2f} s")
+
+    rng = random.Random(1)
+    queries = [topic_id for _, topic_id in rng.sample(edges, args.queries)]
+    sizes = [len(index.prerequisites(topic_id)) for topic_id in queries]
+    print(f"median {statistics.median(sizes):.0f} transitive prerequisites per query")
+    print(f"{'query':<22} {'median':>10}")
+    print(f"{'edge walk':<22} {median_us(lambda t: walk_prerequisites(prerequisites, t), queries):>7.1f} us")
+    print(f"{'edge walk + sort':<22} {median_us(lambda t: walk_learning_order(prerequisites, t), queries):>7.1f} us")
+    print(f"{'prerequisites':<22} {median_us(index.prerequisites, queries):>7.1f} us")
+    print(f"{'learning_order':<22} {median_us(index.learning_order, queries):>7.1f} us")
+
+    changed = rng.sample(edges, min(args.queries, 200))
+    print(f"{'remove_edge':<22} {median_us(lambda edge: index.remove_edge(*edge), changed):>7.1f} us")
+    print(f"{'add_edge':<22} {median_us(lambda edge: index.add_edge(*edge), changed):>7.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Compare the review schedulers: cost per review and batch re-planning.
+
+Each scheduler schedules single reviews from topic dicts shaped like
+get_topic(include_history=True) returns them, then re-plans --topics
+topics in one schedule_batch call.
+
+    python benchmarks/bench_schedulers.py
+    python benchmarks/bench_schedulers.py --topics 1000000 --reviews 50000
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from spacing import STAGES, DIFFICULTIES
+from schedulers import SCHEDULERS
+
+
+def topics(count, now, seed=0):
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            "id": f"topic:{i}",
+            "stage": STAGES[stage],
+            "review_history": [
+                {"date": now - timedelta(days=int(days)), "difficulty": "normal", "interval": 1}
+                for days in sorted(rng.integers(0, 90, history), reverse=True)
+            ]
+        }
+        for i, (stage, history) in enumerate(zip(rng.integers(0, len(STAGES), count), rng.integers(0, 8, count)))
+    ]
+
+
+def time_reviews(scheduler, topic_list, difficulties, now):
+    started = time.perf_counter()
+    for topic, difficulty in zip(topic_list, difficulties):
+        scheduler.schedule(topic, difficulty, now)
+    return (time.perf_counter() - started) / len(topic_list)
+
+
+def time_batch(scheduler, count, repeat, seed=0):
+    rng = np.random.default_rng(seed)
+    days = rng.integers(0, 90, count)
+    stages = rng.integers(0, len(STAGES), count)
+    difficulties = rng.integers(0, len(DIFFICULTIES), count)
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        scheduler.schedule_batch(days, stages, difficulties)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reviews", type=int, default=20_000, help="Single reviews to time")
+    parser.add_argument("--topics", type=int, default=100_000, help="Topics per batch re-plan")
+    parser.add_argument("--repeat", type=int, default=5, help="Batch runs; the best is reported")
+    args = parser.parse_args()
+
+    now = datetime.now()
+    topic_list = topics(args.reviews, now)
+    difficulties = [DIFFICULTIES[code] for code in np.random.default_rng(1).integers(0, len(DIFFICULTIES), args.reviews)]
+
+    print(f"{'scheduler':<12} {'per review':>12} {'batch':>10} {'topics/s':>12}")
+    for name, scheduler_class in SCHEDULERS.items():
+        scheduler = scheduler_class()
+        per_review = time_reviews(scheduler, topic_list, difficulties, now)
+        batch = time_batch(scheduler, args.topics, args.repeat)
+        print(f"{name:<12} {per_review * 1e6:>9.2f} us {batch * 1000:>7.1f} ms {args.topics / batch:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Time session planning over a synthetic backlog of due topics.
+
+Plans sessions of several lengths for each energy level from --topics due
+topics with a random prerequisite DAG between them, as the
+/study-sessions/plan endpoint does once the due topics are loaded.
+
+    python benchmarks/bench_session_planner.py --topics 500
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from prerequisites import PrerequisiteIndex
+from session_planner import ENERGY_LEVELS, STAGE_MINUTES, plan_session
+
+
+def due_topics(count, now, seed=0):
+    rng = random.Random(seed)
+    return [
+        {
+            "id": f"topic:{i}",
+            "name": f"Topic {i}",
+            "subject": f"Subject {i % 10}",
+            "stage": rng.choice(list(STAGE_MINUTES)),
+            "next_review": now - timedelta(days=rng.random() * 30)
+        }
+        for i in range(count)
+    ]
+
+
+def prerequisite_index(topics, edges_per_topic, seed=0):
+    rng = random.Random(seed)
+    index = PrerequisiteIndex()
+    # Edges point from lower to higher ids, so the graph is acyclic
+    index.build(
+        (topics[a]["id"], topics[b]["id"])
+        for a, b in (sorted(rng.sample(range(len(topics)), 2)) for _ in range(len(topics) * edges_per_topic))
+    )
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--topics", type=int, default=500, help="Due topics")
+    parser.add_argument("--edges", type=int, default=2, help="Prerequisite edges per topic")
+    parser.add_argument("--repeat", type=int, default=20, help="Runs per plan; the median is reported")
+    args = parser.parse_args()
+
+    now = datetime.now()
+    topics = due_topics(args.topics, now)
+    index = prerequisite_index(topics, args.edges)
+
+    print(f"{args.topics} due topics, {len(index)} prerequisite edges")
+    print(f"{'energy':<8} {'window':>8} {'planned':>8} {'blocks':>7} {'median':>10}")
+    for energy in ENERGY_LEVELS:
+        for hours in (1, 4, 12):
+            timings = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                plan = plan_session(topics, now, now + timedelta(hours=hours), energy, index)
+                timings.append(time.perf_counter() - started)
+            print(f"{energy:<8} {hours:>6} h {len(plan['topics']):>8} {len(plan['blocks']):>7} "
+                  f"{statistics.median(timings) * 1000:>7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
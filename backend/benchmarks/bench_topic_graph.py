@@ -0,0 +1,99 @@
+"""Compare TopicGraph with CompactTopicGraph on a large synthetic hierarchy.
+
+Reports the memory each layout allocates (tracemalloc) and the latency of
+get_subtopics and get_related_topics. The dict-node row rebuilds the tree
+with a TopicNode subclass that has a __dict__, i.e. the layout before
+TopicNode gained __slots__.
+
+    python benchmarks/bench_topic_graph.py --paths 100000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import day_spacing_alogirthm
+from day_spacing_alogirthm import TopicGraph, TopicNode, CompactTopicGraph
+
+
+class DictTopicNode(TopicNode):
+    """TopicNode with a per-instance __dict__, as before __slots__."""
+
+
+def synthetic_paths(count, branching, depth, seed=0):
+    rng = random.Random(seed)
+    paths = set()
+    while len(paths) < count:
+        length = rng.randint(2, depth)
+        paths.add("/".join(f"{level}-{rng.randrange(branching)}" for level in range(length)))
+    return sorted(paths, key=lambda path: rng.random())
+
+
+def build_tree(paths, review_data):
+    graph = TopicGraph()
+    for path, data in zip(paths, review_data):
+        graph.add_topic_path(path, data)
+    return graph
+
+
+def allocated(build):
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def time_calls(call, arguments):
+    timings = []
+    for argument in arguments:
+        started = time.perf_counter()
+        call(argument)
+        timings.append((time.perf_counter() - started) * 1e6)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--paths", type=int, default=100_000, help="Topic paths in the hierarchy")
+    parser.add_argument("--branching", type=int, default=12, help="Distinct names per level")
+    parser.add_argument("--depth", type=int, default=6, help="Longest path")
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    paths = synthetic_paths(args.paths, args.branching, args.depth)
+    # Review data is shared by every layout, so it is created up front and not counted
+    review_data = [{"status": "active", "stage": "first_time", "review_history": []} for _ in paths]
+    day_spacing_alogirthm.TopicNode = DictTopicNode
+    _, dict_tree_size = allocated(lambda: build_tree(paths, review_data))
+    day_spacing_alogirthm.TopicNode = TopicNode
+    graph, tree_size = allocated(lambda: build_tree(paths, review_data))
+    compact, compact_size = allocated(lambda: CompactTopicGraph.from_graph(graph))
+    started = time.perf_counter()
+    CompactTopicGraph.from_graph(graph)
+    build_time = time.perf_counter() - started
+
+    print(f"{len(compact)} nodes from {len(paths)} paths; compact snapshot built in {build_time:.2f} s")
+    print(f"{'layout':<18} {'memory':>10}")
+    print(f"{'dict nodes':<18} {dict_tree_size / 2**20:>7.1f} MB")
+    print(f"{'slotted nodes':<18} {tree_size / 2**20:>7.1f} MB")
+    print(f"{'compact arrays':<18} {compact_size / 2**20:>7.1f} MB")
+
+    rng = random.Random(1)
+    # Subtree queries at every depth: whole subjects down to leaves
+    subtree_queries = [path.rsplit("/", rng.randint(0, path.count("/")))[0] for path in rng.sample(paths, args.queries)]
+    related_queries = rng.sample(paths, args.queries)
+    print(f"{'query':<18} {'tree':>10} {'compact':>10}")
+    for name, tree_call, compact_call, queries in (
+        ("get_subtopics", graph.get_subtopics, compact.get_subtopics, subtree_queries),
+        ("get_related", graph.get_related_topics, compact.get_related_topics, related_queries),
+    ):
+        print(f"{name:<18} {time_calls(tree_call, queries):>7.1f} us {time_calls(compact_call, queries):>7.1f} us")
+
+
+if __name__ == "__main__":
+    main()
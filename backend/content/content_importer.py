@@ -1,154 +1,688 @@
-from neo4j import GraphDatabase
-import uuid
 from datetime import datetime
 import argparse
+import glob
+import hashlib
 import os
+import sys
 import json
+import re
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+from dotenv import load_dotenv
 
-# Neo4j connection settings
-URI = "bolt://100.77.110.46:7687"
-USER = "neo4j"
-PASSWORD = "qc7SCgkC.fN\"^*+"
+# The importer is run from this directory; share the backend's driver factory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database import create_driver, EMBEDDING_QUERIES
+from embeddings import create_embedder, content_text, topic_text
+
+# Content nodes with their topics and EXPLAINS links for a whole batch of
+# files; topics are created on first use. Content is keyed by its source
+# path, and rows whose content_hash is already stored are left alone, so
+# re-running an import only writes what changed. Returns the written ids.
+IMPORT_CONTENT = """
+    UNWIND $rows AS row
+    MERGE (c:Content {id: row.id})
+    ON CREATE SET c.created_at = row.created_at
+    WITH c, row
+    WHERE c.content_hash IS NULL OR c.content_hash <> row.content_hash
+    SET c.title = row.title,
+        c.type = row.type,
+        c.content = row.content,
+        c.source_path = row.source_path,
+        c.content_hash = row.content_hash,
+        c.updated_at = row.created_at
+    // A changed body needs a fresh embedding
+    REMOVE c.embedding, c.embedding_model
+    WITH c, row
+    CALL {
+        WITH c, row
+        MATCH (c)-[old:EXPLAINS]->(t:Topic)
+        WHERE NOT t.id IN [topic IN row.topics | topic.id]
+        DELETE old
+    }
+    CALL {
+        WITH c, row
+        UNWIND row.topics AS topic
+        MERGE (t:Topic {id: topic.id})
+        ON CREATE SET
+            t.subject = topic.subject,
+            t.name = topic.name,
+            t.status = 'active',
+            t.stage = 'first_time',
+            t.created_at = row.created_at,
+            t.next_review = $next_review
+        MERGE (c)-[:EXPLAINS]->(t)
+    }
+    RETURN collect(row.id) AS written
+    """
+
+DELETE_CONTENT = """
+    UNWIND $ids AS id
+    MATCH (c:Content {id: id})
+    DETACH DELETE c
+    """
+
+MANIFEST_NAME = '.import_manifest.json'
+MANIFEST_FORMAT = 1
+
+CONTENT_TYPES_BY_EXTENSION = {'.md': 'article', '.markdown': 'article', '.json': 'quiz'}
+
+# Obsidian vault mode. Links between notes become PREREQUISITE_OF edges
+# between their topics; edges the importer created are tagged so a later
+# sync only ever removes its own.
+SYNC_VAULT_EDGES = """
+    CALL {
+        UNWIND $removed AS edge
+        MATCH (:Topic {id: edge.from})-[r:PREREQUISITE_OF {source: 'obsidian'}]->(:Topic {id: edge.to})
+        DELETE r
+    }
+    CALL {
+        UNWIND $added AS edge
+        MATCH (p:Topic {id: edge.from})
+        MATCH (t:Topic {id: edge.to})
+        MERGE (p)-[r:PREREQUISITE_OF]->(t)
+        ON CREATE SET r.source = 'obsidian'
+    }
+    """
+
+VAULT_STATE_NAME = '.import_state.json'
+VAULT_STATE_FORMAT = 1
+
+FRONT_MATTER = re.compile(r'\A---\s*\n(.*?)\n---\s*(?:\n|\Z)', re.DOTALL)
+# [[Target]], [[Target|alias]], [[Target#Heading]] and ![[embeds]]
+WIKI_LINK = re.compile(r'\[\[([^\]|#^]+)(?:[#^][^\]|]*)?(?:\|[^\]]*)?\]\]')
 
 class ContentImporter:
-    def __init__(self, uri, user, password):
-        self.driver = GraphDatabase.driver(uri, auth=(user, password))
+    def __init__(self, uri=None, user=None, password=None):
+        """Connect using the given details or the NEO4J_* environment variables."""
+        self.driver = create_driver(uri, user, password)
+        self.database = os.getenv("NEO4J_DATABASE")
         
     def close(self):
         self.driver.close()
         
-    def import_content(self, title, content_type, content_text, topic_ids):
-        """Import content into Neo4j database"""
-        with self.driver.session() as session:
-            # Create a unique ID for the content
-            content_id = f"content:{uuid.uuid4()}"
-            created_at = datetime.now().isoformat()
-            
-            # Create content node
-            session.run("""
-                CREATE (c:Content {
-                    id: $id,
-                    title: $title,
-                    type: $type,
-                    content: $content,
-                    created_at: $created_at
-                })
-                RETURN c
-                """,
-                id=content_id,
-                title=title,
-                type=content_type,
-                content=content_text,
-                created_at=created_at
-            )
-            
-            print(f"✓ Created {content_type}: '{title}' (ID: {content_id})")
-            
-            # Create or find topics and link content
-            for topic_id in topic_ids:
-                try:
-                    # Parse topic_id to extract subject and name
-                    parts = topic_id.split(':')
-                    if len(parts) != 2:
-                        print(f"  ❌ Invalid topic ID format: {topic_id}. Expected format: subject:name")
-                        continue
-                        
-                    subject, name = parts
-                    
-                    # Create topic if it doesn't exist
-                    result = session.run("""
-                        MERGE (t:Topic {id: $topic_id})
-                        ON CREATE SET 
-                            t.subject = $subject,
-                            t.name = $name,
-                            t.status = 'active',
-                            t.stage = 'first_time',
-                            t.created_at = $now,
-                            t.next_review = $now
-                        RETURN t.id, t.name, count(t) as count
-                        """,
-                        topic_id=topic_id,
-                        subject=subject,
-                        name=name.replace('_', ' ').title(),
-                        now=datetime.now().isoformat()
-                    )
-                    
-                    record = result.single()
-                    if record and record["count"] == 1:
-                        print(f"  ✓ Created new topic: {topic_id}")
-                    
-                    # Create relationship between content and topic
-                    session.run("""
-                        MATCH (c:Content {id: $content_id})
-                        MATCH (t:Topic {id: $topic_id})
-                        MERGE (c)-[:EXPLAINS]->(t)
-                        """,
-                        content_id=content_id,
-                        topic_id=topic_id
-                    )
-                    
-                    print(f"  ✓ Linked to topic: {topic_id}")
-                        
-                except Exception as e:
-                    print(f"  ❌ Error with topic {topic_id}: {str(e)}")
-            
-            return content_id
-            
-    def import_from_file(self, file_path, content_type, topic_ids, title=None):
-        """Import content from a file"""
+    def import_content(self, title, content_type, content_text, topic_ids, source_path=None):
+        """Import content into Neo4j database.
+
+        Content is keyed by `source_path` (or by type and title without
+        one), so importing the same item again updates it in place and
+        an unchanged item isn't written at all.
+        """
+        row = content_row(title, content_type, content_text, topic_ids, source_path)
+        if not self.write_batch([row]):
+            print(f"✓ Unchanged {content_type}: '{title}' (ID: {row['id']})")
+            return row['id']
+
+        print(f"✓ Imported {content_type}: '{title}' (ID: {row['id']})")
+        for topic in row['topics']:
+            print(f"  ✓ Linked to topic: {topic['id']}")
+
+        return row['id']
+
+    def write_batch(self, rows):
+        """Write content rows, their topics and EXPLAINS links in one transaction.
+
+        Returns the ids of the rows that were new or changed.
+        """
+        with self.driver.session(database=self.database) as session:
+            return session.execute_write(lambda tx: tx.run(
+                IMPORT_CONTENT, rows=rows, next_review=datetime.now()
+            ).single()['written'])
+
+    def import_from_file(self, file_path, content_type, topic_ids, title=None, root=None):
+        """Import content from a file, keyed by its path relative to `root`.
+
+        That is the same key a --dir or --vault import of `root` gives the
+        file, so re-importing it on its own updates the same content node.
+        Without `root`, see import_root_for.
+        """
         try:
             with open(file_path, 'r', encoding='utf-8') as file:
                 content = file.read()
-                
-            # Extract title from the first line if not provided and it's markdown
-            if not title and content_type in ['article', 'guide']:
-                first_line = content.strip().split('\n')[0]
-                if first_line.startswith('# '):
-                    title = first_line[2:].strip()
-                else:
-                    title = os.path.basename(file_path).split('.')[0]
-            elif not title and content_type == 'quiz':
-                # Try to extract title from JSON if it exists
-                try:
-                    data = json.loads(content)
-                    if 'title' in data:
-                        title = data['title']
-                    else:
-                        title = os.path.basename(file_path).split('.')[0]
-                except:
-                    title = os.path.basename(file_path).split('.')[0]
-            
-            return self.import_content(title, content_type, content, topic_ids)
+
+            title = title or extract_title(file_path, content_type, content)
+            source_path = source_path_for(root or import_root_for(file_path), file_path)
+            return self.import_content(title, content_type, content, topic_ids, source_path)
             
         except Exception as e:
             print(f"❌ Error importing file {file_path}: {str(e)}")
             return None
-            
+
+    def import_directory(self, directory, pattern='**/*', content_type=None, topic_ids=None,
+                         batch_size=500, workers=None, manifest_path=None, prune=False, rescan=False):
+        """Import every matching file under a directory.
+
+        Files are read and parsed in a process pool while the results are
+        written in UNWIND batches of `batch_size`, so parsing and writing
+        overlap. Without `topic_ids`, topics come from the layout
+        <subject>/<topic>.md or <subject>/<topic>/<file>.md.
+
+        A manifest (by default .import_manifest.json in the directory)
+        records each file's size, mtime and content hash and is saved after
+        every batch. Files that haven't changed since are skipped without
+        being read, so an interrupted import resumes where it stopped and a
+        re-run only costs the delta. With `prune`, content whose file has
+        been deleted is removed from the database. `rescan` reads every file
+        again (for example after the database was restored); unchanged ones
+        are still not rewritten.
+        """
+        started = time.perf_counter()
+        manifest_path = manifest_path or os.path.join(directory, MANIFEST_NAME)
+        manifest = load_manifest(manifest_path)
+
+        jobs = []
+        stats = {}
+        unchanged = 0
+        for path in sorted(glob.glob(os.path.join(directory, pattern), recursive=True)):
+            file_type = content_type or infer_content_type(path)
+            if not os.path.isfile(path) or not file_type:
+                continue
+            source_path = source_path_for(directory, path)
+            stat = os.stat(path)
+            stats[source_path] = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+            entry = manifest.get(source_path)
+            if not rescan and entry and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+                unchanged += 1
+                continue
+            jobs.append((path, file_type, topic_ids or topics_from_path(directory, path), source_path))
+
+        written = failed = 0
+        batch = []
+
+        def flush():
+            nonlocal written, unchanged, failed
+            changed = self._write_import_batch(batch)
+            if changed is None:
+                failed += len(batch)
+                return
+            written += len(changed)
+            unchanged += len(batch) - len(changed)
+            # Checkpoint: everything in this batch is now in the database
+            for row in batch:
+                manifest[row['source_path']] = {
+                    'id': row['id'], 'hash': row['content_hash'], **stats[row['source_path']]
+                }
+            save_manifest(manifest_path, manifest)
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for row in pool.map(parse_file, jobs, chunksize=max(1, min(64, len(jobs) // 32))):
+                if 'error' in row:
+                    print(f"❌ Error importing file {row['path']}: {row['error']}")
+                    failed += 1
+                    continue
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    flush()
+                    batch = []
+            if batch:
+                flush()
+
+        missing = [source_path for source_path in manifest if source_path not in stats
+                   and not os.path.exists(os.path.join(directory, source_path))]
+        removed = 0
+        if missing and prune:
+            self.delete_content([manifest[source_path]['id'] for source_path in missing])
+            for source_path in missing:
+                del manifest[source_path]
+            save_manifest(manifest_path, manifest)
+            removed = len(missing)
+        elif missing:
+            print(f"  {len(missing)} previously imported files no longer exist (use --prune to remove them)")
+
+        elapsed = time.perf_counter() - started
+        processed = written + unchanged
+        rate = processed / elapsed if elapsed > 0 else 0.0
+        print(f"✓ Imported {written} new or changed files, {unchanged} unchanged, {failed} failed, "
+              f"{removed} removed in {elapsed:.1f}s, {rate:.1f} files/s")
+        return {
+            'written': written, 'unchanged': unchanged, 'failed': failed, 'removed': removed,
+            'seconds': elapsed, 'files_per_second': rate
+        }
+
+    def import_vault(self, vault, batch_size=500, workers=None, state_path=None):
+        """Mirror an Obsidian vault into the graph.
+
+        Each note becomes a Content node that EXPLAINS the topics named by
+        its front-matter tags (nested tags `subject/topic` map to
+        `subject:topic`); an untagged note gets a topic of its own. A
+        [[wiki link]] from note A to note B makes B's topics prerequisites
+        of A's.
+
+        The state file (by default .import_state.json in the vault) keeps
+        each note's mtime, size, topics and links, so a re-sync only reads
+        notes that changed, then writes the difference between the old and
+        new link edges. Notes deleted from the vault are deleted here too.
+        """
+        started = time.perf_counter()
+        state_path = state_path or os.path.join(vault, VAULT_STATE_NAME)
+        state = load_vault_state(state_path)
+        notes = state['notes']
+        vault_subject = _topic_part(os.path.basename(os.path.abspath(vault)))
+
+        jobs = []
+        stats = {}
+        for path in sorted(glob.glob(os.path.join(vault, '**', '*.md'), recursive=True)):
+            source_path = source_path_for(vault, path)
+            # Skip .obsidian/, .trash/ and other hidden folders
+            if any(part.startswith('.') for part in source_path.split('/')):
+                continue
+            stat = os.stat(path)
+            stats[source_path] = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+            note = notes.get(source_path)
+            if note and note['mtime_ns'] == stat.st_mtime_ns and note['size'] == stat.st_size:
+                continue
+            jobs.append((path, source_path, vault_subject))
+
+        written = unchanged = failed = 0
+        batch = []
+
+        def flush():
+            nonlocal written, unchanged, failed
+            changed = self._write_import_batch([note['row'] for note in batch])
+            if changed is None:
+                failed += len(batch)
+                return
+            written += len(changed)
+            unchanged += len(batch) - len(changed)
+            for note in batch:
+                row = note['row']
+                notes[row['source_path']] = {
+                    'id': row['id'],
+                    'hash': row['content_hash'],
+                    'name': note['name'],
+                    'aliases': note['aliases'],
+                    'topics': [topic['id'] for topic in row['topics']],
+                    'links': note['links'],
+                    **stats[row['source_path']]
+                }
+            save_vault_state(state_path, state)
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for note in pool.map(parse_note, jobs, chunksize=max(1, min(64, len(jobs) // 32))):
+                if 'error' in note:
+                    print(f"❌ Error importing note {note['path']}: {note['error']}")
+                    failed += 1
+                    continue
+                batch.append(note)
+                if len(batch) >= batch_size:
+                    flush()
+                    batch = []
+            if batch:
+                flush()
+
+        deleted = [source_path for source_path in notes if source_path not in stats]
+        if deleted:
+            self.delete_content([notes[source_path]['id'] for source_path in deleted])
+            for source_path in deleted:
+                del notes[source_path]
+            save_vault_state(state_path, state)
+
+        # The state's edge list is what the database holds; it is only
+        # replaced once the new edges are written, so a crash part-way
+        # through is repaired by the next run
+        edges = vault_edges(notes)
+        previous = {(edge[0], edge[1]) for edge in state['edges']}
+        added = sorted(edges - previous)
+        removed = sorted(previous - edges)
+        for start in range(0, max(len(added), len(removed)), batch_size):
+            self.sync_vault_edges(added[start:start + batch_size], removed[start:start + batch_size])
+        state['edges'] = sorted(edges)
+        save_vault_state(state_path, state)
+
+        elapsed = time.perf_counter() - started
+        print(f"✓ Synced vault: {len(jobs)} notes read, {written} new or changed, {unchanged} unchanged, "
+              f"{failed} failed, {len(deleted)} deleted, +{len(added)}/-{len(removed)} links in {elapsed:.1f}s")
+        return {
+            'read': len(jobs), 'written': written, 'unchanged': unchanged, 'failed': failed,
+            'deleted': len(deleted), 'links_added': len(added), 'links_removed': len(removed),
+            'seconds': elapsed
+        }
+
+    def sync_vault_edges(self, added, removed):
+        with self.driver.session(database=self.database) as session:
+            session.execute_write(lambda tx: tx.run(
+                SYNC_VAULT_EDGES,
+                added=[{'from': source, 'to': target} for source, target in added],
+                removed=[{'from': source, 'to': target} for source, target in removed]
+            ).consume())
+
+    def delete_content(self, content_ids):
+        with self.driver.session(database=self.database) as session:
+            session.execute_write(lambda tx: tx.run(DELETE_CONTENT, ids=content_ids).consume())
+
+    def _write_import_batch(self, rows):
+        try:
+            changed = self.write_batch(rows)
+        except Exception as e:
+            print(f"❌ Error writing batch of {len(rows)} files: {str(e)}")
+            return None
+        print(f"  ✓ Wrote batch of {len(rows)} files ({len(changed)} new or changed)")
+        return changed
+
+    def embed_pending(self, embedder, batch_size=64):
+        """Embed content and topics that have no embedding from this model yet"""
+        with self.driver.session(database=self.database) as session:
+            for kind, text in (('content', content_text), ('topic', topic_text)):
+                queries = EMBEDDING_QUERIES[kind]
+                pending = session.execute_read(
+                    lambda tx: [dict(record) for record in tx.run(queries['pending'], model=embedder.name)]
+                )
+                # One model call and one UNWIND write per batch
+                for start in range(0, len(pending), batch_size):
+                    batch = pending[start:start + batch_size]
+                    vectors = embedder.embed([text(item) for item in batch])
+                    rows = [
+                        {'id': item['id'], 'embedding': vector.tolist()}
+                        for item, vector in zip(batch, vectors)
+                    ]
+                    session.execute_write(
+                        lambda tx: tx.run(queries['store'], model=embedder.name, rows=rows).consume()
+                    )
+                print(f"✓ Embedded {len(pending)} {kind} items with {embedder.name}")
+
     def validate_content_type(self, content_type):
         """Validate that content type is supported"""
         valid_types = ['article', 'guide', 'quiz']
         if content_type not in valid_types:
             raise ValueError(f"Content type must be one of: {', '.join(valid_types)}")
 
+def content_row(title, content_type, content_text, topic_ids, source_path=None):
+    """Parameters for one file in an IMPORT_CONTENT batch.
+
+    The id is a hash of the source path, so it stays the same when the file
+    changes; content_hash covers everything written for the file and is
+    what change detection compares.
+    """
+    source_path = source_path or f"{content_type}/{title}"
+    topics = parse_topics(topic_ids)
+    content_hash = hashlib.sha256(json.dumps(
+        [title, content_type, content_text, sorted(topic['id'] for topic in topics)]
+    ).encode('utf-8')).hexdigest()
+    return {
+        'id': f"content:{hashlib.sha256(source_path.encode('utf-8')).hexdigest()[:32]}",
+        'title': title,
+        'type': content_type,
+        'content': content_text,
+        'source_path': source_path,
+        'content_hash': content_hash,
+        'created_at': datetime.now().isoformat(),
+        'topics': topics
+    }
+
+def source_path_for(directory, path):
+    """Path relative to the import root with / separators, the content's stable key"""
+    return os.path.relpath(path, directory).replace(os.sep, '/')
+
+def import_root_for(path):
+    """The nearest directory above a file holding a --dir manifest or --vault
+    state file, i.e. the root it was imported under; else its own directory"""
+    directory = os.path.dirname(os.path.abspath(path))
+    candidate = directory
+    while True:
+        if any(os.path.isfile(os.path.join(candidate, name)) for name in (MANIFEST_NAME, VAULT_STATE_NAME)):
+            return candidate
+        parent = os.path.dirname(candidate)
+        if parent == candidate:
+            return directory
+        candidate = parent
+
+def load_manifest(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            manifest = json.load(file)
+    except FileNotFoundError:
+        return {}
+    except ValueError as e:
+        print(f"❌ Ignoring unreadable manifest {path}: {str(e)}")
+        return {}
+    return manifest.get('files', {}) if manifest.get('format') == MANIFEST_FORMAT else {}
+
+def save_manifest(path, files):
+    temporary = f"{path}.tmp"
+    with open(temporary, 'w', encoding='utf-8') as file:
+        json.dump({'format': MANIFEST_FORMAT, 'files': files}, file)
+    os.replace(temporary, path)
+
+def parse_topics(topic_ids):
+    topics = []
+    for topic_id in topic_ids:
+        parts = topic_id.split(':')
+        if len(parts) != 2:
+            print(f"  ❌ Invalid topic ID format: {topic_id}. Expected format: subject:name")
+            continue
+        subject, name = parts
+        topics.append({'id': topic_id, 'subject': subject, 'name': name.replace('_', ' ').title()})
+    return topics
+
+def extract_title(file_path, content_type, content):
+    """Title from the first markdown heading or the quiz JSON, else the file name"""
+    fallback = os.path.basename(file_path).split('.')[0]
+    if content_type in ['article', 'guide']:
+        first_line = content.strip().split('\n')[0]
+        return first_line[2:].strip() if first_line.startswith('# ') else fallback
+    if content_type == 'quiz':
+        try:
+            return json.loads(content).get('title', fallback)
+        except (ValueError, AttributeError):
+            return fallback
+    return fallback
+
+def infer_content_type(path):
+    return CONTENT_TYPES_BY_EXTENSION.get(os.path.splitext(path)[1].lower())
+
+def topics_from_path(directory, path):
+    """<subject>/<topic>.md or <subject>/<topic>/<file>.md -> ['subject:topic']"""
+    parts = os.path.relpath(path, directory).split(os.sep)
+    if len(parts) < 2:
+        return []
+    topic = parts[1] if len(parts) > 2 else os.path.splitext(parts[1])[0]
+    return [f"{parts[0]}:{topic}"]
+
+def parse_file(job):
+    """Read and parse one file into a content row; runs in the importer's process pool"""
+    path, content_type, topic_ids, source_path = job
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            content = file.read()
+        title = extract_title(path, content_type, content)
+        return content_row(title, content_type, content, topic_ids, source_path)
+    except Exception as e:
+        return {'path': path, 'error': str(e)}
+
+def load_vault_state(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            state = json.load(file)
+    except FileNotFoundError:
+        state = {}
+    except ValueError as e:
+        print(f"❌ Ignoring unreadable state file {path}: {str(e)}")
+        state = {}
+    if state.get('format') != VAULT_STATE_FORMAT:
+        state = {'format': VAULT_STATE_FORMAT, 'notes': {}, 'edges': []}
+    return state
+
+def save_vault_state(path, state):
+    temporary = f"{path}.tmp"
+    with open(temporary, 'w', encoding='utf-8') as file:
+        json.dump(state, file)
+    os.replace(temporary, path)
+
+def parse_front_matter(text):
+    """Split YAML front matter from a note.
+
+    Handles the subset Obsidian writes: `key: value`, inline lists
+    `key: [a, b]`, comma separated values and block lists of `- item`.
+    Returns (metadata, body).
+    """
+    match = FRONT_MATTER.match(text)
+    if not match:
+        return {}, text
+    metadata = {}
+    key = None
+    for line in match.group(1).splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith('#'):
+            continue
+        if stripped.startswith('- ') and key is not None:
+            metadata.setdefault(key, [])
+            if isinstance(metadata[key], list):
+                metadata[key].append(_unquote(stripped[2:]))
+            continue
+        key, _, value = stripped.partition(':')
+        key = key.strip()
+        value = value.strip()
+        if value.startswith('[') and value.endswith(']'):
+            metadata[key] = [_unquote(item) for item in value[1:-1].split(',') if item.strip()]
+        elif value:
+            metadata[key] = _unquote(value)
+    return metadata, text[match.end():]
+
+def note_tags(metadata):
+    tags = metadata.get('tags', metadata.get('tag', []))
+    if isinstance(tags, str):
+        tags = re.split(r'[,\s]+', tags)
+    return [tag.lstrip('#') for tag in tags if tag.lstrip('#')]
+
+def tag_topic(tag, default_subject):
+    """`subject/topic` -> subject:topic; a flat tag goes under `default_subject`"""
+    subject, _, topic = tag.partition('/')
+    if not topic:
+        subject, topic = default_subject, subject
+    return f"{_topic_part(subject)}:{_topic_part(topic)}"
+
+def parse_note(job):
+    """Read one vault note into a content row plus its links; runs in the process pool"""
+    path, source_path, vault_subject = job
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            text = file.read()
+        metadata, body = parse_front_matter(text)
+        name = os.path.splitext(os.path.basename(path))[0]
+        folders = source_path.split('/')[:-1]
+        subject = _topic_part(folders[0]) if folders else vault_subject
+
+        topic_ids = [tag_topic(tag, subject) for tag in note_tags(metadata)] or [f"{subject}:{_topic_part(name)}"]
+        title = metadata.get('title') if isinstance(metadata.get('title'), str) else None
+        if not title:
+            first_line = body.strip().split('\n')[0]
+            title = first_line[2:].strip() if first_line.startswith('# ') else name
+        aliases = metadata.get('aliases', [])
+        if isinstance(aliases, str):
+            aliases = [aliases]
+
+        return {
+            'row': content_row(title, 'article', body, sorted(set(topic_ids)), source_path),
+            'name': name,
+            'aliases': aliases,
+            'links': sorted({link.strip() for link in WIKI_LINK.findall(body) if link.strip()})
+        }
+    except Exception as e:
+        return {'path': path, 'error': str(e)}
+
+def vault_edges(notes):
+    """PREREQUISITE_OF edges implied by the notes' links, as (from, to) topic pairs.
+
+    Links resolve the way Obsidian resolves them: by vault path, note name
+    or alias, ignoring case. Unresolved links are skipped.
+    """
+    targets = {}
+    for source_path, note in notes.items():
+        for key in [note['name'], *note['aliases']]:
+            targets.setdefault(key.lower(), source_path)
+        targets[source_path[:-3].lower()] = source_path
+
+    edges = set()
+    for note in notes.values():
+        for link in note['links']:
+            target = targets.get(link.lower().removesuffix('.md'))
+            if target is None:
+                continue
+            for prerequisite in notes[target]['topics']:
+                for topic in note['topics']:
+                    if prerequisite != topic:
+                        edges.add((prerequisite, topic))
+    return edges
+
+def _topic_part(text):
+    # Topic ids are subject:name, so neither part may contain a colon
+    return text.strip().replace(':', '-').replace(' ', '_')
+
+def _unquote(value):
+    return value.strip().strip('"\'')
+
+def notify_api(api_url):
+    """Tell a running API server to drop its caches and reload what was imported."""
+    url = api_url.rstrip('/') + '/cache/invalidate'
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, method='POST'), timeout=60):
+            pass
+        print(f"✓ Refreshed API server caches at {api_url}")
+    except (urllib.error.URLError, OSError) as e:
+        # No server running is fine; it reads the database fresh on start
+        print(f"  API server at {api_url} not refreshed ({e}); restart it or POST {url}")
+
 def main():
+    load_dotenv()
     parser = argparse.ArgumentParser(description='Import content into Neo4j database')
     parser.add_argument('--file', help='Path to content file')
+    parser.add_argument('--dir', help='Import every matching file under this directory')
+    parser.add_argument('--vault', help='Sync an Obsidian vault (notes, tags and [[wiki links]])')
+    parser.add_argument('--state', help=f'State file for --vault mode (default: <vault>/{VAULT_STATE_NAME})')
+    parser.add_argument('--glob', default='**/*',
+                        help='File pattern relative to --dir (default: all .md/.json files)')
+    parser.add_argument('--batch-size', type=int, default=500, help='Files written per transaction in --dir and --vault mode')
+    parser.add_argument('--workers', type=int, help='Parser processes in --dir and --vault mode (default: CPU count)')
+    parser.add_argument('--manifest', help=f'Checkpoint file for --dir mode (default: <dir>/{MANIFEST_NAME})')
+    parser.add_argument('--prune', action='store_true',
+                        help='In --dir mode, delete content whose file no longer exists')
+    parser.add_argument('--rescan', action='store_true',
+                        help='In --dir mode, re-read files the manifest says are unchanged')
     parser.add_argument('--type', choices=['article', 'guide', 'quiz'], help='Content type')
     parser.add_argument('--title', help='Content title (optional, will extract from file if not provided)')
+    parser.add_argument('--root', help='Directory --file is keyed relative to, as in --dir mode '
+                                       '(default: the nearest one with a manifest or vault state file)')
     parser.add_argument('--topics', help='Comma-separated list of topic IDs to link to')
+    parser.add_argument('--uri', help='Neo4j URI (defaults to NEO4J_URI)')
+    parser.add_argument('--user', help='Neo4j user (defaults to NEO4J_USER)')
+    parser.add_argument('--password', help='Neo4j password (defaults to NEO4J_PASSWORD)')
+    parser.add_argument('--no-embed', action='store_true',
+                        help='Skip embedding; the API server embeds pending items on its next start')
+    parser.add_argument('--api', default=os.getenv('API_URL', 'http://localhost:8000'),
+                        help='API server to refresh once the import is done (defaults to API_URL, '
+                             'then http://localhost:8000)')
+    parser.add_argument('--no-notify', action='store_true', help='Do not refresh the API server')
     
     args = parser.parse_args()
     
-    if not args.file or not args.type or not args.topics:
+    if not args.dir and not args.vault and (not args.file or not args.type or not args.topics):
         parser.print_help()
         return
         
-    importer = ContentImporter(URI, USER, PASSWORD)
+    importer = ContentImporter(args.uri, args.user, args.password)
     try:
-        topic_ids = [t.strip() for t in args.topics.split(',')]
-        importer.import_from_file(args.file, args.type, topic_ids, args.title)
+        topic_ids = [t.strip() for t in args.topics.split(',')] if args.topics else None
+        if args.vault:
+            importer.import_vault(
+                args.vault, batch_size=args.batch_size, workers=args.workers, state_path=args.state
+            )
+        elif args.dir:
+            importer.import_directory(
+                args.dir, args.glob, args.type, topic_ids,
+                batch_size=args.batch_size, workers=args.workers,
+                manifest_path=args.manifest, prune=args.prune, rescan=args.rescan
+            )
+        else:
+            importer.import_from_file(args.file, args.type, topic_ids, args.title, args.root)
+        if not args.no_embed:
+            importer.embed_pending(create_embedder())
     finally:
         importer.close()
+        # Even a failed import may have written some batches
+        if not args.no_notify:
+            notify_api(args.api)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,506 +1,1308 @@
 import os
-from neo4j import GraphDatabase
+import asyncio
+import functools
+import inspect
+from neo4j import GraphDatabase, AsyncGraphDatabase, READ_ACCESS
 from datetime import datetime
 import json
+from graph_cache import GraphCache
+from analytics import AnalyticsRollup
 
 
-class Neo4jConnection:
+# Idempotent schema statements applied by ensure_schema(), keyed by the
+# constraint/index name so get_schema_status() can report them
+SCHEMA_CONSTRAINTS = {
+    "topic_id_unique": "CREATE CONSTRAINT topic_id_unique IF NOT EXISTS FOR (t:Topic) REQUIRE t.id IS UNIQUE",
+    "content_id_unique": "CREATE CONSTRAINT content_id_unique IF NOT EXISTS FOR (c:Content) REQUIRE c.id IS UNIQUE",
+    "study_session_id_unique": "CREATE CONSTRAINT study_session_id_unique IF NOT EXISTS FOR (s:StudySession) REQUIRE s.id IS UNIQUE",
+    "task_id_unique": "CREATE CONSTRAINT task_id_unique IF NOT EXISTS FOR (t:Task) REQUIRE t.id IS UNIQUE",
+    "event_id_unique": "CREATE CONSTRAINT event_id_unique IF NOT EXISTS FOR (e:Event) REQUIRE e.id IS UNIQUE",
+    "subject_name_unique": "CREATE CONSTRAINT subject_name_unique IF NOT EXISTS FOR (s:Subject) REQUIRE s.name IS UNIQUE",
+    "change_id_unique": "CREATE CONSTRAINT change_id_unique IF NOT EXISTS FOR (c:Change) REQUIRE c.id IS UNIQUE",
+    "sync_counter_name_unique": "CREATE CONSTRAINT sync_counter_name_unique IF NOT EXISTS FOR (v:SyncCounter) REQUIRE v.name IS UNIQUE",
+}
+
+SCHEMA_INDEXES = {
+    "topic_due_review": "CREATE INDEX topic_due_review IF NOT EXISTS FOR (t:Topic) ON (t.status, t.next_review)",
+    "content_type": "CREATE INDEX content_type IF NOT EXISTS FOR (c:Content) ON (c.type)",
+    "content_created_at": "CREATE INDEX content_created_at IF NOT EXISTS FOR (c:Content) ON (c.created_at)",
+    "event_start_time": "CREATE INDEX event_start_time IF NOT EXISTS FOR (e:Event) ON (e.start_time)",
+    "change_version": "CREATE INDEX change_version IF NOT EXISTS FOR (c:Change) ON (c.version)",
+    "change_unsynced": "CREATE INDEX change_unsynced IF NOT EXISTS FOR (c:Change) ON (c.confirmed, c.version)",
+    "content_search": "CREATE FULLTEXT INDEX content_search IF NOT EXISTS FOR (c:Content) ON EACH [c.title, c.content]",
+}
+
+# One-off data migrations run by ensure_schema(), keyed by name. Each scans
+# every node it could touch, so once it succeeds it is recorded on a
+# Migration node and later startups skip it.
+MIGRATIONS = {
+    # next_review used to be stored as an ISO string; range comparisons and
+    # the due-review index need a native temporal value. toString() of a
+    # string is the string itself, so this only touches the old format.
+    "next_review_temporal": """
+        MATCH (t:Topic)
+        WHERE toString(t.next_review) = t.next_review
+        SET t.next_review = localdatetime(t.next_review)
+        """,
+}
+
+GET_MIGRATION = "MATCH (m:Migration {name: $name}) RETURN m.name AS name"
+
+RECORD_MIGRATION = "MERGE (m:Migration {name: $name}) ON CREATE SET m.applied_at = localdatetime()"
+
+# Driver settings that can be tuned per deployment, mapped from environment
+# variables to neo4j driver keyword arguments
+DRIVER_SETTINGS = {
+    "NEO4J_MAX_CONNECTION_POOL_SIZE": ("max_connection_pool_size", int),
+    "NEO4J_CONNECTION_ACQUISITION_TIMEOUT": ("connection_acquisition_timeout", float),
+    "NEO4J_MAX_CONNECTION_LIFETIME": ("max_connection_lifetime", float),
+    "NEO4J_MAX_TRANSACTION_RETRY_TIME": ("max_transaction_retry_time", float),
+}
+
+# Cypher shared by Neo4jConnection and AsyncNeo4jConnection
+
+SHOW_CONSTRAINTS = "SHOW CONSTRAINTS YIELD name"
+
+SHOW_INDEXES = "SHOW INDEXES YIELD name, state"
+
+CLEAR_DATABASE = "MATCH (n) DETACH DELETE n"
+
+# Relationship types can't be parameters, so these are %-formatted
+CREATE_RELATIONSHIP = """
+    MATCH (t1:Topic {id: $from_id})
+    MATCH (t2:Topic {id: $to_id})
+    MERGE (t1)-[r:%s]->(t2)
+    RETURN t1.id AS id
+    """
+
+DELETE_RELATIONSHIP = """
+    MATCH (:Topic {id: $from_id})-[r:%s]->(:Topic {id: $to_id})
+    DELETE r
+    RETURN count(r) AS deleted
+    """
+
+DELETE_TOPIC = """
+    MATCH (t:Topic {id: $id})
+    OPTIONAL MATCH (t)<-[:REVIEW_OF]-(r:Review)
+    DETACH DELETE t, r
+    """
+
+RECORD_REVIEW = """
+    MATCH (t:Topic {id: $topic_id})
+    WITH t, t.stage AS previous_stage
+    SET t.stage = $stage, t.next_review = $next_review
+    CREATE (r:Review {
+        date: $date,
+        difficulty: $difficulty,
+        interval: $interval
+    })-[:REVIEW_OF]->(t)
+    RETURN t.id AS id, previous_stage, t.status AS status
+    """
+
+CREATE_TOPIC = """
+    MERGE (s:Subject {name: $subject})
+    CREATE (t:Topic {
+        id: $id,
+        name: $name,
+        status: $status,
+        stage: $stage,
+        created_at: $created_at,
+        next_review: $next_review
+    })-[:BELONGS_TO]->(s)
+    WITH t
+    CALL {
+        WITH t
+        UNWIND $reviews AS review
+        CREATE (r:Review {
+            date: review.date,
+            difficulty: review.difficulty,
+            interval: review.interval
+        })-[:REVIEW_OF]->(t)
+    }
+    CALL {
+        WITH t
+        UNWIND $prerequisites AS prerequisite_id
+        MATCH (p:Topic {id: prerequisite_id})
+        MERGE (p)-[:PREREQUISITE_OF]->(t)
+        RETURN collect(p.id) AS linked
+    }
+    RETURN linked
+    """
+
+GET_TOPIC = """
+    MATCH (t:Topic {id: $id})
+    OPTIONAL MATCH (t)-[:BELONGS_TO]->(s:Subject)
+    RETURN t, coalesce(s.name, t.subject) AS subject,
+        CASE WHEN $include_history
+            THEN [(t)<-[:REVIEW_OF]-(rev:Review) | rev]
+            ELSE []
+        END AS reviews
+    """
+
+# $after_review bounds the range from below on its own, so the page is an
+# index range seek on (status, next_review); the cursor's id only breaks
+# ties at that exact time
+GET_DUE_REVIEWS = """
+    MATCH (t:Topic)
+    WHERE t.status = 'active' AND t.next_review >= $after_review AND t.next_review <= $now
+      AND ($after_id IS NULL OR t.next_review > $after_review OR t.id > $after_id)
+    OPTIONAL MATCH (t)-[:BELONGS_TO]->(s:Subject)
+    RETURN t, coalesce(s.name, t.subject) AS subject
+    ORDER BY t.next_review, t.id
+    """
+
+GET_FULL_GRAPH = """
+    MATCH (s:Subject)<-[:BELONGS_TO]-(t:Topic)
+    OPTIONAL MATCH (t)-[r]->(t2:Topic)
+    OPTIONAL MATCH (t)<-[:REVIEW_OF]-(rev:Review)
+    RETURN s, t, collect(DISTINCT {type: type(r), target: t2.id}) as relationships,
+        collect(DISTINCT rev) as reviews
+    """
+
+# Topics in id order with their outgoing topic relationships, for
+# paging/streaming the graph. The WHERE is a plain predicate on t.id (an
+# ordered scan of the Topic.id constraint index for the first page, a range
+# seek after the cursor for later ones), so the index supplies the order and
+# a page costs O(page) instead of a sort of every topic; see
+# _topic_page_query.
+GET_TOPIC_PAGE = """
+    MATCH (t:Topic)-[:BELONGS_TO]->(s:Subject)
+    USING INDEX t:Topic(id)
+    WHERE %s
+    WITH t, s
+    ORDER BY t.id
+    """
+
+GET_TOPIC_PAGE_RETURN = """
+    RETURN t, s.name AS subject,
+        [(t)-[r]->(t2:Topic) | {type: type(r), target: t2.id}] AS relationships,
+        CASE WHEN $include_history
+            THEN [(t)<-[:REVIEW_OF]-(rev:Review) | rev]
+            ELSE []
+        END AS reviews
+    """
+
+GET_REVIEW_LOGS = """
+    MATCH (r:Review)-[:REVIEW_OF]->(t:Topic)
+    RETURN t.id AS topic_id, r.date AS date, r.difficulty AS difficulty
+    ORDER BY topic_id, date
+    """
+
+GET_PREREQUISITE_EDGES = """
+    MATCH (p:Topic)-[:PREREQUISITE_OF]->(t:Topic)
+    RETURN p.id AS prerequisite_id, t.id AS topic_id
+    """
+
+# Aggregations that warm the analytics rollup (see analytics.py). Review
+# dates are ISO strings, so the first ten characters are the day.
+ANALYTICS_QUERIES = {
+    "stages": """
+        MATCH (t:Topic {status: 'active'})
+        RETURN t.stage AS stage, count(*) AS topics
+        """,
+    "days": """
+        MATCH (r:Review)-[:REVIEW_OF]->(:Topic)
+        RETURN substring(toString(r.date), 0, 10) AS day, r.difficulty AS difficulty,
+            count(*) AS reviews, sum(r.interval) AS interval_total
+        """,
+    "studied": """
+        MATCH (:StudySession)-[i:INCLUDES]->(t:Topic)
+        RETURN t.id AS topic_id, sum(i.duration) AS minutes, count(i) AS sessions
+        """,
+}
+
+# Writes that keep landing during the aggregations make get_analytics give
+# up on warming the rollup after this many tries
+ANALYTICS_LOAD_ATTEMPTS = 3
+
+CREATE_TASK = """
+    CREATE (t:Task {
+        id: $id,
+        title: $title,
+        is_completed: $is_completed,
+        created_at: $created_at,
+        due_date: $due_date,
+        energy_level: $energy_level,
+        duration: $duration
+    })
+    RETURN t
+    """
+
+CREATE_CALENDAR_EVENT = """
+    CREATE (e:Event {
+        id: $id,
+        title: $title,
+        start_time: $start_time,
+        end_time: $end_time,
+        type: $type,
+        description: $description
+    })
+    RETURN e
+    """
+
+GET_TASKS = """
+    MATCH (t:Task)
+    RETURN t
+    ORDER BY t.created_at DESC
+    """
+
+GET_CALENDAR_EVENTS = """
+    MATCH (e:Event)
+    WHERE $start <= e.start_time <= $end
+    RETURN e
+    ORDER BY e.start_time
+    """
+
+CREATE_CONTENT = """
+    CREATE (c:Content {
+        id: $id,
+        title: $title,
+        type: $type,
+        content: $content,
+        created_at: $created_at
+    })
+    RETURN c
+    """
+
+CREATE_CONTENT_RELATIONSHIP = """
+    MATCH (c:Content {id: $content_id})
+    MATCH (t:Topic {id: $topic_id})
+    MERGE (c)-[r:%s]->(t)
+    """
+
+GET_CONTENT_BY_TOPIC = """
+    MATCH (c:Content)-[:EXPLAINS]->(t:Topic {id: $topic_id})
+    RETURN c
+    """
+
+GET_ALL_CONTENT = """
+    MATCH (c:Content)
+    OPTIONAL MATCH (c)-[:EXPLAINS]->(t:Topic)
+    RETURN c, collect(t.id) as related_topic_ids
+    ORDER BY c.created_at DESC
+    """
+
+# When each content item last changed, to check a search index snapshot
+# against without reading the bodies
+GET_CONTENT_STAMPS = """
+    MATCH (c:Content)
+    RETURN c.id AS id, coalesce(c.updated_at, c.created_at) AS stamp
+    """
+
+GET_CONTENT_BY_SUBJECT = """
+    MATCH (c:Content)-[:EXPLAINS]->(t:Topic)-[:BELONGS_TO]->(s:Subject {name: $subject})
+    RETURN c, collect(t.id) as related_topic_ids
+    ORDER BY c.created_at DESC
+    """
+
+GET_CONTENT_BY_TYPE = """
+    MATCH (c:Content {type: $type})
+    OPTIONAL MATCH (c)-[:EXPLAINS]->(t:Topic)
+    RETURN c, collect(t.id) as related_topic_ids
+    ORDER BY c.created_at DESC
+    """
+
+GET_CONTENT = """
+    MATCH (c:Content {id: $id})
+    OPTIONAL MATCH (c)-[:EXPLAINS]->(t:Topic)
+    RETURN c, collect(t.id) as related_topic_ids
+    """
+
+# Ranked lookup in the content_search full-text index. The page is cut
+# before the EXPLAINS expansion so only returned rows pay for it.
+SEARCH_CONTENT = """
+    CALL db.index.fulltext.queryNodes('content_search', $search) YIELD node AS c, score
+    WITH c, score
+    ORDER BY score DESC, c.id
+    SKIP $skip
+    LIMIT $limit
+    OPTIONAL MATCH (c)-[:EXPLAINS]->(t:Topic)
+    WITH c, score, collect(t.id) as related_topic_ids
+    RETURN c, related_topic_ids, score
+    ORDER BY score DESC, c.id
+    """
+
+GET_CONTENT_BY_IDS = """
+    UNWIND $ids AS id
+    MATCH (c:Content {id: id})
+    OPTIONAL MATCH (c)-[:EXPLAINS]->(t:Topic)
+    RETURN c, collect(t.id) as related_topic_ids
+    """
+
+# Embeddings (see embeddings.py) are stored on the nodes with the name of
+# the model that produced them, so a model change re-embeds everything
+EMBEDDING_QUERIES = {
+    "content": {
+        "load": """
+            MATCH (c:Content)
+            WHERE c.embedding_model = $model
+            RETURN c.id AS id, c.embedding AS embedding
+            """,
+        "pending": """
+            MATCH (c:Content)
+            WHERE c.embedding_model IS NULL OR c.embedding_model <> $model
+            RETURN c.id AS id, c.title AS title, c.content AS content
+            """,
+        "store": """
+            UNWIND $rows AS row
+            MATCH (c:Content {id: row.id})
+            SET c.embedding = row.embedding, c.embedding_model = $model
+            """,
+    },
+    "topic": {
+        "load": """
+            MATCH (t:Topic)
+            WHERE t.embedding_model = $model
+            RETURN t.id AS id, t.embedding AS embedding
+            """,
+        "pending": """
+            MATCH (t:Topic)
+            WHERE t.embedding_model IS NULL OR t.embedding_model <> $model
+            OPTIONAL MATCH (t)-[:BELONGS_TO]->(s:Subject)
+            RETURN t.id AS id, t.name AS name, coalesce(s.name, t.subject) AS subject
+            """,
+        "store": """
+            UNWIND $rows AS row
+            MATCH (t:Topic {id: row.id})
+            SET t.embedding = row.embedding, t.embedding_model = $model
+            """,
+    },
+}
+
+# Stored on nodes but never part of an API response
+EMBEDDING_PROPERTIES = ("embedding", "embedding_model")
+
+# Characters with a meaning in Lucene query syntax
+LUCENE_SPECIAL = set('+-&|!(){}[]^"~*?:\\/')
+
+# Sessions and their INCLUDES edges in one statement; topics that don't
+# exist are skipped without dropping the session
+CREATE_STUDY_SESSIONS = """
+    UNWIND $sessions AS session
+    CREATE (s:StudySession {
+        id: session.id,
+        start_time: session.start_time,
+        end_time: session.end_time,
+        created_at: session.created_at
+    })
+    WITH s, session
+    CALL {
+        WITH s, session
+        UNWIND session.topics AS included
+        MATCH (t:Topic {id: included.topic_id})
+        CREATE (s)-[:INCLUDES {duration: included.duration}]->(t)
+        RETURN collect(included) AS linked
+    }
+    RETURN collect(s.id) AS created, collect(linked) AS linked
+    """
+
+# Batch sync (see sync.py). Each statement takes the rows for one operation
+# and returns the keys of the rows it applied.
+SYNC_OPERATIONS = {
+    "task_upsert": """
+        UNWIND $rows AS row
+        MERGE (t:Task {id: row.id})
+        SET t += row.properties
+        RETURN collect(row.key) AS applied
+        """,
+    "task_delete": """
+        UNWIND $rows AS row
+        OPTIONAL MATCH (t:Task {id: row.id})
+        DETACH DELETE t
+        RETURN collect(row.key) AS applied
+        """,
+    "topic_upsert": """
+        UNWIND $rows AS row
+        MERGE (s:Subject {name: row.subject})
+        MERGE (t:Topic {id: row.id})
+        SET t += row.properties
+        WITH row, s, t
+        CALL {
+            WITH s, t
+            OPTIONAL MATCH (t)-[old:BELONGS_TO]->(other:Subject)
+            WHERE other <> s
+            DELETE old
+        }
+        MERGE (t)-[:BELONGS_TO]->(s)
+        RETURN collect(row.key) AS applied
+        """,
+    "topic_delete": """
+        UNWIND $rows AS row
+        CALL {
+            WITH row
+            OPTIONAL MATCH (t:Topic {id: row.id})
+            OPTIONAL MATCH (t)<-[:REVIEW_OF]-(r:Review)
+            DETACH DELETE t, r
+        }
+        RETURN collect(row.key) AS applied
+        """,
+    "content_upsert": """
+        UNWIND $rows AS row
+        MERGE (c:Content {id: row.id})
+        WITH row, c, c.title = row.properties.title AND c.content = row.properties.content AS unchanged
+        SET c += row.properties
+        // Like an import, a changed body moves updated_at, which the search
+        // snapshot is checked against, and needs a fresh embedding
+        FOREACH (_ IN CASE WHEN unchanged THEN [] ELSE [1] END |
+            SET c.updated_at = row.updated_at
+            REMOVE c.embedding, c.embedding_model)
+        WITH row, c
+        CALL {
+            WITH row, c
+            UNWIND row.related_topics AS topic_id
+            MATCH (t:Topic {id: topic_id})
+            MERGE (c)-[:EXPLAINS]->(t)
+        }
+        RETURN collect(row.key) AS applied
+        """,
+    "content_delete": """
+        UNWIND $rows AS row
+        OPTIONAL MATCH (c:Content {id: row.id})
+        DETACH DELETE c
+        RETURN collect(row.key) AS applied
+        """,
+    "review_create": """
+        UNWIND $rows AS row
+        MATCH (t:Topic {id: row.topic_id})
+        CREATE (r:Review {
+            date: row.date,
+            difficulty: row.difficulty,
+            interval: row.interval
+        })-[:REVIEW_OF]->(t)
+        SET t.stage = coalesce(row.stage, t.stage),
+            t.next_review = coalesce(row.next_review, t.next_review)
+        RETURN collect(row.key) AS applied
+        """,
+}
+
+FIND_CHANGES = """
+    MATCH (c:Change)
+    WHERE c.id IN $ids
+    RETURN collect(c.id) AS found
+    """
+
+# Change versions come from a single counter node. Writing the lock property
+# first takes the node's write lock before the version is read, so concurrent
+# batches get disjoint, gap-free ranges that commit in version order.
+LOG_CHANGES = """
+    MERGE (v:SyncCounter {name: 'changes'})
+    ON CREATE SET v.version = 0
+    SET v._lock = true
+    WITH v, v.version AS base
+    SET v.version = base + size($changes)
+    REMOVE v._lock
+    WITH base
+    UNWIND range(0, size($changes) - 1) AS i
+    WITH base + i + 1 AS version, $changes[i] AS change
+    CREATE (c:Change {
+        id: change.id,
+        version: version,
+        type: change.type,
+        action: change.action,
+        entity_id: change.entity_id,
+        data: change.data,
+        created_at: change.created_at,
+        confirmed: false
+    })
+    RETURN max(version) AS version
+    """
+
+GET_SYNC_VERSION = """
+    OPTIONAL MATCH (v:SyncCounter {name: 'changes'})
+    RETURN coalesce(v.version, 0) AS version
+    """
+
+GET_CHANGES = """
+    MATCH (c:Change)
+    WHERE c.version > $since
+    RETURN c
+    ORDER BY c.version
+    LIMIT $limit
+    """
+
+GET_UNSYNCED = """
+    MATCH (c:Change)
+    WHERE c.confirmed = false AND c.version > 0
+    RETURN c
+    ORDER BY c.version
+    LIMIT $limit
+    """
+
+CONFIRM_CHANGES = """
+    MATCH (c:Change)
+    WHERE c.id IN $ids AND c.confirmed = false
+    SET c.confirmed = true
+    RETURN count(c) AS confirmed
+    """
+
+
+def driver_config():
+    """Driver keyword arguments from the NEO4J_* environment variables that are set."""
+    config = {}
+    for env_var, (option, cast) in DRIVER_SETTINGS.items():
+        value = os.getenv(env_var)
+        if value:
+            config[option] = cast(value)
+    return config
+
+
+def connection_settings(uri=None, user=None, password=None):
+    """Resolve connection details from arguments, falling back to the environment."""
+    uri = uri or os.getenv("NEO4J_URI")
+    user = user or os.getenv("NEO4J_USER")
+    password = password or os.getenv("NEO4J_PASSWORD")
+    if not password:
+        raise RuntimeError("NEO4J_PASSWORD must be set in the environment")
+    return uri, (user, password)
+
+
+def create_driver(uri=None, user=None, password=None):
+    """Build a pooled Neo4j driver; shared by the API and the content importer."""
+    uri, auth = connection_settings(uri, user, password)
+    return GraphDatabase.driver(uri, auth=auth, **driver_config())
+
+
+def create_async_driver(uri=None, user=None, password=None):
+    """Build a pooled async Neo4j driver with the same settings as create_driver."""
+    uri, auth = connection_settings(uri, user, password)
+    return AsyncGraphDatabase.driver(uri, auth=auth, **driver_config())
+
+
+class AsyncNeo4jConnection:
+    """Connection used by the FastAPI endpoints, on the neo4j async driver.
+
+    This is the one implementation of every query; synchronous callers go
+    through the Neo4jConnection facade below.
+    """
+
     def __init__(
         self,
         uri: str | None = None,
         user: str | None = None,
         password: str | None = None,
     ):
-        uri = uri or os.getenv("NEO4J_URI")
-        user = user or os.getenv("NEO4J_USER")
-        password = password or os.getenv("NEO4J_PASSWORD")
-        if not password:
-            raise RuntimeError("NEO4J_PASSWORD must be set in the environment")
-        self.driver = GraphDatabase.driver(uri, auth=(user, password))
+        self.driver = create_async_driver(uri, user, password)
+        self.database = os.getenv("NEO4J_DATABASE")
+        self.graph_cache = GraphCache()
+        # Concurrent requests on a cold cache share one full-graph load
+        self._graph_load = asyncio.Lock()
+        self.analytics = AnalyticsRollup()
+        self._analytics_load = asyncio.Lock()
 
-    def close(self):
-        self.driver.close()
-
-    def clear_database(self):
-        with self.driver.session() as session:
-            session.run("MATCH (n) DETACH DELETE n")
-
-    def create_topic_node(self, topic_data):
-        with self.driver.session() as session:
-            # Create subject node if it doesn't exist
-            session.run("""
-                MERGE (s:Subject {name: $subject})
-                """, subject=topic_data['subject'])
-
-            # Create topic node
-            result = session.run("""
-                MATCH (s:Subject {name: $subject})
-                CREATE (t:Topic {
-                    id: $id,
-                    name: $name,
-                    status: $status,
-                    stage: $stage,
-                    created_at: $created_at,
-                    next_review: $next_review
-                })-[:BELONGS_TO]->(s)
-                RETURN t
-                """,
-                id=topic_data['id'],
-                name=topic_data['name'],
-                subject=topic_data['subject'],
-                status=topic_data['status'],
-                stage=topic_data['stage'],
-                created_at=topic_data['created_at'].isoformat(),
-                next_review=topic_data['next_review'].isoformat()
-            )
+    async def close(self):
+        await self.driver.close()
 
-            for review in topic_data.get('review_history', []):
-                session.run("""
-                    MATCH (t:Topic {id: $topic_id})
-                    CREATE (r:Review {
-                        date: $date,
-                        difficulty: $difficulty,
-                        interval: $interval
-                    })-[:REVIEW_OF]->(t)
-                    """,
-                    topic_id=topic_data['id'],
-                    date=review['date'].isoformat(),
-                    difficulty=review['difficulty'],
-                    interval=review['interval']
-                )
-
-    def create_relationship(self, from_id, to_id, relationship_type="PREREQUISITE_OF"):
-        with self.driver.session() as session:
-            session.run("""
-                MATCH (t1:Topic {id: $from_id})
-                MATCH (t2:Topic {id: $to_id})
-                MERGE (t1)-[r:%s]->(t2)
-                """ % relationship_type,
-                from_id=from_id,
-                to_id=to_id
-            )
+    async def _read(self, query, **params):
+        """Run a query in a managed read transaction and return its records.
 
-    def get_full_graph(self):
-        with self.driver.session() as session:
-            # Get all nodes and relationships
-            result = session.run("""
-                MATCH (s:Subject)<-[:BELONGS_TO]-(t:Topic)
-                OPTIONAL MATCH (t)-[r]->(t2:Topic)
-                OPTIONAL MATCH (t)<-[:REVIEW_OF]-(rev:Review)
-                RETURN s, t, collect(DISTINCT {type: type(r), target: t2.id}) as relationships,
-                       collect(DISTINCT rev) as reviews
-                """)
-            
-            graph_data = {"subjects": {}, "topics": {}, "relationships": []}
-            
-            for record in result:
-                subject = record["s"]
-                topic = record["t"]
-                relationships = record["relationships"]
-                reviews = record["reviews"]
-                
-                # Add subject if not exists
-                if subject["name"] not in graph_data["subjects"]:
-                    graph_data["subjects"][subject["name"]] = {
-                        "name": subject["name"],
-                        "topics": []
-                    }
-                
-                # Add topic
-                topic_data = dict(topic)
-                topic_data["subject"] = subject["name"]
-                topic_data["review_history"] = [
-                    {
-                        "date": datetime.fromisoformat(rev["date"]),
-                        "difficulty": rev["difficulty"],
-                        "interval": rev["interval"]
-                    }
-                    for rev in reviews if rev is not None
-                ]
-                topic_data["next_review"] = datetime.fromisoformat(topic_data["next_review"])
-                topic_data["created_at"] = datetime.fromisoformat(topic_data["created_at"])
-                
-                graph_data["topics"][topic["id"]] = topic_data
-                graph_data["subjects"][subject["name"]]["topics"].append(topic["id"])
-                
-                # Add relationships
-                for rel in relationships:
-                    if rel["target"]:
-                        graph_data["relationships"].append({
-                            "from": topic["id"],
-                            "to": rel["target"],
-                            "type": rel["type"]
-                        })
-            
-            return graph_data
-
-    def delete_topic(self, topic_id):
-        with self.driver.session() as session:
-            session.run("""
-                MATCH (t:Topic {id: $id})
-                OPTIONAL MATCH (t)<-[:REVIEW_OF]-(r:Review)
-                DETACH DELETE t, r
-                """,
-                id=topic_id
-            )
+        Managed transactions are retried by the driver on transient errors
+        and routed to a reader when running against a cluster.
+        """
+        async with self.driver.session(database=self.database) as session:
+            return await session.execute_read(_collect_async, query, params)
+
+    async def _write(self, query, **params):
+        """Run a query in a managed write transaction and return its records."""
+        async with self.driver.session(database=self.database) as session:
+            return await session.execute_write(_collect_async, query, params)
 
-    def update_topic(self, old_id, new_data):
-        with self.driver.session() as session:
-            # First delete old topic
-            self.delete_topic(old_id)
-            # Then create new topic with updated data
-            self.create_topic_node(new_data)
-            # Relationships will need to be recreated manually
-
-    def create_topic_node(self, topic_data):
-        """Create a topic node with proper error handling and data validation."""
-        with self.driver.session() as session:
+    async def ensure_schema(self):
+        """Create constraints and indexes and migrate stored values.
+
+        Safe to run on every startup. A constraint that can't be created (for
+        example because duplicate ids already exist) or a migration that
+        fails doesn't stop the others; the failures are returned keyed by
+        name.
+        """
+        failures = {}
+        for name, statement in {**SCHEMA_CONSTRAINTS, **SCHEMA_INDEXES}.items():
             try:
-                # Create subject node if it doesn't exist
-                session.run("""
-                    MERGE (s:Subject {name: $subject})
-                    """, subject=topic_data['subject'])
-
-                # Create topic node with proper date handling
-                result = session.run("""
-                    MATCH (s:Subject {name: $subject})
-                    CREATE (t:Topic {
-                        id: $id,
-                        name: $name,
-                        status: $status,
-                        stage: $stage,
-                        created_at: $created_at,
-                        next_review: $next_review
-                    })-[:BELONGS_TO]->(s)
-                    RETURN t
-                    """,
-                    id=topic_data['id'],
-                    name=topic_data['name'],
-                    subject=topic_data['subject'],
-                    status=topic_data['status'],
-                    stage=topic_data['stage'],
-                    created_at=topic_data['created_at'].isoformat(),
-                    next_review=topic_data['next_review'].isoformat()
-                )
-
-                if 'review_history' in topic_data and topic_data['review_history']:
-                    for review in topic_data['review_history']:
-                        session.run("""
-                            MATCH (t:Topic {id: $topic_id})
-                            CREATE (r:Review {
-                                date: $date,
-                                difficulty: $difficulty,
-                                interval: $interval
-                            })-[:REVIEW_OF]->(t)
-                            """,
-                            topic_id=topic_data['id'],
-                            date=review['date'].isoformat() if isinstance(review['date'], datetime) else review['date'],
-                            difficulty=review['difficulty'],
-                            interval=review['interval']
-                        )
-                
-                return result
-                
+                await self._write(statement)
             except Exception as e:
-                print(f"Database error in create_topic_node: {str(e)}")
-                raise Exception(f"Failed to create topic: {str(e)}")
-
-    def get_full_graph(self):
-        """Get the full graph with proper date handling and error checking."""
-        with self.driver.session() as session:
+                print(f"Database error creating {name}: {str(e)}")
+                failures[name] = str(e)
+        for name, statement in MIGRATIONS.items():
             try:
-                result = session.run("""
-                    MATCH (s:Subject)<-[:BELONGS_TO]-(t:Topic)
-                    OPTIONAL MATCH (t)-[r]->(t2:Topic)
-                    OPTIONAL MATCH (t)<-[:REVIEW_OF]-(rev:Review)
-                    RETURN s, t, collect(DISTINCT {type: type(r), target: t2.id}) as relationships,
-                        collect(DISTINCT rev) as reviews
-                    """)
-                
-                graph_data = {"subjects": {}, "topics": {}, "relationships": []}
-                
-                for record in result:
-                    subject = record["s"]
-                    topic = record["t"]
-                    relationships = record["relationships"]
-                    reviews = record["reviews"]
-                    
-                    # Add subject if not exists
-                    if subject["name"] not in graph_data["subjects"]:
-                        graph_data["subjects"][subject["name"]] = {
-                            "name": subject["name"],
-                            "topics": []
-                        }
-                    
-                    # Process topic data
-                    topic_data = dict(topic)
-                    topic_data["subject"] = subject["name"]
-                    
-                    # Process review history
-                    topic_data["review_history"] = [
-                        {
-                            "date": datetime.fromisoformat(rev["date"]),
-                            "difficulty": rev["difficulty"],
-                            "interval": rev["interval"]
-                        }
-                        for rev in reviews if rev is not None
-                    ]
-                    
-                    # Handle dates
-                    topic_data["next_review"] = datetime.fromisoformat(topic_data["next_review"])
-                    topic_data["created_at"] = datetime.fromisoformat(topic_data["created_at"])
-                    
-                    graph_data["topics"][topic["id"]] = topic_data
-                    graph_data["subjects"][subject["name"]]["topics"].append(topic["id"])
-                    
-                    # Add relationships
-                    for rel in relationships:
-                        if rel["target"]:
-                            graph_data["relationships"].append({
-                                "from": topic["id"],
-                                "to": rel["target"],
-                                "type": rel["type"]
-                            })
-                
-                return graph_data
-                
+                if not await self._read(GET_MIGRATION, name=name):
+                    await self._write(statement)
+                    await self._write(RECORD_MIGRATION, name=name)
             except Exception as e:
-                print(f"Database error in get_full_graph: {str(e)}")
-                raise Exception(f"Failed to retrieve graph: {str(e)}")
-    def create_task(self, task_data: dict):
-            with self.driver.session() as session:
-                result = session.run("""
-                    CREATE (t:Task {
-                        id: $id,
-                        title: $title,
-                        is_completed: $is_completed,
-                        created_at: $created_at,
-                        due_date: $due_date,
-                        energy_level: $energy_level,
-                        duration: $duration
-                    })
-                    RETURN t
-                    """,
-                    id=task_data['id'],
-                    title=task_data['title'],
-                    is_completed=task_data.get('is_completed', False),
-                    created_at=task_data['created_at'].isoformat(),
-                    due_date=task_data.get('due_date', None),
-                    energy_level=task_data.get('energy_level', None),
-                    duration=task_data.get('duration', None)
-                )
-                return result.single()
-
-    def create_calendar_event(self, event_data: dict):
-        with self.driver.session() as session:
-            result = session.run("""
-                CREATE (e:Event {
-                    id: $id,
-                    title: $title,
-                    start_time: $start_time,
-                    end_time: $end_time,
-                    type: $type,
-                    description: $description
-                })
-                RETURN e
-                """,
-                id=event_data['id'],
-                title=event_data['title'],
-                start_time=event_data['start_time'].isoformat(),
-                end_time=event_data['end_time'].isoformat(),
-                type=event_data['type'],
-                description=event_data.get('description', None)
-            )
-            return result.single()
-
-    def get_tasks(self):
-        with self.driver.session() as session:
-            result = session.run("""
-                MATCH (t:Task)
-                RETURN t
-                ORDER BY t.created_at DESC
-                """)
-            return [dict(record["t"]) for record in result]
-
-    def get_calendar_events(self, start_date: datetime, end_date: datetime):
-        with self.driver.session() as session:
-            result = session.run("""
-                MATCH (e:Event)
-                WHERE datetime($start) <= datetime(e.start_time) <= datetime($end)
-                RETURN e
-                ORDER BY e.start_time
-                """,
-                start=start_date.isoformat(),
-                end=end_date.isoformat()
-            )
-            return [dict(record["e"]) for record in result]
-
-    def create_content_node(self, content_data):
-        with self.driver.session() as session:
-            result = session.run("""
-                CREATE (c:Content {
-                    id: $id,
-                    title: $title,
-                    type: $type,
-                    content: $content,
-                    created_at: $created_at
-                })
-                RETURN c
-                """,
-                id=content_data['id'],
-                title=content_data['title'],
-                type=content_data['type'],
-                content=content_data['content'],
-                created_at=content_data['created_at'].isoformat()
-            )
-            return result.single()
-
-    def create_content_relationship(self, content_id, topic_id, relationship_type="EXPLAINS"):
-        with self.driver.session() as session:
-            session.run("""
-                MATCH (c:Content {id: $content_id})
-                MATCH (t:Topic {id: $topic_id})
-                MERGE (c)-[r:%s]->(t)
-                """ % relationship_type,
-                content_id=content_id,
-                topic_id=topic_id
+                print(f"Database error running migration {name}: {str(e)}")
+                failures[name] = str(e)
+        return failures
+
+    async def get_schema_status(self):
+        """Report which of the expected constraints and indexes exist."""
+        return _schema_status(await self._read(SHOW_CONSTRAINTS), await self._read(SHOW_INDEXES))
+
+    async def clear_database(self):
+        await self._write(CLEAR_DATABASE)
+        self.invalidate_caches()
+
+    def invalidate_caches(self):
+        """Drop the cached graph and analytics rollup so the next read reloads them.
+
+        For writes that bypass this connection, such as the content importer
+        or edits made in the Neo4j browser.
+        """
+        self.graph_cache.invalidate()
+        self.analytics.invalidate()
+
+    async def create_relationship(self, from_id, to_id, relationship_type="PREREQUISITE_OF"):
+        """MERGE a topic-to-topic relationship; False if either topic is missing."""
+        with self.graph_cache.writing():
+            records = await self._write(CREATE_RELATIONSHIP % relationship_type, from_id=from_id, to_id=to_id)
+            if not records:
+                return False
+            self.graph_cache.add_relationship(from_id, to_id, relationship_type)
+            return True
+
+    async def delete_relationship(self, from_id, to_id, relationship_type="PREREQUISITE_OF"):
+        """Delete a topic-to-topic relationship; False if there was none."""
+        with self.graph_cache.writing():
+            records = await self._write(DELETE_RELATIONSHIP % relationship_type, from_id=from_id, to_id=to_id)
+            if not records[0]["deleted"]:
+                return False
+            self.graph_cache.remove_relationship(from_id, to_id, relationship_type)
+            return True
+
+    async def delete_topic(self, topic_id):
+        with self.graph_cache.writing(), self.analytics.writing():
+            await self._write(DELETE_TOPIC, id=topic_id)
+            self.graph_cache.remove_topic(topic_id)
+            self.analytics.invalidate()
+
+    async def update_topic(self, old_id, new_data):
+        await self.delete_topic(old_id)
+        await self.create_topic_node(new_data)
+
+    async def record_review(self, topic_id, review, new_stage, next_review):
+        """Append one review to a topic and move its schedule forward.
+
+        Creates a single Review node and updates stage/next_review in place,
+        leaving the topic's other relationships untouched. Returns False if
+        the topic doesn't exist.
+        """
+        with self.graph_cache.writing(), self.analytics.writing():
+            records = await self._write(
+                RECORD_REVIEW, **_review_params(topic_id, review, new_stage, next_review)
             )
-    def get_content_by_topic(self, topic_id):
-        with self.driver.session() as session:
+            if not records:
+                return False
+            self.graph_cache.update_topic(topic_id, stage=new_stage, next_review=next_review)
+            self.graph_cache.add_review(topic_id, review)
+            self.analytics.add_review(review, records[0]["previous_stage"], new_stage, records[0]["status"])
+            return True
+
+    async def create_topic_node(self, topic_data, prerequisites=()):
+        """Create a topic with its review history and prerequisite links.
+
+        Everything is written in one managed transaction: the review history
+        and prerequisites are passed as lists and UNWIND-ed server-side, so
+        the cost is a single round trip however long the history is. Returns
+        the ids of the prerequisites that existed and were linked.
+        """
+        with self.graph_cache.writing(), self.analytics.writing():
             try:
-                result = session.run("""
-                    MATCH (c:Content)-[:EXPLAINS]->(t:Topic {id: $topic_id})
-                    RETURN c
-                    """,
-                    topic_id=topic_id
-                )
-                return [dict(record["c"]) for record in result]
+                records = await self._write(CREATE_TOPIC, **_topic_params(topic_data, prerequisites))
             except Exception as e:
-                print(f"Database error in get_content_by_topic: {str(e)}")
-                return []
-
-    def get_all_content(self):
-        with self.driver.session() as session:
-            result = session.run("""
-                MATCH (c:Content)
-                OPTIONAL MATCH (c)-[:EXPLAINS]->(t:Topic)
-                RETURN c, collect(t.id) as related_topic_ids
-                ORDER BY c.created_at DESC
-                """)
-            
-            content_list = []
-            for record in result:
-                content = dict(record["c"])
-                content["related_topic_ids"] = record["related_topic_ids"]
-                content_list.append(content)
-            
-            return content_list
-
-    def get_content_by_subject(self, subject: str):
-        with self.driver.session() as session:
-            result = session.run("""
-                MATCH (c:Content)-[:EXPLAINS]->(t:Topic)-[:BELONGS_TO]->(s:Subject {name: $subject})
-                RETURN c, collect(t.id) as related_topic_ids
-                ORDER BY c.created_at DESC
-                """,
-                subject=subject
-            )
-            
-            content_list = []
-            for record in result:
-                content = dict(record["c"])
-                content["related_topic_ids"] = record["related_topic_ids"]
-                content_list.append(content)
-            
-            return content_list
-
-    def get_content_by_type(self, content_type: str):
-        with self.driver.session() as session:
-            result = session.run("""
-                MATCH (c:Content {type: $type})
-                OPTIONAL MATCH (c)-[:EXPLAINS]->(t:Topic)
-                RETURN c, collect(t.id) as related_topic_ids
-                ORDER BY c.created_at DESC
-                """,
-                type=content_type
-            )
-            
-            content_list = []
-            for record in result:
-                content = dict(record["c"])
-                content["related_topic_ids"] = record["related_topic_ids"]
-                content_list.append(content)
-            
-            return content_list
-
-    def search_content(self, query: str):
-        with self.driver.session() as session:
-            result = session.run("""
-                MATCH (c:Content)
-                WHERE toLower(c.title) CONTAINS toLower($query) OR toLower(c.content) CONTAINS toLower($query)
-                OPTIONAL MATCH (c)-[:EXPLAINS]->(t:Topic)
-                RETURN c, collect(t.id) as related_topic_ids
-                ORDER BY c.created_at DESC
-                """,
-                query=query
-            )
-            
-            content_list = []
-            for record in result:
-                content = dict(record["c"])
-                content["related_topic_ids"] = record["related_topic_ids"]
-                content_list.append(content)
-            
-            return content_list
-    def create_study_session(self, session_data):
+                print(f"Database error in create_topic_node: {str(e)}")
+                raise Exception(f"Failed to create topic: {str(e)}")
+
+            linked = records[0]["linked"]
+            _cache_created_topic(self.graph_cache, topic_data, linked)
+            self.analytics.add_topic(topic_data)
+            return linked
+
+    async def get_full_graph(self):
+        """Get the full graph, served from the in-process cache once warm."""
+        graph = self.graph_cache.peek()
+        if graph is not None:
+            return graph
+        async with self._graph_load:
+            # Another request may have warmed the cache while we waited
+            if self.graph_cache.is_warm:
+                return self.graph_cache.peek()
+            # Writes landing during the load make fill() skip caching it
+            generation = self.graph_cache.generation
+            return self.graph_cache.fill(await self._load_full_graph(), generation)
+
+    def get_cache_stats(self):
+        return self.graph_cache.stats()
+
+    async def get_topic(self, topic_id, include_history=False):
+        """Look up a single topic by id, or return None if it doesn't exist.
+
+        Served from the graph cache when it is warm, otherwise a point lookup
+        on the Topic.id constraint index.
+        """
+        topic = _cached_lookup(self.graph_cache, topic_id, include_history)
+        if topic is not None:
+            return topic
+
+        records = await self._read(GET_TOPIC, id=topic_id, include_history=include_history)
+        return _topic_from_record(records[0], include_history) if records else None
+
+    async def get_due_reviews(self, now: datetime, limit: int | None = None, after: tuple | None = None):
+        """Get active topics with next_review <= now, ordered by next_review then id.
+
+        `after` is the (next_review, id) of the last topic on the previous page.
+        Filtering and ordering run on the (status, next_review) index.
+        """
+        query, params = _due_reviews_query(now, limit, after)
+        return [_topic_from_record(record) for record in await self._read(query, **params)]
+
+    async def iter_topics(self, limit: int | None = None, after: str | None = None, include_history=True):
+        """Yield (topic, relationships) in id order as the cursor produces them.
+
+        `after` is the id of the last topic on the previous page. Unlike
+        get_full_graph nothing is buffered, so large graphs can be streamed.
+        """
+        query, params = _topic_page_query(limit, after, include_history)
+        async with self.driver.session(database=self.database, default_access_mode=READ_ACCESS) as session:
+            async with await session.begin_transaction() as tx:
+                result = await tx.run(query, params)
+                async for record in result:
+                    yield _topic_page_item(record, include_history)
+
+    async def get_review_logs(self):
+        """Every review as {topic_id, date, difficulty}, by topic then date."""
+        return [_review_log(record) for record in await self._read(GET_REVIEW_LOGS)]
+
+    async def get_analytics(self):
+        """The analytics rollup, aggregated from the database on first use.
+
+        The aggregations run in one read transaction and are redone if a
+        write lands while they run. Should that keep happening, the last
+        result is served from a rollup that isn't kept.
+        """
+        async with self._analytics_load:
+            # Another request may have warmed it while we waited
+            if self.analytics.is_warm:
+                return self.analytics
+            for _ in range(ANALYTICS_LOAD_ATTEMPTS):
+                generation = self.analytics.generation
+                rows = await self._load_analytics()
+                if self.analytics.fill(*rows, generation=generation):
+                    return self.analytics
+            return _detached_rollup(rows)
+
+    async def _load_analytics(self):
+        async with self.driver.session(database=self.database, default_access_mode=READ_ACCESS) as session:
+            return await session.execute_read(_collect_all_async, ANALYTICS_QUERIES.values())
+
+    async def get_prerequisite_edges(self):
+        """Every PREREQUISITE_OF edge as a (prerequisite_id, topic_id) pair."""
+        return [(record["prerequisite_id"], record["topic_id"]) for record in await self._read(GET_PREREQUISITE_EDGES)]
+
+    async def _load_full_graph(self):
+        """Load the full graph with proper date handling and error checking."""
+        try:
+            records = await self._read(GET_FULL_GRAPH)
+        except Exception as e:
+            print(f"Database error in get_full_graph: {str(e)}")
+            raise Exception(f"Failed to retrieve graph: {str(e)}")
+        return _graph_from_records(records)
+
+    async def create_task(self, task_data: dict):
+        return (await self._write(CREATE_TASK, **_task_params(task_data)))[0]
+
+    async def create_calendar_event(self, event_data: dict):
+        return (await self._write(CREATE_CALENDAR_EVENT, **_event_params(event_data)))[0]
+
+    async def get_tasks(self):
+        return [dict(record["t"]) for record in await self._read(GET_TASKS)]
+
+    async def get_calendar_events(self, start_date: datetime, end_date: datetime):
+        records = await self._read(
+            GET_CALENDAR_EVENTS, start=start_date.isoformat(), end=end_date.isoformat()
+        )
+        return [dict(record["e"]) for record in records]
+
+    async def create_content_node(self, content_data):
+        return (await self._write(CREATE_CONTENT, **_content_params(content_data)))[0]
+
+    async def create_content_relationship(self, content_id, topic_id, relationship_type="EXPLAINS"):
+        await self._write(
+            CREATE_CONTENT_RELATIONSHIP % relationship_type,
+            content_id=content_id,
+            topic_id=topic_id
+        )
+
+    async def get_content_by_topic(self, topic_id):
+        try:
+            records = await self._read(GET_CONTENT_BY_TOPIC, topic_id=topic_id)
+            return [_properties(record["c"]) for record in records]
+        except Exception as e:
+            print(f"Database error in get_content_by_topic: {str(e)}")
+            return []
+
+    async def get_all_content(self):
+        return _content_list(await self._read(GET_ALL_CONTENT))
+
+    async def get_content_stamps(self):
+        """Map every content id to the ISO timestamp it last changed at."""
+        return {record["id"]: record["stamp"] for record in await self._read(GET_CONTENT_STAMPS)}
+
+    async def get_content_by_ids(self, content_ids):
+        """Look up content by id, keeping the order of `content_ids`."""
+        records = await self._read(GET_CONTENT_BY_IDS, ids=list(content_ids))
+        return _in_order(_content_list(records), content_ids)
+
+    async def get_embeddings(self, kind, model):
+        """Stored (id, vector) pairs of a kind ('content' or 'topic') for a model."""
+        records = await self._read(EMBEDDING_QUERIES[kind]["load"], model=model)
+        return [(record["id"], record["embedding"]) for record in records]
+
+    async def get_pending_embeddings(self, kind, model):
+        """Nodes of a kind that have no embedding from `model` yet."""
+        records = await self._read(EMBEDDING_QUERIES[kind]["pending"], model=model)
+        return [dict(record) for record in records]
+
+    async def set_embeddings(self, kind, model, rows):
+        """Store a batch of {'id', 'embedding'} rows in one UNWIND."""
+        await self._write(EMBEDDING_QUERIES[kind]["store"], model=model, rows=rows)
+
+    async def get_content_by_subject(self, subject: str):
+        return _content_list(await self._read(GET_CONTENT_BY_SUBJECT, subject=subject))
+
+    async def get_content_by_type(self, content_type: str):
+        return _content_list(await self._read(GET_CONTENT_BY_TYPE, type=content_type))
+
+    async def get_content(self, content_id):
+        content_list = _content_list(await self._read(GET_CONTENT, id=content_id))
+        return content_list[0] if content_list else None
+
+    async def search_content(self, query: str, limit: int = 20, skip: int = 0):
+        """Full-text search over content titles and bodies, best match first.
+
+        Each result carries its relevance `score`. The last word of the
+        query also matches as a prefix so partially typed words find results.
+        """
+        search = _fulltext_query(query)
+        if not search:
+            return []
+        return _content_list(await self._read(SEARCH_CONTENT, search=search, limit=limit, skip=skip))
+
+    async def create_study_session(self, session_data):
         """Create a study session node and relationships to topics"""
-        with self.driver.session() as session:
-            # Create session node
-            result = session.run("""
-                CREATE (s:StudySession {
-                    id: $id,
-                    start_time: $start_time,
-                    end_time: $end_time,
-                    created_at: $created_at
-                })
-                RETURN s
-                """,
-                id=session_data['id'],
-                start_time=session_data['start_time'],
-                end_time=session_data['end_time'],
-                created_at=session_data['created_at']
+        return (await self.create_study_sessions([session_data]))[0]
+
+    async def create_study_sessions(self, sessions):
+        """Create many study sessions and their INCLUDES edges in one transaction.
+
+        Returns the ids of the created sessions, in input order.
+        """
+        with self.analytics.writing():
+            records = await self._write(CREATE_STUDY_SESSIONS, sessions=[_session_params(session) for session in sessions])
+            self.analytics.add_study(link for linked in records[0]["linked"] for link in linked)
+        return records[0]["created"]
+
+    async def apply_sync_batch(self, operations, log):
+        """Apply a batch prepared by sync.prepare_batch in one transaction.
+
+        Changes whose change_id is already in the change log are skipped, so
+        a client retrying a batch after a lost response doesn't apply it
+        twice. Returns the applied row keys, the duplicate change ids and the
+        latest change version.
+        """
+        async def apply(tx):
+            result = await tx.run(FIND_CHANGES, ids=_change_ids(log))
+            duplicates = set((await result.single())["found"])
+            applied = set()
+            for query, rows in _sync_statements(operations, log, duplicates):
+                result = await tx.run(query, rows=rows)
+                applied.update((await result.single())["applied"])
+            changes = [log[key] for key in sorted(applied)]
+            if changes:
+                result = await tx.run(LOG_CHANGES, changes=changes)
+            else:
+                result = await tx.run(GET_SYNC_VERSION)
+            return applied, duplicates, (await result.single())["version"]
+
+        async with self.driver.session(database=self.database) as session:
+            applied, duplicates, version = await session.execute_write(apply)
+
+        if _touches_topics(operations):
+            self.invalidate_caches()
+        return applied, duplicates, version
+
+    async def log_changes(self, changes):
+        """Append entries to the change log and return the latest version."""
+        return (await self._write(LOG_CHANGES, changes=changes))[0]["version"]
+
+    async def get_sync_version(self):
+        return (await self._read(GET_SYNC_VERSION))[0]["version"]
+
+    async def get_changes(self, since: int, limit: int):
+        """Change-log entries newer than `since`, oldest first."""
+        records = await self._read(GET_CHANGES, since=since, limit=limit)
+        return [dict(record["c"]) for record in records]
+
+    async def get_unsynced(self, limit: int):
+        return [dict(record["c"]) for record in await self._read(GET_UNSYNCED, limit=limit)]
+
+    async def confirm_changes(self, change_ids):
+        return (await self._write(CONFIRM_CHANGES, ids=list(change_ids)))[0]["confirmed"]
+
+
+class Neo4jConnection:
+    """Blocking facade over AsyncNeo4jConnection for scripts and benchmarks.
+
+    Every coroutine method of the async connection is run to completion on
+    a private event loop, and async generators such as iter_topics become
+    plain generators, so there is a single implementation of each query.
+    Other attributes (graph_cache, analytics, get_cache_stats) are the async
+    connection's own. Not for use from inside a running event loop.
+    """
+
+    def __init__(
+        self,
+        uri: str | None = None,
+        user: str | None = None,
+        password: str | None = None,
+    ):
+        self._loop = asyncio.new_event_loop()
+        self._connection = AsyncNeo4jConnection(uri, user, password)
+
+    def close(self):
+        try:
+            self._loop.run_until_complete(self._connection.close())
+        finally:
+            self._loop.close()
+
+    def __getattr__(self, name):
+        attribute = getattr(self._connection, name)
+        if inspect.isasyncgenfunction(attribute):
+            return functools.wraps(attribute)(lambda *args, **kwargs: self._iterate(attribute(*args, **kwargs)))
+        if inspect.iscoroutinefunction(attribute):
+            return functools.wraps(attribute)(
+                lambda *args, **kwargs: self._loop.run_until_complete(attribute(*args, **kwargs))
             )
-            
-            session_id = session_data['id']
-            
-            # Create relationships to topics with durations
-            for i, topic_id in enumerate(session_data['topics']):
-                duration = session_data['durations'][i]
-                session.run("""
-                    MATCH (s:StudySession {id: $session_id})
-                    MATCH (t:Topic {id: $topic_id})
-                    CREATE (s)-[r:INCLUDES {duration: $duration}]->(t)
-                    """,
-                    session_id=session_id,
-                    topic_id=topic_id,
-                    duration=duration
-                )
-            
-            return session_id
-
-    def get_all_content(self):
-        with self.driver.session() as session:
-            result = session.run("""
-                MATCH (c:Content)
-                OPTIONAL MATCH (c)-[:EXPLAINS]->(t:Topic)
-                RETURN c, collect(t.id) as related_topic_ids
-                ORDER BY c.created_at DESC
-                """)
-            
-            content_list = []
-            for record in result:
-                content = dict(record["c"])
-                content["related_topic_ids"] = record["related_topic_ids"]
-                content_list.append(content)
-            
-            return content_list
\ No newline at end of file
+        return attribute
+
+    def _iterate(self, generator):
+        try:
+            while True:
+                try:
+                    yield self._loop.run_until_complete(generator.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            self._loop.run_until_complete(generator.aclose())
+
+
+async def _collect_async(tx, query, params):
+    # Records have to be read inside the transaction function so a retried
+    # transaction never hands back a half-consumed result
+    result = await tx.run(query, params)
+    return [record async for record in result]
+
+
+async def _collect_all_async(tx, queries):
+    return [await _collect_async(tx, query, {}) for query in queries]
+
+
+def _detached_rollup(rows):
+    rollup = AnalyticsRollup()
+    rollup.fill(*rows)
+    return rollup
+
+
+def _schema_status(constraint_records, index_records):
+    constraints = {record["name"] for record in constraint_records}
+    indexes = {record["name"]: record["state"] for record in index_records}
+    return {
+        "constraints": {name: name in constraints for name in SCHEMA_CONSTRAINTS},
+        "indexes": {
+            name: {"present": name in indexes, "state": indexes.get(name)}
+            for name in SCHEMA_INDEXES
+        },
+    }
+
+
+def _review_log(record):
+    return {
+        "topic_id": record["topic_id"],
+        "date": datetime.fromisoformat(record["date"]),
+        "difficulty": record["difficulty"]
+    }
+
+
+def _review_params(topic_id, review, new_stage, next_review):
+    return {
+        'topic_id': topic_id,
+        'stage': new_stage,
+        'next_review': next_review,
+        'date': review['date'].isoformat(),
+        'difficulty': review['difficulty'],
+        'interval': review['interval']
+    }
+
+
+def _topic_params(topic_data, prerequisites):
+    return {
+        'id': topic_data['id'],
+        'name': topic_data['name'],
+        'subject': topic_data['subject'],
+        'status': topic_data['status'],
+        'stage': topic_data['stage'],
+        'created_at': topic_data['created_at'].isoformat(),
+        'next_review': topic_data['next_review'],
+        'reviews': [
+            {
+                'date': review['date'].isoformat() if isinstance(review['date'], datetime) else review['date'],
+                'difficulty': review['difficulty'],
+                'interval': review['interval']
+            }
+            for review in topic_data.get('review_history', [])
+        ],
+        'prerequisites': list(prerequisites)
+    }
+
+
+def _due_reviews_query(now, limit, after):
+    after_review, after_id = after if after else (datetime.min, None)
+    query = GET_DUE_REVIEWS + ("LIMIT $limit" if limit is not None else "")
+    params = {
+        'now': now,
+        'after_review': after_review,
+        'after_id': after_id,
+        'limit': limit
+    }
+    return query, params
+
+
+def _topic_page_query(limit, after, include_history):
+    query = (
+        GET_TOPIC_PAGE % ("t.id > $after" if after is not None else "t.id IS NOT NULL")
+        + ("LIMIT $limit" if limit is not None else "")
+        + GET_TOPIC_PAGE_RETURN
+    )
+    params = {
+        'after': after,
+        'limit': limit,
+        'include_history': include_history
+    }
+    return query, params
+
+
+def _topic_page_item(record, include_history):
+    topic = _topic_from_record(record, include_history)
+    relationships = [
+        {"from": topic["id"], "to": rel["target"], "type": rel["type"]}
+        for rel in record["relationships"]
+    ]
+    return topic, relationships
+
+
+def _task_params(task_data):
+    return {
+        'id': task_data['id'],
+        'title': task_data['title'],
+        'is_completed': task_data.get('is_completed', False),
+        'created_at': task_data['created_at'].isoformat(),
+        'due_date': task_data.get('due_date', None),
+        'energy_level': task_data.get('energy_level', None),
+        'duration': task_data.get('duration', None)
+    }
+
+
+def _event_params(event_data):
+    return {
+        'id': event_data['id'],
+        'title': event_data['title'],
+        'start_time': event_data['start_time'].isoformat(),
+        'end_time': event_data['end_time'].isoformat(),
+        'type': event_data['type'],
+        'description': event_data.get('description', None)
+    }
+
+
+def _content_params(content_data):
+    return {
+        'id': content_data['id'],
+        'title': content_data['title'],
+        'type': content_data['type'],
+        'content': content_data['content'],
+        'created_at': content_data['created_at'].isoformat()
+    }
+
+
+def _session_params(session_data):
+    return {
+        'id': session_data['id'],
+        'start_time': session_data['start_time'],
+        'end_time': session_data['end_time'],
+        'created_at': session_data['created_at'],
+        'topics': [
+            {'topic_id': topic_id, 'duration': duration}
+            for topic_id, duration in zip(session_data['topics'], session_data['durations'])
+        ]
+    }
+
+
+def _change_ids(log):
+    return [entry["id"] for entry in log.values()]
+
+
+def _sync_statements(operations, log, duplicates):
+    # Run in SYNC_OPERATIONS order so topics exist before the content and
+    # reviews in the same batch that point at them
+    for name, query in SYNC_OPERATIONS.items():
+        rows = [row for row in operations.get(name, ()) if log[row["key"]]["id"] not in duplicates]
+        if rows:
+            yield query, rows
+
+
+def _touches_topics(operations):
+    return any(name.startswith(("topic_", "review_")) for name in operations)
+
+
+def _cache_created_topic(graph_cache, topic_data, linked):
+    graph_cache.put_topic(_cached_topic(topic_data))
+    for prerequisite_id in linked:
+        graph_cache.add_relationship(prerequisite_id, topic_data['id'], "PREREQUISITE_OF")
+
+
+def _cached_lookup(graph_cache, topic_id, include_history):
+    topic = graph_cache.get_topic(topic_id)
+    if topic is not None and not include_history:
+        topic.pop("review_history", None)
+    return topic
+
+
+def _topic_from_record(record, include_history=False):
+    """Build a topic dict from a record with `t`, `subject` and optional `reviews`."""
+    topic = _properties(record["t"])
+    topic["subject"] = record["subject"]
+    topic["next_review"] = _to_datetime(topic["next_review"])
+    topic["created_at"] = _to_datetime(topic["created_at"])
+    if include_history:
+        topic["review_history"] = sorted(
+            (
+                {
+                    "date": datetime.fromisoformat(rev["date"]),
+                    "difficulty": rev["difficulty"],
+                    "interval": rev["interval"]
+                }
+                for rev in record["reviews"]
+            ),
+            key=lambda review: review["date"]
+        )
+    return topic
+
+
+def _graph_from_records(records):
+    graph_data = {"subjects": {}, "topics": {}, "relationships": []}
+
+    for record in records:
+        subject = record["s"]
+        topic = record["t"]
+        relationships = record["relationships"]
+        reviews = record["reviews"]
+
+        # Add subject if not exists
+        if subject["name"] not in graph_data["subjects"]:
+            graph_data["subjects"][subject["name"]] = {
+                "name": subject["name"],
+                "topics": []
+            }
+
+        # Process topic data
+        topic_data = _properties(topic)
+        topic_data["subject"] = subject["name"]
+
+        # Process review history
+        topic_data["review_history"] = [
+            {
+                "date": datetime.fromisoformat(rev["date"]),
+                "difficulty": rev["difficulty"],
+                "interval": rev["interval"]
+            }
+            for rev in reviews if rev is not None
+        ]
+
+        # Handle dates
+        topic_data["next_review"] = _to_datetime(topic_data["next_review"])
+        topic_data["created_at"] = datetime.fromisoformat(topic_data["created_at"])
+
+        graph_data["topics"][topic["id"]] = topic_data
+        graph_data["subjects"][subject["name"]]["topics"].append(topic["id"])
+
+        # Add relationships
+        for rel in relationships:
+            if rel["target"]:
+                graph_data["relationships"].append({
+                    "from": topic["id"],
+                    "to": rel["target"],
+                    "type": rel["type"]
+                })
+
+    return graph_data
+
+
+def _in_order(items, ids):
+    by_id = {item["id"]: item for item in items}
+    return [by_id[item_id] for item_id in ids if item_id in by_id]
+
+
+def _properties(node):
+    properties = dict(node)
+    for name in EMBEDDING_PROPERTIES:
+        properties.pop(name, None)
+    return properties
+
+
+def _content_list(records):
+    content_list = []
+    for record in records:
+        content = _properties(record["c"])
+        content["related_topic_ids"] = record["related_topic_ids"]
+        if "score" in record.keys():
+            content["score"] = record["score"]
+        content_list.append(content)
+    return content_list
+
+
+def _fulltext_query(text):
+    """Turn free text into a Lucene query for the content_search index.
+
+    Special characters are escaped so user input can't break the query
+    syntax; the last term is also matched as a prefix.
+    """
+    terms = [
+        "".join("\\" + char if char in LUCENE_SPECIAL else char for char in term)
+        for term in text.split()
+    ]
+    # Lucene treats bare AND/OR/NOT as operators
+    terms = [term.lower() if term in ("AND", "OR", "NOT") else term for term in terms]
+    if not terms:
+        return ""
+    return " ".join(terms + [terms[-1] + "*"])
+
+
+def _cached_topic(topic_data):
+    """Shape topic_data the way _load_full_graph returns a topic."""
+    topic = {
+        key: topic_data[key]
+        for key in ('id', 'name', 'subject', 'status', 'stage', 'created_at', 'next_review')
+    }
+    topic['review_history'] = [
+        {
+            'date': review['date'] if isinstance(review['date'], datetime) else datetime.fromisoformat(review['date']),
+            'difficulty': review['difficulty'],
+            'interval': review['interval']
+        }
+        for review in topic_data.get('review_history', [])
+    ]
+    return topic
+
+
+def _to_datetime(value):
+    """Convert a stored temporal value (native or legacy ISO string) to datetime."""
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    if hasattr(value, 'to_native'):
+        return value.to_native()
+    return value
@@ -4,77 +4,19 @@ from collections import defaultdict
 import matplotlib.pyplot as plt
 import numpy as np
 import seaborn as sns
+from spacing import (
+    STAGES, DIFFICULTIES, DayFuzzySet, DaySpacing, FuzzyIntervals, next_stage, next_stage_codes, to_codes
+)
 
-class DayFuzzySet:
-    def __init__(self, name):
-        self.name = name
-
-    def trapezoidal_mf(self, x, a, b, c, d):
-        """Trapezoidal membership function"""
-        if x <= a or x >= d:
-            return 0
-        elif b <= x <= c:
-            return 1
-        elif a < x < b:
-            return (x - a) / (b - a)
-        else:
-            return (d - x) / (d - c)
-
-class DaySpacing:
-    def __init__(self):
-        self.sets = {}
-        self.rules = []
-        
-    def add_fuzzy_set(self, name, points):
-        """Add a new fuzzy set with trapezoidal membership function"""
-        fuzzy_set = DayFuzzySet(name)
-        fuzzy_set.points = points
-        self.sets[name] = fuzzy_set
-    
-    def calculate_membership(self, days):
-        """Calculate membership degrees for given number of days"""
-        memberships = {}
-        for set_name, fuzzy_set in self.sets.items():
-            a, b, c, d = fuzzy_set.points
-            membership = fuzzy_set.trapezoidal_mf(days, a, b, c, d)
-            memberships[set_name] = membership
-        return memberships
-    
-    def add_rule(self, condition, consequence):
-        """Add a fuzzy rule"""
-        self.rules.append((condition, consequence))
-    
-    def evaluate_rules(self, memberships):
-        """Evaluate all rules for given memberships"""
-        rule_strengths = {}
-        for condition, consequence in self.rules:
-            strength = memberships.get(condition, 0)
-            rule_strengths[consequence] = max(
-                rule_strengths.get(consequence, 0),
-                strength
-            )
-        return rule_strengths
-    
-    def defuzzify_centroid(self, rule_strengths, output_ranges):
-        """Defuzzify using centroid method"""
-        if not rule_strengths:
-            return None
-            
-        numerator = 0
-        denominator = 0
-        
-        for output_name, strength in rule_strengths.items():
-            if strength > 0:
-                center = sum(output_ranges[output_name]) / len(output_ranges[output_name])
-                numerator += center * strength
-                denominator += strength
-                
-        if denominator == 0:
-            return None
-            
-        return numerator / denominator
+# Lookups answered from the node tree after a topic is added before the
+# compact snapshot is rebuilt. Adds interleaved with lookups then never pay
+# the O(N) rebuild; a run of lookups on a settled graph does, once.
+COMPACT_REBUILD_READS = 32
 
 class TopicNode:
+    # No per-instance __dict__; large hierarchies hold one node per path segment
+    __slots__ = ('name', 'parent', 'children', 'review_data', 'status')
+
     def __init__(self, name, parent=None):
         self.name = name
         self.parent = parent
@@ -85,9 +27,12 @@ class TopicNode:
 class TopicGraph:
     def __init__(self):
         self.root = TopicNode("root")
+        # Bumped by every add_topic_path so compact snapshots know when they are stale
+        self.version = 0
         
     def add_topic_path(self, path, review_data=None):
         """Add a topic path (e.g., 'Math/Calculus/Limits')"""
+        self.version += 1
         current = self.root
         parts = path.split('/')
         
@@ -126,6 +71,19 @@ class TopicGraph:
         collect_subtopics(node, path if path else "")
         return subtopics
     
+    def get_related_topics(self, path):
+        """Names of reviewed siblings and children, plus the parent unless it is the root"""
+        node = self.get_topic_path(path) if path else None
+        if not node:
+            return []
+
+        related = set()
+        related.update(sibling.name for sibling in node.parent.children.values() if sibling.review_data)
+        related.update(child.name for child in node.children.values() if child.review_data)
+        if node.parent is not self.root:
+            related.add(node.parent.name)
+        return list(related)
+
     def get_parent_topics(self, path):
         """Get all parent topics of a path"""
         parents = []
@@ -141,6 +99,93 @@ class TopicGraph:
             
         return parents
 
+class CompactTopicGraph:
+    """Read-only array layout of a TopicGraph for subtree queries.
+
+    Nodes are stored in preorder with children in insertion order, as
+    TopicGraph walks them, so the subtree of row i is rows i..end[i]-1.
+    Segment names are interned into one vocabulary and parents, subtree
+    ends and name ids live in int32 arrays, and get_subtopics is a slice of
+    the reviewed paths found with two array lookups.
+    """
+
+    def __init__(self, vocabulary, name_ids, parents, ends, paths, review_data):
+        self.vocabulary = vocabulary
+        self.name_ids = np.asarray(name_ids, dtype=np.int32)
+        self.parents = np.asarray(parents, dtype=np.int32)
+        self.ends = np.asarray(ends, dtype=np.int32)
+        self.paths = paths
+        self.review_data = review_data
+        self.rows = {path: row for row, path in enumerate(paths)}
+        has_review = np.fromiter((bool(data) for data in review_data), dtype=bool, count=len(review_data))
+        # reviews_before[i] counts reviewed rows before row i, so the reviewed
+        # rows of a subtree are review_paths[reviews_before[i]:reviews_before[end[i]]]
+        self.reviews_before = np.concatenate(([0], np.cumsum(has_review))).astype(np.int32)
+        self.review_paths = [path for path, reviewed in zip(paths, has_review.tolist()) if reviewed]
+
+    def __len__(self):
+        return len(self.paths)
+
+    @classmethod
+    def from_graph(cls, graph):
+        """Snapshot a TopicGraph; row 0 is its root."""
+        vocabulary, name_index = [], {}
+        name_ids, parents, ends, paths, review_data = [], [], [], [], []
+        # (node, parent row, path); a None node closes the subtree of `parent row`
+        stack = [(graph.root, -1, "")]
+        while stack:
+            node, parent, path = stack.pop()
+            if node is None:
+                ends[parent] = len(paths)
+                continue
+            row = len(paths)
+            name_id = name_index.get(node.name)
+            if name_id is None:
+                name_id = name_index[node.name] = len(vocabulary)
+                vocabulary.append(node.name)
+            name_ids.append(name_id)
+            parents.append(parent)
+            ends.append(0)
+            paths.append(path)
+            review_data.append(node.review_data)
+            stack.append((None, row, None))
+            prefix = f"{path}/" if path else ""
+            for name, child in reversed(node.children.items()):
+                stack.append((child, row, prefix + name))
+        return cls(vocabulary, name_ids, parents, ends, paths, review_data)
+
+    def name(self, row):
+        return self.vocabulary[self.name_ids[row]]
+
+    def get_subtopics(self, path):
+        """Same result as TopicGraph.get_subtopics"""
+        row = self.rows.get(path or "")
+        if row is None:
+            return []
+        return self.review_paths[self.reviews_before[row]:self.reviews_before[self.ends[row]]]
+
+    def children(self, row):
+        """Child rows in insertion order; each sibling starts where the last subtree ends"""
+        child, end = row + 1, int(self.ends[row])
+        while child < end:
+            yield child
+            child = int(self.ends[child])
+
+    def get_related_topics(self, path):
+        """Names of reviewed siblings and children, plus the parent unless it is the root"""
+        row = self.rows.get(path) if path else None
+        if row is None:
+            return []
+
+        related = set()
+        parent = int(self.parents[row])
+        if parent >= 0:
+            related.update(self.name(sibling) for sibling in self.children(parent) if self.review_data[sibling])
+        related.update(self.name(child) for child in self.children(row) if self.review_data[child])
+        if parent > 0:
+            related.add(self.name(parent))
+        return list(related)
+
 class LearningVisualization:
     def __init__(self, spaced_learning_system):
         self.learning_system = spaced_learning_system
@@ -235,37 +280,14 @@ class LearningVisualization:
             ax.set_ylabel('Interval (days)')
             ax.tick_params(axis='x', rotation=45)
 
-class EnhancedSpacedLearningSystem:
+class EnhancedSpacedLearningSystem(FuzzyIntervals):
     def __init__(self):
         self.topics = {}
-        self.spacing_system = DaySpacing()
         self.topic_graph = TopicGraph()
-        self._setup_fuzzy_system()
+        self._compact_graph = None
+        self._stale_reads = (0, 0)  # (topic_graph version, lookups since it changed)
+        super().__init__()
         
-    def _setup_fuzzy_system(self):
-        # Define fuzzy sets based on learning stages
-        self.spacing_system.add_fuzzy_set('first_time', [0, 0, 1, 2])
-        self.spacing_system.add_fuzzy_set('early_stage', [1, 2, 3, 5])
-        self.spacing_system.add_fuzzy_set('mid_stage', [3, 5, 10, 15])
-        self.spacing_system.add_fuzzy_set('late_stage', [10, 15, 20, 30])
-        self.spacing_system.add_fuzzy_set('mastered', [20, 30, 60, 60])
-
-        # Add rules for different learning stages
-        self.spacing_system.add_rule('first_time', 'same_day')
-        self.spacing_system.add_rule('early_stage', 'few_days')
-        self.spacing_system.add_rule('mid_stage', 'week_plus')
-        self.spacing_system.add_rule('late_stage', 'two_weeks')
-        self.spacing_system.add_rule('mastered', 'monthly')
-
-        # Define output ranges
-        self.output_ranges = {
-            'same_day': [0, 1],
-            'few_days': [2, 3],
-            'week_plus': [5, 10],
-            'two_weeks': [10, 20],
-            'monthly': [30, 60]
-        }
-
     def add_topic_with_subtopics(self, topic_path, status='active'):
         """Add a topic with its full path and initial status"""
         topic_id = topic_path.replace('/', ':')
@@ -324,26 +346,13 @@ class EnhancedSpacedLearningSystem:
             return None
 
         topic = self.topics[topic_id]
-        current_stage = topic['stage']
         days_since_last = 1
 
         if topic['review_history']:
             last_review = topic['review_history'][-1]['date']
             days_since_last = (datetime.now() - last_review).days
 
-        memberships = self.spacing_system.calculate_membership(days_since_last)
-        rule_strengths = self.spacing_system.evaluate_rules(memberships)
-        base_interval = self.spacing_system.defuzzify_centroid(rule_strengths, self.output_ranges)
-
-        if difficulty == 'hard':
-            interval = max(1, base_interval * 0.6)
-            new_stage = self._decrease_stage(current_stage)
-        elif difficulty == 'easy':
-            interval = base_interval * 1.4
-            new_stage = self._increase_stage(current_stage)
-        else:
-            interval = base_interval
-            new_stage = current_stage
+        interval, new_stage = self.next_interval(days_since_last, topic['stage'], difficulty)
 
         next_review = datetime.now() + timedelta(days=interval)
         self.topics[topic_id]['next_review'] = next_review
@@ -356,16 +365,6 @@ class EnhancedSpacedLearningSystem:
 
         return next_review
 
-    def _decrease_stage(self, current_stage):
-        stages = ['first_time', 'early_stage', 'mid_stage', 'late_stage', 'mastered']
-        current_idx = stages.index(current_stage)
-        return stages[max(0, current_idx - 1)]
-
-    def _increase_stage(self, current_stage):
-        stages = ['first_time', 'early_stage', 'mid_stage', 'late_stage', 'mastered']
-        current_idx = stages.index(current_stage)
-        return stages[min(len(stages) - 1, current_idx + 1)]
-
     def get_interval_buckets(self):
         """Get topics organized by their review intervals"""
         now = datetime.now()
@@ -464,25 +463,29 @@ class EnhancedSpacedLearningSystem:
 
     def get_related_topics(self, topic_path):
         """Get related topics (siblings, parent, children)"""
-        node = self.topic_graph.get_topic_path(topic_path)
-        if not node:
-            return []
-            
-        related = set()
-        
-        if node.parent:
-            for sibling in node.parent.children.values():
-                if sibling.review_data:
-                    related.add(sibling.name)
-                    
-        for child in node.children.values():
-            if child.review_data:
-                related.add(child.name)
-                
-        if node.parent and node.parent.name != "root":
-            related.add(node.parent.name)
-            
-        return list(related)
+        return self._topic_lookup().get_related_topics(topic_path)
+
+    def get_subtopics(self, topic_path):
+        """Paths of all reviewed topics at or under a path"""
+        return self._topic_lookup().get_subtopics(topic_path)
+
+    def compact_topic_graph(self):
+        """CompactTopicGraph of topic_graph, rebuilt after topics are added"""
+        if self._compact_graph is None or self._compact_graph[0] != self.topic_graph.version:
+            self._compact_graph = (self.topic_graph.version, CompactTopicGraph.from_graph(self.topic_graph))
+        return self._compact_graph[1]
+
+    def _topic_lookup(self):
+        """The compact snapshot if it is current, else the node tree until the
+        graph has gone COMPACT_REBUILD_READS lookups without changing"""
+        version = self.topic_graph.version
+        if self._compact_graph is not None and self._compact_graph[0] == version:
+            return self._compact_graph[1]
+        reads = self._stale_reads[1] + 1 if self._stale_reads[0] == version else 1
+        if reads > COMPACT_REBUILD_READS:
+            return self.compact_topic_graph()
+        self._stale_reads = (version, reads)
+        return self.topic_graph
 
     def save_state(self, filename='learning_state.json'):
         """Save the current state to a file"""
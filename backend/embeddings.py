@@ -0,0 +1,220 @@
+import asyncio
+import os
+import re
+import zlib
+import numpy as np
+
+TOKEN = re.compile(r"\w+")
+
+
+class HashingEmbedder:
+    """Dependency-free embedder: signed feature hashing of words and word pairs.
+
+    Deterministic across processes and needs no model download, so it is the
+    offline default and what the tests use. It captures shared vocabulary,
+    not meaning; install sentence-transformers for real semantic search.
+    """
+
+    def __init__(self, dimensions=384):
+        self.dimensions = dimensions
+        self.name = f"hashing-{dimensions}"
+
+    def embed(self, texts):
+        vectors = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = TOKEN.findall(text.lower())
+            features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+            if not features:
+                continue
+            # crc32 rather than hash() so vectors survive a restart
+            hashes = np.fromiter((zlib.crc32(f.encode()) for f in features), dtype=np.uint32, count=len(features))
+            signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+            np.add.at(vectors[row], hashes % self.dimensions, signs)
+        return _normalize(vectors)
+
+
+class SentenceTransformerEmbedder:
+    """Embeds with a locally cached sentence-transformers model."""
+
+    def __init__(self, model_name, batch_size=32):
+        from sentence_transformers import SentenceTransformer
+        # Never reach for the network; the model has to be in the local cache
+        self.model = SentenceTransformer(model_name, local_files_only=True)
+        self.dimensions = self.model.get_sentence_embedding_dimension()
+        self.name = model_name
+        self.batch_size = batch_size
+
+    def embed(self, texts):
+        vectors = self.model.encode(
+            list(texts), batch_size=self.batch_size, convert_to_numpy=True, normalize_embeddings=True
+        )
+        return vectors.astype(np.float32, copy=False)
+
+
+def create_embedder():
+    """Embedder named by EMBEDDING_MODEL, falling back to HashingEmbedder.
+
+    EMBEDDING_MODEL=hashing (or unset) selects the hashing embedder; any
+    other value is loaded as a sentence-transformers model from the cache.
+    """
+    model_name = os.getenv("EMBEDDING_MODEL", "hashing")
+    if model_name != "hashing":
+        try:
+            return SentenceTransformerEmbedder(model_name)
+        except Exception as e:
+            print(f"Error loading embedding model {model_name}, using hashing embedder: {str(e)}")
+    return HashingEmbedder()
+
+
+class VectorIndex:
+    """Exact nearest-neighbour search over L2-normalised float32 vectors.
+
+    Vectors live in one contiguous array that grows by doubling, so a
+    search is a single matrix-vector product however many items there are.
+    """
+
+    def __init__(self, dimensions):
+        self.dimensions = dimensions
+        self._vectors = np.zeros((0, dimensions), dtype=np.float32)
+        self._ids = []
+        self._rows = {}
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, item_id):
+        return item_id in self._rows
+
+    def upsert(self, ids, vectors):
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(ids), self.dimensions)
+        for item_id, vector in zip(ids, vectors):
+            row = self._rows.get(item_id)
+            if row is None:
+                row = len(self._ids)
+                self._grow(row + 1)
+                self._ids.append(item_id)
+                self._rows[item_id] = row
+            self._vectors[row] = vector
+
+    def remove(self, item_id):
+        row = self._rows.pop(item_id, None)
+        if row is None:
+            return
+        # Move the last vector into the hole to keep the array dense
+        last = len(self._ids) - 1
+        if row != last:
+            moved = self._ids[last]
+            self._vectors[row] = self._vectors[last]
+            self._ids[row] = moved
+            self._rows[moved] = row
+        self._ids.pop()
+
+    def get(self, item_id):
+        row = self._rows.get(item_id)
+        return None if row is None else self._vectors[row].copy()
+
+    def search(self, vector, limit=10, exclude=()):
+        """Return (id, cosine similarity) pairs, most similar first."""
+        count = len(self._ids)
+        if count == 0:
+            return []
+        scores = self._vectors[:count] @ np.asarray(vector, dtype=np.float32)
+        for item_id in exclude:
+            if item_id in self._rows:
+                scores[self._rows[item_id]] = -np.inf
+        limit = min(limit, count)
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(self._ids[row], float(scores[row])) for row in top if np.isfinite(scores[row])]
+
+    def _grow(self, size):
+        if size > len(self._vectors):
+            grown = np.zeros((max(size, 2 * len(self._vectors), 64), self.dimensions), dtype=np.float32)
+            grown[:len(self._vectors)] = self._vectors
+            self._vectors = grown
+
+
+class EmbeddingWorker:
+    """Background task that embeds queued content and topics in batches.
+
+    Writes only enqueue (id, text) pairs; the worker collects up to
+    `batch_size` items, or whatever arrived within `max_delay` seconds,
+    embeds them in one call off the event loop, updates the in-memory
+    indexes and hands the vectors to `store` for persistence.
+    """
+
+    def __init__(self, embedder, indexes, store=None, batch_size=32, max_delay=0.05):
+        self.embedder = embedder
+        self.indexes = indexes
+        self.store = store
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self._queue = asyncio.Queue()
+        self._task = None
+
+    def submit(self, kind, item_id, text):
+        self._queue.put_nowait((kind, item_id, text))
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def drain(self):
+        """Wait until everything queued so far has been processed."""
+        await self._queue.join()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._process(batch)
+            except Exception as e:
+                print(f"Error embedding batch of {len(batch)}: {str(e)}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _process(self, batch):
+        vectors = await asyncio.to_thread(self.embedder.embed, [text for _, _, text in batch])
+        for kind in {kind for kind, _, _ in batch}:
+            rows = [row for row, item in enumerate(batch) if item[0] == kind]
+            ids = [batch[row][1] for row in rows]
+            self.indexes[kind].upsert(ids, vectors[rows])
+            if self.store is not None:
+                await self.store(kind, self.embedder.name, [
+                    {"id": item_id, "embedding": vectors[row].tolist()}
+                    for item_id, row in zip(ids, rows)
+                ])
+
+
+def content_text(content):
+    return f"{content['title']}\n{content['content']}"
+
+
+def topic_text(topic):
+    return f"{topic['subject']} {topic['name']}"
+
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.divide(vectors, norms, out=vectors, where=norms > 0)
+    return vectors
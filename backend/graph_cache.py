@@ -0,0 +1,215 @@
+import threading
+from contextlib import contextmanager
+
+
+class WriteGeneration:
+    """Tells an in-process cache whether a load raced with a write.
+
+    Writes made through the connection run inside `writing()`, and every
+    write hook bumps `generation`, whether or not the cache is warm. A
+    loader reads `generation` before it queries and hands it to `fill`,
+    which only installs the result if no write started or finished in the
+    meantime; otherwise the loaded data could be missing that write for
+    good, since the hook had nothing to patch.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.generation = 0
+        self._writes = 0
+
+    @contextmanager
+    def writing(self):
+        with self._lock:
+            self._writes += 1
+            self.generation += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._writes -= 1
+                self.generation += 1
+
+    def _can_fill(self, generation):
+        return generation is None or (generation == self.generation and not self._writes)
+
+
+class GraphCache(WriteGeneration):
+    """In-process copy of the topic graph returned by get_full_graph.
+
+    The first read warms the cache from Neo4j; afterwards writes made through
+    the connection patch only the entries they touch, so reads never go back
+    to the database. Writes that bypass the connection are not seen until
+    `invalidate` is called (see /cache/invalidate). Every change bumps
+    `version` so callers can tell when their snapshot is stale.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._graph = None
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def is_warm(self):
+        return self._graph is not None
+
+    def get(self, loader):
+        """Return a snapshot of the graph, calling `loader` on a cold cache."""
+        graph = self.peek()
+        if graph is None:
+            generation = self.generation
+            graph = self.fill(loader(), generation)
+        return graph
+
+    def peek(self):
+        """Return a snapshot if the cache is warm, otherwise None (counted as a miss).
+
+        Async callers use peek/fill instead of get so they can await the load.
+        """
+        with self._lock:
+            if self._graph is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return self._snapshot()
+
+    def fill(self, graph, generation=None):
+        """Warm the cache with a freshly loaded graph and return a snapshot.
+
+        `generation` is the value read before the load started. If a write
+        landed since, the graph is returned as loaded but not cached.
+        """
+        with self._lock:
+            if not self._can_fill(generation):
+                return graph
+            self._graph = graph
+            self.version += 1
+            return self._snapshot()
+
+    def get_topic(self, topic_id):
+        """Return a copy of a single cached topic, or None if it is not cached."""
+        with self._lock:
+            if self._graph is None or topic_id not in self._graph["topics"]:
+                return None
+            self.hits += 1
+            return _copy_topic(self._graph["topics"][topic_id])
+
+    def invalidate(self):
+        with self._lock:
+            self.generation += 1
+            self._graph = None
+            self.version += 1
+
+    def put_topic(self, topic_data):
+        """Insert or replace a topic after it has been written to the database."""
+        with self._lock:
+            self.generation += 1
+            if self._graph is None:
+                return
+            topic_id = topic_data["id"]
+            if topic_id in self._graph["topics"]:
+                self._remove_topic(topic_id, drop_relationships=False)
+            topic = _copy_topic(topic_data)
+            topic.setdefault("review_history", [])
+            self._graph["topics"][topic_id] = topic
+            subject = self._graph["subjects"].setdefault(
+                topic["subject"], {"name": topic["subject"], "topics": []}
+            )
+            subject["topics"].append(topic_id)
+            self.version += 1
+
+    def update_topic(self, topic_id, **fields):
+        """Patch properties of a cached topic in place."""
+        with self._lock:
+            self.generation += 1
+            if self._graph is None or topic_id not in self._graph["topics"]:
+                return
+            self._graph["topics"][topic_id].update(fields)
+            self.version += 1
+
+    def add_review(self, topic_id, review):
+        with self._lock:
+            self.generation += 1
+            if self._graph is None or topic_id not in self._graph["topics"]:
+                return
+            self._graph["topics"][topic_id]["review_history"].append(dict(review))
+            self.version += 1
+
+    def remove_topic(self, topic_id):
+        with self._lock:
+            self.generation += 1
+            if self._graph is None or topic_id not in self._graph["topics"]:
+                return
+            self._remove_topic(topic_id, drop_relationships=True)
+            self.version += 1
+
+    def add_relationship(self, from_id, to_id, relationship_type):
+        """Mirror a MERGE of a topic-to-topic relationship."""
+        with self._lock:
+            self.generation += 1
+            if self._graph is None:
+                return
+            topics = self._graph["topics"]
+            if from_id not in topics or to_id not in topics:
+                return
+            relationship = {"from": from_id, "to": to_id, "type": relationship_type}
+            if relationship not in self._graph["relationships"]:
+                self._graph["relationships"].append(relationship)
+                self.version += 1
+
+    def remove_relationship(self, from_id, to_id, relationship_type):
+        with self._lock:
+            self.generation += 1
+            if self._graph is None:
+                return
+            relationship = {"from": from_id, "to": to_id, "type": relationship_type}
+            if relationship in self._graph["relationships"]:
+                self._graph["relationships"].remove(relationship)
+                self.version += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "warm": self._graph is not None,
+                "version": self.version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "topics": len(self._graph["topics"]) if self._graph else 0,
+            }
+
+    def _remove_topic(self, topic_id, drop_relationships):
+        topic = self._graph["topics"].pop(topic_id)
+        subject = self._graph["subjects"].get(topic["subject"])
+        if subject is not None:
+            subject["topics"].remove(topic_id)
+            # get_full_graph only returns subjects that still have topics
+            if not subject["topics"]:
+                del self._graph["subjects"][topic["subject"]]
+        if drop_relationships:
+            self._graph["relationships"] = [
+                rel for rel in self._graph["relationships"]
+                if rel["from"] != topic_id and rel["to"] != topic_id
+            ]
+
+    def _snapshot(self):
+        # Copy the containers so request handlers can't mutate the cached graph
+        return {
+            "subjects": {
+                name: {"name": subject["name"], "topics": list(subject["topics"])}
+                for name, subject in self._graph["subjects"].items()
+            },
+            "topics": {
+                topic_id: _copy_topic(topic)
+                for topic_id, topic in self._graph["topics"].items()
+            },
+            "relationships": [dict(rel) for rel in self._graph["relationships"]],
+        }
+
+
+def _copy_topic(topic):
+    topic = dict(topic)
+    if "review_history" in topic:
+        topic["review_history"] = [dict(review) for review in topic["review_history"]]
+    return topic
@@ -0,0 +1,330 @@
+"""Memory-model scheduler in the FSRS / SSP-MMC family.
+
+Each topic has a memory state: stability S (days until recall probability
+falls to 90%) and difficulty D (1-10). Retrievability after t days is
+R = (1 + FACTOR * t / S) ** DECAY. Every review updates the state from R
+and the grade, and the next review is due when R is expected to reach the
+target retention. See docs/design/algorithms.md for the references.
+
+The app's three difficulties map onto grades with 'hard' treated as a
+lapse (forgotten), 'normal' as a plain recall and 'easy' as an easy one.
+Parameters are fitted offline over every Review node:
+
+    python memory_model.py --fit
+"""
+import argparse
+import json
+import os
+from datetime import datetime
+import numpy as np
+from spacing import STAGES, DIFFICULTIES, next_stage, next_stage_codes, to_codes
+
+DECAY = -0.5
+FACTOR = 0.9 ** (1 / DECAY) - 1
+
+GRADES = {'hard': 1, 'normal': 3, 'easy': 4}
+# Grade per difficulty code, in DIFFICULTIES order
+GRADE_CODES = np.array([GRADES[difficulty] for difficulty in DIFFICULTIES], dtype=np.int8)
+
+# FSRS-4.5 defaults. w[0:4] initial stability per grade; w[4:8] difficulty;
+# w[8:11] and w[15:17] stability after a recall; w[11:15] after a lapse
+DEFAULT_PARAMETERS = [
+    0.4872, 1.4003, 3.7145, 13.8206, 5.1618, 1.2298, 0.8975, 0.031, 1.6474,
+    0.1367, 1.0461, 2.1072, 0.0793, 0.3246, 1.587, 0.2272, 2.8755
+]
+LOWER = np.array([0.1, 0.1, 0.1, 0.1, 1, 0.1, 0.1, 0, 0, 0.1, 0.01, 0.5, 0.01, 0.01, 0.01, 0, 1])
+UPPER = np.array([100, 100, 100, 100, 10, 5, 5, 0.5, 3, 0.8, 2.5, 5, 0.2, 0.9, 3, 1, 6])
+
+MIN_STABILITY = 0.01
+DAY_MS = 86_400_000
+
+MEMORY_MODEL_PARAMS = os.getenv(
+    "MEMORY_MODEL_PARAMS", os.path.join(os.path.dirname(__file__), "memory_model.json")
+)
+
+
+class ReviewLogs:
+    """Review logs packed into (topic, review) matrices for vectorised replay.
+
+    Topics are sorted by history length, longest first, so the topics that
+    still have a review at position j are always the first `active[j]` rows.
+    """
+
+    def __init__(self, topic_ids, times, grades, lengths):
+        self.topic_ids = topic_ids
+        self.times = times  # days since the epoch, shape (topics, longest history)
+        self.grades = grades
+        self.lengths = lengths
+        self.elapsed = np.diff(times, axis=1, prepend=times[:, :1])
+        longest = times.shape[1]
+        self.active = np.count_nonzero(lengths[:, None] > np.arange(longest), axis=0)
+        self.last_review = times[np.arange(len(topic_ids)), lengths - 1] if len(topic_ids) else np.zeros(0)
+
+    def __len__(self):
+        return len(self.topic_ids)
+
+    @property
+    def review_count(self):
+        return int(self.lengths.sum())
+
+    @classmethod
+    def from_records(cls, records):
+        """Pack dicts with topic_id, date (datetime) and difficulty."""
+        topic_index_of = {}
+        topic_index = np.fromiter(
+            (topic_index_of.setdefault(record['topic_id'], len(topic_index_of)) for record in records),
+            dtype=np.int64, count=len(records)
+        )
+        times = np.array([record['date'] for record in records], dtype='datetime64[ms]').astype(np.int64) / DAY_MS
+        grades = np.fromiter(
+            (GRADES.get(record['difficulty'], GRADES['normal']) for record in records),
+            dtype=np.int8, count=len(records)
+        )
+        return cls.from_arrays(np.array(list(topic_index_of), dtype=object), topic_index, times, grades)
+
+    @classmethod
+    def from_arrays(cls, topic_ids, topic_index, times, grades):
+        """Pack flat arrays: topic_index points into topic_ids, times are in days."""
+        order = np.lexsort((times, topic_index))
+        topic_index, times, grades = topic_index[order], times[order], grades[order]
+        counts = np.bincount(topic_index, minlength=len(topic_ids))
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        positions = np.arange(len(topic_index)) - starts[topic_index]
+
+        rank = np.argsort(-counts, kind='stable')
+        row_of = np.empty(len(topic_ids), dtype=np.int64)
+        row_of[rank] = np.arange(len(topic_ids))
+        rows = row_of[topic_index]
+
+        longest = int(counts.max()) if len(counts) else 0
+        time_matrix = np.zeros((len(topic_ids), longest))
+        grade_matrix = np.full((len(topic_ids), longest), GRADES['normal'], dtype=np.int8)
+        time_matrix[rows, positions] = times
+        grade_matrix[rows, positions] = grades
+        return cls(topic_ids[rank], time_matrix, grade_matrix, counts[rank])
+
+
+class MemoryModel:
+    def __init__(self, parameters=None, retention=0.9):
+        self.parameters = np.array(parameters if parameters is not None else DEFAULT_PARAMETERS, dtype=np.float64)
+        self.retention = retention
+
+    def interval(self, stability):
+        """Days until recall probability drops to the target retention."""
+        return np.asarray(stability) / FACTOR * (self.retention ** (1 / DECAY) - 1)
+
+    def replay(self, logs):
+        """(stability, difficulty) of every topic after its last review."""
+        stability, difficulty, _ = _replay(self.parameters[None, :], logs)
+        return stability[0], difficulty[0]
+
+    def update(self, stability, difficulty, elapsed, grades):
+        """Memory state after one more review, for arrays of topics.
+
+        A NaN stability marks a topic's first review.
+        """
+        w = self.parameters[None, :]
+        grades = np.asarray(grades)
+        first_s, first_d = _initial_state(w, grades)
+        stability = np.asarray(stability, dtype=np.float64)[None, :]
+        difficulty = np.asarray(difficulty, dtype=np.float64)[None, :]
+        first = np.isnan(stability)
+        stability = np.where(first, first_s, stability)
+        difficulty = np.where(first, first_d, difficulty)
+        retrievability = _retrievability(np.asarray(elapsed, dtype=np.float64), stability)
+        next_s, next_d = _next_state(w, stability, difficulty, retrievability, grades)
+        return np.where(first, first_s, next_s)[0], np.where(first, first_d, next_d)[0]
+
+    def replan(self, logs):
+        """Next review time (days since the epoch) and interval for every topic."""
+        stability, _ = self.replay(logs)
+        intervals = self.interval(stability)
+        return logs.last_review + intervals, intervals
+
+    def loss(self, logs):
+        """Mean log loss of predicted recall over every review after the first."""
+        return float(_replay(self.parameters[None, :], logs, with_loss=True)[2][0])
+
+    def fit(self, logs, iterations=100, learning_rate=0.02, epsilon=1e-4):
+        """Fit the parameters to the review logs by minimising log loss.
+
+        Adam on forward-difference gradients in a [0, 1] rescaling of the
+        parameter bounds. All perturbed parameter vectors are replayed in
+        one batched pass, so an iteration costs a single walk over the logs.
+        Returns the loss at the start of each iteration.
+        """
+        span = UPPER - LOWER
+        position = np.clip((self.parameters - LOWER) / span, 0, 1)
+        count = len(position)
+        perturbations = np.vstack([np.zeros(count), np.eye(count) * epsilon])
+        first_moment = np.zeros(count)
+        second_moment = np.zeros(count)
+        beta1, beta2 = 0.9, 0.999
+        history = []
+        for step in range(1, iterations + 1):
+            candidates = LOWER + np.clip(position + perturbations, 0, 1) * span
+            losses = _replay(candidates, logs, with_loss=True)[2]
+            history.append(float(losses[0]))
+            gradient = (losses[1:] - losses[0]) / epsilon
+            first_moment = beta1 * first_moment + (1 - beta1) * gradient
+            second_moment = beta2 * second_moment + (1 - beta2) * gradient ** 2
+            corrected = first_moment / (1 - beta1 ** step)
+            scale = np.sqrt(second_moment / (1 - beta2 ** step)) + 1e-8
+            position = np.clip(position - learning_rate * corrected / scale, 0, 1)
+        self.parameters = LOWER + position * span
+        return history
+
+    def save(self, path=MEMORY_MODEL_PARAMS):
+        temporary = f"{path}.tmp"
+        with open(temporary, "w") as f:
+            json.dump({"parameters": self.parameters.tolist(), "retention": self.retention}, f)
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path=MEMORY_MODEL_PARAMS):
+        """Fitted model from `path`, or None if there is no usable file."""
+        try:
+            with open(path) as f:
+                saved = json.load(f)
+            return cls(saved["parameters"], saved.get("retention", 0.9))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Memory model parameters not loaded: {str(e)}")
+            return None
+
+
+class MemoryModelScheduler:
+    """Review scheduler backed by MemoryModel; see schedulers.py.
+
+    Uses the fitted parameters saved by `python memory_model.py --fit` when
+    there are any, and the FSRS defaults otherwise. Stages move the same
+    way as with the other schedulers.
+    """
+
+    name = 'memory_model'
+    needs_history = True
+
+    def __init__(self, model=None):
+        self.model = model or MemoryModel.load() or MemoryModel()
+
+    def schedule(self, topic, difficulty, now=None):
+        now = now or datetime.now()
+        if difficulty not in DIFFICULTIES:
+            difficulty = 'normal'
+        history = sorted(topic.get('review_history') or [], key=lambda review: review['date'])
+        records = [
+            {'topic_id': topic['id'], 'date': review['date'], 'difficulty': review['difficulty']}
+            for review in history
+        ]
+        records.append({'topic_id': topic['id'], 'date': now, 'difficulty': difficulty})
+        stability, _ = self.model.replay(ReviewLogs.from_records(records))
+        interval = max(1, round(float(self.model.interval(stability[0]))))
+        return interval, next_stage(topic['stage'], difficulty)
+
+    def schedule_batch(self, days_since_last, stages, difficulties, memory=None):
+        """Batch form of schedule.
+
+        `memory` is the (stability, difficulty) of each topic before this
+        review, e.g. from MemoryModel.replay; without it every review is
+        treated as the topic's first.
+        """
+        stage_codes = to_codes(stages, STAGES)
+        difficulty_codes = to_codes(difficulties, DIFFICULTIES)
+        days = np.asarray(days_since_last, dtype=np.float64)
+        if memory is None:
+            memory = (np.full(len(days), np.nan), np.full(len(days), np.nan))
+        stability, _ = self.model.update(memory[0], memory[1], days, GRADE_CODES[difficulty_codes])
+        intervals = np.maximum(1, np.rint(self.model.interval(stability))).astype(np.int64)
+        return intervals, next_stage_codes(stage_codes, difficulty_codes)
+
+
+def _initial_state(w, grades):
+    stability = w[:, grades - 1]
+    difficulty = np.clip(w[:, 4:5] - (grades - 3) * w[:, 5:6], 1, 10)
+    return stability, difficulty
+
+
+def _retrievability(elapsed, stability):
+    return (1 + FACTOR * elapsed / stability) ** DECAY
+
+
+def _next_state(w, stability, difficulty, retrievability, grades):
+    bonus = np.where(grades == 2, w[:, 15:16], 1.0) * np.where(grades == 4, w[:, 16:17], 1.0)
+    recalled = stability * (
+        1 + np.exp(w[:, 8:9]) * (11 - difficulty) * stability ** -w[:, 9:10]
+        * np.expm1(w[:, 10:11] * (1 - retrievability)) * bonus
+    )
+    forgotten = np.minimum(
+        stability,
+        w[:, 11:12] * difficulty ** -w[:, 12:13] * ((stability + 1) ** w[:, 13:14] - 1)
+        * np.exp(w[:, 14:15] * (1 - retrievability))
+    )
+    stability = np.maximum(np.where(grades > 1, recalled, forgotten), MIN_STABILITY)
+    # Difficulty moves with the grade and reverts towards the initial 'good' difficulty
+    difficulty = w[:, 7:8] * w[:, 4:5] + (1 - w[:, 7:8]) * (difficulty - w[:, 6:7] * (grades - 3))
+    return stability, np.clip(difficulty, 1, 10)
+
+
+def _replay(w, logs, with_loss=False):
+    """Replay every topic's reviews under each parameter row of `w`.
+
+    Walks review positions in order; within a position every topic and
+    every parameter row is updated at once. Returns (stability, difficulty,
+    loss) with shapes (rows, topics), (rows, topics) and (rows,).
+    """
+    rows = len(w)
+    loss = np.zeros(rows)
+    if len(logs) == 0:
+        return np.zeros((rows, 0)), np.zeros((rows, 0)), loss
+    stability, difficulty = _initial_state(w, logs.grades[:, 0])
+    stability = np.array(np.broadcast_to(stability, (rows, len(logs))))
+    difficulty = np.array(np.broadcast_to(difficulty, (rows, len(logs))))
+    for position in range(1, logs.grades.shape[1]):
+        count = logs.active[position]
+        if count == 0:
+            break
+        grades = logs.grades[:count, position]
+        current_s, current_d = stability[:, :count], difficulty[:, :count]
+        retrievability = _retrievability(logs.elapsed[:count, position], current_s)
+        if with_loss:
+            predicted = np.clip(retrievability, 1e-6, 1 - 1e-6)
+            loss -= np.where(grades > 1, np.log(predicted), np.log1p(-predicted)).sum(axis=1)
+        stability[:, :count], difficulty[:, :count] = _next_state(w, current_s, current_d, retrievability, grades)
+    observations = logs.review_count - len(logs)
+    return stability, difficulty, loss / max(observations, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fit', action='store_true', help='Fit parameters to every Review node and save them')
+    parser.add_argument('--iterations', type=int, default=100)
+    parser.add_argument('--output', default=MEMORY_MODEL_PARAMS, help='Where to save fitted parameters')
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+    from database import Neo4jConnection
+    load_dotenv()
+    connection = Neo4jConnection()
+    try:
+        logs = ReviewLogs.from_records(connection.get_review_logs())
+    finally:
+        connection.close()
+    print(f"Loaded {logs.review_count} reviews of {len(logs)} topics")
+
+    model = MemoryModel.load(args.output) or MemoryModel()
+    print(f"Log loss: {model.loss(logs):.4f}")
+    if args.fit:
+        history = model.fit(logs, iterations=args.iterations)
+        print(f"Log loss after {len(history)} iterations: {model.loss(logs):.4f}")
+        model.save(args.output)
+        print(f"Saved parameters to {args.output}")
+
+    next_review, _ = model.replan(logs)
+    now = np.datetime64(datetime.now(), 'ms').astype(np.int64) / DAY_MS
+    due = np.count_nonzero(next_review <= now)
+    print(f"{due} topics due now under this model")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+import threading
+from collections import deque
+
+
+class PrerequisiteIndex:
+    """In-process transitive closure of the PREREQUISITE_OF edges.
+
+    For every topic it keeps the set of all topics it transitively depends
+    on and the set of all topics it transitively unlocks. Adding an edge
+    only extends the closure of the topics on either side of it; removing
+    one re-walks only the topics that could reach it. Queries then read
+    a precomputed set and sort it, so they cost O(result) rather than a
+    variable-length traversal in Neo4j.
+
+    Edges written straight to the database can still form cycles (Obsidian
+    vault links, for one). Those topics end up in their own closure; they
+    are reported by `cycles` and ordered by id among themselves.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._prerequisites = {}  # topic -> direct prerequisites
+        self._dependents = {}     # topic -> topics it is a direct prerequisite of
+        self._ancestors = {}      # topic -> every transitive prerequisite
+        self._descendants = {}    # topic -> every topic it transitively unlocks
+        self._rank = {}           # topic -> prerequisites other than itself
+        self.ready = False
+
+    def __len__(self):
+        return sum(len(prerequisites) for prerequisites in self._prerequisites.values())
+
+    def build(self, edges):
+        """Index (prerequisite_id, topic_id) pairs, replacing any indexed before, and mark the index ready."""
+        with self._lock:
+            for index in (self._prerequisites, self._dependents, self._ancestors, self._descendants, self._rank):
+                index.clear()
+            for prerequisite_id, topic_id in edges:
+                self.add_edge(prerequisite_id, topic_id)
+            self.ready = True
+
+    def creates_cycle(self, prerequisite_id, topic_id):
+        """Whether adding prerequisite_id -> topic_id would close a cycle."""
+        with self._lock:
+            return prerequisite_id == topic_id or prerequisite_id in self._descendants.get(topic_id, ())
+
+    def add_edge(self, prerequisite_id, topic_id):
+        with self._lock:
+            if topic_id in self._dependents.get(prerequisite_id, ()):
+                return
+            self._dependents.setdefault(prerequisite_id, set()).add(topic_id)
+            self._prerequisites.setdefault(topic_id, set()).add(prerequisite_id)
+
+            # Everything that reaches the prerequisite now reaches everything
+            # the topic reaches
+            sources = self._ancestors.get(prerequisite_id, set()) | {prerequisite_id}
+            targets = self._descendants.get(topic_id, set()) | {topic_id}
+            for source in sources:
+                descendants = self._descendants.setdefault(source, set())
+                added = targets - descendants
+                if added:
+                    descendants |= added
+                    for target in added:
+                        self._ancestors.setdefault(target, set()).add(source)
+                        if target != source:
+                            self._rank[target] = self._rank.get(target, 0) + 1
+
+    def remove_edge(self, prerequisite_id, topic_id):
+        with self._lock:
+            if topic_id not in self._dependents.get(prerequisite_id, ()):
+                return
+            _discard(self._dependents, prerequisite_id, topic_id)
+            _discard(self._prerequisites, topic_id, prerequisite_id)
+
+            # Only topics that reached the prerequisite can lose descendants.
+            # Without a cycle among them, visiting them dependents-first lets
+            # each one rebuild its descendants from its direct dependents'
+            # already-correct sets; a cycle needs a fresh walk instead.
+            affected = self._ancestors.get(prerequisite_id, set()) | {prerequisite_id}
+            acyclic = not any(source in self._ancestors.get(source, ()) for source in affected)
+            for source in sorted(affected, key=self._rank_of, reverse=True):
+                reachable = self._reachable_from_dependents(source) if acyclic else self._reachable(source)
+                lost = self._descendants.get(source, set()) - reachable
+                if not lost:
+                    continue
+                if reachable:
+                    self._descendants[source] = reachable
+                else:
+                    self._descendants.pop(source, None)
+                for target in lost:
+                    _discard(self._ancestors, target, source)
+                    if target != source:
+                        _decrement(self._rank, target)
+
+    def remove_topic(self, topic_id):
+        """Drop a deleted topic and every edge touching it."""
+        with self._lock:
+            for prerequisite_id in list(self._prerequisites.get(topic_id, ())):
+                self.remove_edge(prerequisite_id, topic_id)
+            for dependent_id in list(self._dependents.get(topic_id, ())):
+                self.remove_edge(topic_id, dependent_id)
+
+    def prerequisites(self, topic_id, transitive=True):
+        """Prerequisites of a topic, each listed after its own prerequisites."""
+        with self._lock:
+            source = self._ancestors if transitive else self._prerequisites
+            return self.order(source.get(topic_id, set()) - {topic_id})
+
+    def unlocks(self, topic_id, transitive=True):
+        """Topics that depend on this one, in the order they can be learned."""
+        with self._lock:
+            source = self._descendants if transitive else self._dependents
+            return self.order(source.get(topic_id, set()) - {topic_id})
+
+    def learning_order(self, topic_id):
+        """Every prerequisite of a topic and then the topic itself, in order.
+
+        Returns (order, cycle): `cycle` lists the topics in the order that
+        sit on a prerequisite cycle, and is empty when the order is strict.
+        """
+        with self._lock:
+            topics = self._ancestors.get(topic_id, set()) | {topic_id}
+            order = self.order(topics)
+            return order, [topic for topic in order if topic in self._ancestors.get(topic, ())]
+
+    def cycles(self):
+        """Topics that are, transitively, their own prerequisite."""
+        with self._lock:
+            return sorted(topic for topic, ancestors in self._ancestors.items() if topic in ancestors)
+
+    def order(self, topics):
+        """Sort topics so that every topic comes after its prerequisites."""
+        # A topic has strictly more prerequisites than any of its own
+        # prerequisites, so sorting by that count is a topological order.
+        # Topics on a cycle don't count themselves, which keeps them ahead
+        # of everything downstream of the cycle; ties go by id.
+        with self._lock:
+            return sorted(sorted(topics), key=self._rank_of)
+
+    def _rank_of(self, topic_id):
+        return self._rank.get(topic_id, 0)
+
+    def _reachable_from_dependents(self, source):
+        reachable = set()
+        for dependent_id in self._dependents.get(source, ()):
+            reachable.add(dependent_id)
+            reachable |= self._descendants.get(dependent_id, set())
+        return reachable
+
+    def _reachable(self, source):
+        reachable = set()
+        queue = deque(self._dependents.get(source, ()))
+        while queue:
+            topic_id = queue.popleft()
+            if topic_id not in reachable:
+                reachable.add(topic_id)
+                queue.extend(self._dependents.get(topic_id, ()))
+        return reachable
+
+
+def _decrement(counts, key):
+    if counts[key] == 1:
+        del counts[key]
+    else:
+        counts[key] -= 1
+
+
+def _discard(index, key, value):
+    values = index.get(key)
+    if values is not None:
+        values.discard(value)
+        if not values:
+            del index[key]
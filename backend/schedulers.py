@@ -0,0 +1,112 @@
+import os
+from datetime import datetime
+import numpy as np
+from spacing import FuzzyIntervals, STAGES, DIFFICULTIES, next_stage, next_stage_codes, to_codes
+from memory_model import MemoryModelScheduler
+
+# A scheduler turns a review into (interval in whole days, new stage).
+# `schedule` handles one topic as returned by get_topic; `schedule_batch`
+# re-plans many at once from arrays of days since the last review, stage
+# codes and difficulty codes (indexes into STAGES and DIFFICULTIES).
+# Unknown difficulties count as 'normal' in `schedule`, as the review
+# endpoint always has.
+
+
+class StageTableScheduler:
+    """Fixed interval per stage, scaled by the review difficulty."""
+
+    name = 'stage_table'
+    # The stage is all it needs, so get_topic can skip the review history
+    needs_history = False
+
+    STAGE_INTERVALS = {
+        'first_time': 1,
+        'early_stage': 3,
+        'mid_stage': 7,
+        'late_stage': 14,
+        'mastered': 30
+    }
+
+    def __init__(self):
+        base = [self.STAGE_INTERVALS[stage] for stage in STAGES]
+        # One row per difficulty, one column per stage
+        self._intervals = np.empty((len(DIFFICULTIES), len(STAGES)), dtype=np.int64)
+        self._intervals[DIFFICULTIES.index('easy')] = [round(days * 1.4) for days in base]
+        self._intervals[DIFFICULTIES.index('normal')] = base
+        self._intervals[DIFFICULTIES.index('hard')] = [max(1, round(days * 0.6)) for days in base]
+
+    def schedule(self, topic, difficulty, now=None):
+        stage = topic['stage']
+        row = DIFFICULTIES.index(difficulty if difficulty in DIFFICULTIES else 'normal')
+        return int(self._intervals[row, STAGES.index(stage)]), next_stage(stage, difficulty)
+
+    def schedule_batch(self, days_since_last, stages, difficulties):
+        stage_codes = to_codes(stages, STAGES)
+        difficulty_codes = to_codes(difficulties, DIFFICULTIES)
+        return self._intervals[difficulty_codes, stage_codes], next_stage_codes(stage_codes, difficulty_codes)
+
+
+class FuzzyScheduler:
+    """DaySpacing fuzzy engine, as FuzzyIntervals sets it up in spacing.py.
+
+    The interval follows from the days since the topic's last review. Day
+    counts the fuzzy sets don't cover (a second review on the same day, or a
+    gap past the last set) are clamped to the nearest covered day, and
+    intervals are rounded to whole days of at least one.
+    """
+
+    name = 'fuzzy'
+    needs_history = True
+
+    def __init__(self, system=None):
+        self.system = system or FuzzyIntervals()
+
+    def schedule(self, topic, difficulty, now=None):
+        now = now or datetime.now()
+        days = days_since_last_review(topic, now)
+        if difficulty not in DIFFICULTIES:
+            difficulty = 'normal'
+        interval, new_stage = self.system.next_interval(self._clamp(days), topic['stage'], difficulty)
+        return max(1, round(interval)), new_stage
+
+    def schedule_batch(self, days_since_last, stages, difficulties):
+        days = np.asarray(days_since_last)
+        first, last = self._covered_days()
+        intervals, new_stages = self.system.adjust_intervals_batch(np.clip(days, first, last), stages, difficulties)
+        return np.maximum(1, np.rint(intervals)).astype(np.int64), new_stages
+
+    def _clamp(self, days):
+        first, last = self._covered_days()
+        return min(max(days, first), last)
+
+    def _covered_days(self):
+        # First and last whole day with an interval; follows any change to
+        # the fuzzy system through the compiled table
+        first_day, table = self.system.interval_table()
+        covered = np.flatnonzero(~np.isnan(table[DIFFICULTIES.index('normal')]))
+        return first_day + int(covered[0]), first_day + int(covered[-1])
+
+
+SCHEDULERS = {
+    StageTableScheduler.name: StageTableScheduler,
+    FuzzyScheduler.name: FuzzyScheduler,
+    MemoryModelScheduler.name: MemoryModelScheduler,
+}
+
+
+def create_scheduler():
+    """Scheduler named by REVIEW_SCHEDULER, defaulting to the stage table."""
+    name = os.getenv("REVIEW_SCHEDULER", StageTableScheduler.name)
+    if name not in SCHEDULERS:
+        print(f"Unknown review scheduler {name}, using {StageTableScheduler.name}")
+        name = StageTableScheduler.name
+    return SCHEDULERS[name]()
+
+
+def days_since_last_review(topic, now):
+    """Whole days since the topic's latest review, or 1 if it has none."""
+    history = topic.get('review_history') or []
+    if not history:
+        return 1
+    return (now - max(review['date'] for review in history)).days
+
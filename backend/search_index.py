@@ -0,0 +1,221 @@
+import heapq
+import json
+import math
+import os
+import re
+import threading
+from bisect import bisect_left
+from collections import Counter
+from datetime import datetime
+
+TOKEN = re.compile(r"\w+")
+
+# A title hit counts as this many body hits
+TITLE_WEIGHT = 3
+
+SNAPSHOT_FORMAT = 2
+
+
+def tokenize(text):
+    return TOKEN.findall(text.lower())
+
+
+class SearchIndex:
+    """In-process BM25 inverted index over content titles and bodies.
+
+    Built once from the database (or a snapshot of a previous build) and
+    kept current by the endpoints that write content, so searches never
+    leave the process. The last query term also matches as a prefix so
+    typeahead finds partially typed words.
+    """
+
+    def __init__(self, k1=1.2, b=0.75, max_prefix_terms=50):
+        self._lock = threading.RLock()
+        self.k1 = k1
+        self.b = b
+        self.max_prefix_terms = max_prefix_terms
+        self._docs = {}
+        self._lengths = {}
+        self._postings = {}
+        self._total_length = 0
+        # Sorted vocabulary for prefix lookups, rebuilt lazily after a new
+        # term is indexed
+        self._terms = None
+        self.ready = False
+
+    def __len__(self):
+        return len(self._docs)
+
+    def build(self, content_list):
+        """Index a full content listing and mark the index ready."""
+        with self._lock:
+            for content in content_list:
+                self.add(content)
+            self.ready = True
+
+    def add(self, content):
+        """Index or re-index one content item, shaped like get_all_content's items."""
+        content = _jsonable(content)
+        content_id = content["id"]
+        counts = Counter()
+        for term in tokenize(content.get("title", "")):
+            counts[term] += TITLE_WEIGHT
+        counts.update(tokenize(content.get("content", "")))
+
+        with self._lock:
+            if content_id in self._docs:
+                self._remove(content_id)
+            for term, frequency in counts.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = {}
+                    self._terms = None
+                postings[content_id] = frequency
+            length = sum(counts.values())
+            self._lengths[content_id] = length
+            self._total_length += length
+            self._docs[content_id] = content
+
+    def get(self, content_id):
+        """The indexed copy of one content item, or None."""
+        with self._lock:
+            content = self._docs.get(content_id)
+            return dict(content) if content is not None else None
+
+    def remove(self, content_id):
+        with self._lock:
+            if content_id in self._docs:
+                self._remove(content_id)
+
+    def reconcile(self, stamps):
+        """Bring a restored snapshot in line with the database.
+
+        `stamps` maps every content id in the database to its
+        coalesce(updated_at, created_at). Content that is gone is removed;
+        the ids of content that is new or changed since it was indexed are
+        returned for the caller to fetch and add.
+        """
+        with self._lock:
+            for content_id in [content_id for content_id in self._docs if content_id not in stamps]:
+                self._remove(content_id)
+            return [
+                content_id for content_id, stamp in stamps.items()
+                if content_id not in self._docs or _stamp(self._docs[content_id]) != stamp
+            ]
+
+    def search(self, query, limit=20, offset=0):
+        """Return content ranked by BM25 score, each with its `score`."""
+        terms = tokenize(query)
+        with self._lock:
+            if not terms or not self._docs:
+                return []
+            scores = {}
+            for term in terms[:-1]:
+                for content_id, score in self._term_scores(term):
+                    scores[content_id] = scores.get(content_id, 0.0) + score
+            # The last term counts once per document, through whichever of
+            # its completions scores best there
+            best = {}
+            for term in self._completions(terms[-1]):
+                for content_id, score in self._term_scores(term):
+                    if score > best.get(content_id, 0.0):
+                        best[content_id] = score
+            for content_id, score in best.items():
+                scores[content_id] = scores.get(content_id, 0.0) + score
+
+            ranked = heapq.nsmallest(offset + limit, scores.items(), key=lambda item: (-item[1], item[0]))
+            return [dict(self._docs[content_id], score=score) for content_id, score in ranked[offset:]]
+
+    def save(self, path):
+        """Write a snapshot that load() can restore without re-tokenizing."""
+        with self._lock:
+            snapshot = {
+                "format": SNAPSHOT_FORMAT,
+                "docs": self._docs,
+                "lengths": self._lengths,
+                "postings": self._postings,
+            }
+            temporary = f"{path}.tmp"
+            with open(temporary, "w") as f:
+                json.dump(snapshot, f)
+        # Replace in one step so a crash mid-write never leaves a torn snapshot
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        """Restore a snapshot, or return None if there is no usable one."""
+        try:
+            with open(path) as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Search index snapshot not loaded: {str(e)}")
+            return None
+        if snapshot.get("format") != SNAPSHOT_FORMAT:
+            return None
+
+        index = cls(**kwargs)
+        index._docs = snapshot["docs"]
+        index._lengths = snapshot["lengths"]
+        index._postings = snapshot["postings"]
+        index._total_length = sum(index._lengths.values())
+        index.ready = True
+        return index
+
+    def _term_scores(self, term):
+        """BM25 contribution of one term as (content_id, score) pairs."""
+        postings = self._postings.get(term)
+        if not postings:
+            return []
+        idf = math.log(1 + (len(self._docs) - len(postings) + 0.5) / (len(postings) + 0.5))
+        weight = idf * (self.k1 + 1)
+        # The length norm k1 * (1 - b + b * length / average) is linear in
+        # the length, so it comes straight from _lengths with the current
+        # average and nothing needs recomputing when a document changes
+        base = self.k1 * (1 - self.b)
+        per_unit = self.k1 * self.b * len(self._docs) / self._total_length if self._total_length else 0.0
+        lengths = self._lengths
+        return [
+            (content_id, weight * frequency / (frequency + base + per_unit * lengths[content_id]))
+            for content_id, frequency in postings.items()
+        ]
+
+    def _completions(self, prefix):
+        """Indexed terms starting with `prefix`, at most max_prefix_terms of them.
+
+        When there are more, the ones in the most documents are kept rather
+        than the first in alphabetical order, so a short prefix still reaches
+        the common words it is likely the start of.
+        """
+        if self._terms is None:
+            self._terms = sorted(self._postings)
+        start = bisect_left(self._terms, prefix)
+        end = start
+        while end < len(self._terms) and self._terms[end].startswith(prefix):
+            end += 1
+        completions = self._terms[start:end]
+        if len(completions) <= self.max_prefix_terms:
+            return completions
+        postings = self._postings
+        return heapq.nsmallest(self.max_prefix_terms, completions, key=lambda term: (-len(postings[term]), term))
+
+    def _remove(self, content_id):
+        content = self._docs.pop(content_id)
+        self._total_length -= self._lengths.pop(content_id)
+        for term in set(tokenize(content.get("title", "")) + tokenize(content.get("content", ""))):
+            postings = self._postings[term]
+            del postings[content_id]
+            if not postings:
+                del self._postings[term]
+                self._terms = None
+
+
+def _stamp(content):
+    return content.get("updated_at") or content.get("created_at")
+
+
+def _jsonable(content):
+    # Snapshots are JSON, and the database hands back created_at as a string
+    return {
+        key: value.isoformat() if isinstance(value, datetime) else value
+        for key, value in content.items()
+    }
@@ -0,0 +1,147 @@
+from datetime import timedelta
+import numpy as np
+
+# Minutes a review takes at each stage: new material needs the longest
+STAGE_MINUTES = {
+    'first_time': 20,
+    'early_stage': 15,
+    'mid_stage': 10,
+    'late_stage': 8,
+    'mastered': 5
+}
+
+# Focus block and break lengths in minutes for each energy level, and the
+# stages it favours. As in the app's session planner, late-stage and
+# mastered topics suit high energy and the earlier stages suit low energy.
+ENERGY_LEVELS = {
+    'low': {'block': 20, 'break': 10, 'favours': ('first_time', 'early_stage', 'mid_stage')},
+    'any': {'block': 25, 'break': 5, 'favours': ()},
+    'high': {'block': 50, 'break': 10, 'favours': ('late_stage', 'mastered')},
+}
+FAVOURED_WEIGHT = 2.0
+
+
+def plan_session(topics, start, end, energy='any', prerequisites=None,
+                 block_minutes=None, break_minutes=None):
+    """Pack due topics into focus blocks between `start` and `end`.
+
+    `topics` are due topics as get_due_reviews returns them. A topic is
+    worth one plus the days it is overdue, doubled when its stage suits
+    the energy level. Blocks are filled one after another, each with the
+    most valuable set of topics that fits (a 0/1 knapsack), and a topic
+    only goes in once the due topics it depends on, per the
+    `prerequisites` PrerequisiteIndex, are in the same or an earlier block;
+    a pack that breaks that is repaired and topped up greedily.
+    """
+    level = ENERGY_LEVELS[energy]
+    block_minutes = block_minutes or level['block']
+    break_minutes = level['break'] if break_minutes is None else break_minutes
+
+    due = {topic['id']: topic for topic in topics}
+    minutes = {topic_id: STAGE_MINUTES.get(topic['stage'], STAGE_MINUTES['first_time']) for topic_id, topic in due.items()}
+    values = {
+        topic_id: (1 + max(0.0, (start - topic['next_review']) / timedelta(days=1)))
+        * (FAVOURED_WEIGHT if topic['stage'] in level['favours'] else 1.0)
+        for topic_id, topic in due.items()
+    }
+
+    # Prerequisites that are due as well, in learning order. Topics on a
+    # cycle only wait on the ones ordered before them.
+    order = prerequisites.order(due) if prerequisites is not None else sorted(due)
+    position = {topic_id: i for i, topic_id in enumerate(order)}
+    waits_on = {
+        topic_id: [
+            prerequisite_id for prerequisite_id in prerequisites.prerequisites(topic_id)
+            if position.get(prerequisite_id, len(order)) < position[topic_id]
+        ] if prerequisites is not None else []
+        for topic_id in order
+    }
+
+    blocks, remaining, placed = [], order, set()
+    cursor = start
+    shortest = min(minutes.values(), default=0)
+    while remaining and cursor + timedelta(minutes=shortest) <= end:
+        capacity = min(block_minutes, int((end - cursor) / timedelta(minutes=1)))
+        chosen = _fill_block(remaining, waits_on, placed, minutes, values, capacity)
+        if not chosen:
+            break
+        block = {'start_time': cursor, 'topics': []}
+        for topic_id in chosen:
+            topic = due[topic_id]
+            block['topics'].append({
+                'id': topic_id,
+                'name': topic['name'],
+                'subject': topic['subject'],
+                'stage': topic['stage'],
+                'minutes': minutes[topic_id]
+            })
+            cursor += timedelta(minutes=minutes[topic_id])
+        block['end_time'] = cursor
+        blocks.append(block)
+        placed.update(chosen)
+        remaining = [topic_id for topic_id in remaining if topic_id not in placed]
+        cursor += timedelta(minutes=break_minutes)
+
+    planned = [topic for block in blocks for topic in block['topics']]
+    return {
+        'start_time': start,
+        'end_time': end,
+        'energy': energy,
+        'blocks': blocks,
+        # The shape POST /study-sessions/ takes
+        'topics': [topic['id'] for topic in planned],
+        'durations': [topic['minutes'] for topic in planned],
+        'planned_minutes': sum(topic['minutes'] for topic in planned),
+        'unplanned': len(remaining)
+    }
+
+
+def _fill_block(remaining, waits_on, placed, minutes, values, capacity):
+    """The topics for one block, in learning order."""
+    chosen = set(_pack(remaining, minutes, values, capacity))
+    # The pack may take a topic without its prerequisite; leave such topics
+    # out and top the block up with whatever still fits, best value per
+    # minute first
+    for topic_id in remaining:
+        if topic_id in chosen and not all(p in placed or p in chosen for p in waits_on[topic_id]):
+            chosen.discard(topic_id)
+    free = capacity - sum(minutes[topic_id] for topic_id in chosen)
+    for topic_id in sorted(remaining, key=lambda topic_id: values[topic_id] / minutes[topic_id], reverse=True):
+        if (topic_id not in chosen and minutes[topic_id] <= free
+                and all(p in placed or p in chosen for p in waits_on[topic_id])):
+            chosen.add(topic_id)
+            free -= minutes[topic_id]
+    return [topic_id for topic_id in remaining if topic_id in chosen]
+
+
+def _pack(items, minutes, values, capacity):
+    """The most valuable subset of items whose minutes fit in `capacity`.
+
+    Exact 0/1 knapsack over whole minutes. Review lengths come from a few
+    stage values, and at most capacity // m topics of length m fit, so only
+    the most valuable capacity // m of each length are worth considering.
+    """
+    by_length = {}
+    for item in items:
+        by_length.setdefault(minutes[item], []).append(item)
+    shortlist = []
+    for length, group in by_length.items():
+        if 0 < length <= capacity:
+            group.sort(key=values.__getitem__, reverse=True)
+            shortlist.extend(group[:capacity // length])
+
+    best = np.zeros(capacity + 1)
+    taken = np.zeros((len(shortlist), capacity + 1), dtype=bool)
+    for i, item in enumerate(shortlist):
+        length = minutes[item]
+        with_item = best[:-length] + values[item]
+        better = with_item > best[length:]
+        taken[i, length:] = better
+        best[length:] = np.where(better, with_item, best[length:])
+
+    chosen, left = [], capacity
+    for i in reversed(range(len(shortlist))):
+        if taken[i, left]:
+            chosen.append(shortlist[i])
+            left -= minutes[shortlist[i]]
+    return chosen
@@ -0,0 +1,304 @@
+import numpy as np
+
+# The review model shared by the API server, the schedulers and the
+# interactive day_spacing_alogirthm script. Nothing here imports a plotting
+# library, so the server can use it without paying for matplotlib.
+
+STAGES = ['first_time', 'early_stage', 'mid_stage', 'late_stage', 'mastered']
+DIFFICULTIES = ['easy', 'normal', 'hard']
+STATUSES = ['active', 'disabled', 'completed']
+
+class DayFuzzySet:
+    def __init__(self, name):
+        self.name = name
+
+    def trapezoidal_mf(self, x, a, b, c, d):
+        """Trapezoidal membership function"""
+        if x <= a or x >= d:
+            return 0
+        elif b <= x <= c:
+            return 1
+        elif a < x < b:
+            return (x - a) / (b - a)
+        else:
+            return (d - x) / (d - c)
+
+class DaySpacing:
+    def __init__(self):
+        self.sets = {}
+        self.rules = []
+        # Bumped by every change so compiled tables know when they are stale
+        self.version = 0
+        self._table = None
+        
+    def add_fuzzy_set(self, name, points):
+        """Add a new fuzzy set with trapezoidal membership function"""
+        fuzzy_set = DayFuzzySet(name)
+        fuzzy_set.points = points
+        self.sets[name] = fuzzy_set
+        self.version += 1
+    
+    def calculate_membership(self, days):
+        """Calculate membership degrees for given number of days"""
+        memberships = {}
+        for set_name, fuzzy_set in self.sets.items():
+            a, b, c, d = fuzzy_set.points
+            membership = fuzzy_set.trapezoidal_mf(days, a, b, c, d)
+            memberships[set_name] = membership
+        return memberships
+    
+    def add_rule(self, condition, consequence):
+        """Add a fuzzy rule"""
+        self.rules.append((condition, consequence))
+        self.version += 1
+    
+    def evaluate_rules(self, memberships):
+        """Evaluate all rules for given memberships"""
+        rule_strengths = {}
+        for condition, consequence in self.rules:
+            strength = memberships.get(condition, 0)
+            rule_strengths[consequence] = max(
+                rule_strengths.get(consequence, 0),
+                strength
+            )
+        return rule_strengths
+    
+    def defuzzify_centroid(self, rule_strengths, output_ranges):
+        """Defuzzify using centroid method"""
+        if not rule_strengths:
+            return None
+            
+        numerator = 0
+        denominator = 0
+        
+        for output_name, strength in rule_strengths.items():
+            if strength > 0:
+                center = sum(output_ranges[output_name]) / len(output_ranges[output_name])
+                numerator += center * strength
+                denominator += strength
+                
+        if denominator == 0:
+            return None
+            
+        return numerator / denominator
+
+    def calculate_membership_batch(self, days):
+        """Membership of every set for an array of day counts.
+
+        Returns an array of shape (len(self.sets), len(days)) with rows in
+        self.sets order, matching calculate_membership element-wise.
+        """
+        x = np.asarray(days, dtype=np.float64)[None, :]
+        points = np.array([fuzzy_set.points for fuzzy_set in self.sets.values()], dtype=np.float64)
+        a, b, c, d = (points[:, i:i + 1] for i in range(4))
+        # Each slope is only selected where it is defined, so a vertical edge
+        # can take any non-zero width without changing the result
+        rising = (x - a) / np.where(b > a, b - a, 1)
+        falling = (d - x) / np.where(d > c, d - c, 1)
+        membership = np.where(x < b, rising, falling)
+        membership = np.where((b <= x) & (x <= c), 1.0, membership)
+        return np.where((x <= a) | (x >= d), 0.0, membership)
+
+    def evaluate_rules_batch(self, memberships):
+        """Max-aggregate rule strengths for a membership matrix.
+
+        Returns (outputs, strengths): the consequence names in rule order
+        and an array of shape (len(outputs), N).
+        """
+        set_rows = {name: row for row, name in enumerate(self.sets)}
+        outputs = list(dict.fromkeys(consequence for _, consequence in self.rules))
+        strengths = np.zeros((len(outputs), memberships.shape[1]))
+        for condition, consequence in self.rules:
+            if condition in set_rows:
+                row = strengths[outputs.index(consequence)]
+                np.maximum(row, memberships[set_rows[condition]], out=row)
+        return outputs, strengths
+
+    def defuzzify_centroid_batch(self, outputs, strengths, output_ranges):
+        """Centroid of each column of rule strengths; NaN where no rule fired."""
+        centers = np.array([np.mean(output_ranges[name]) for name in outputs])
+        denominator = strengths.sum(axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(denominator > 0, centers @ strengths / denominator, np.nan)
+
+    def compile(self, output_ranges):
+        """Base interval for every whole day the fuzzy sets cover.
+
+        Returns (first_day, intervals) where intervals[i] is the centroid for
+        first_day + i, NaN where defuzzify_centroid gives None. Outside that
+        range no set has any membership, so the centroid is None there too.
+        The table is cached until add_fuzzy_set or add_rule changes the system.
+        """
+        ranges = {name: list(bounds) for name, bounds in output_ranges.items()}
+        if self._table is None or self._table[:2] != (self.version, ranges):
+            if self.sets:
+                points = np.array([fuzzy_set.points for fuzzy_set in self.sets.values()], dtype=np.float64)
+                first_day, last_day = int(np.floor(points[:, 0].min())), int(np.ceil(points[:, 3].max()))
+                memberships = self.calculate_membership_batch(np.arange(first_day, last_day + 1))
+                outputs, strengths = self.evaluate_rules_batch(memberships)
+                intervals = self.defuzzify_centroid_batch(outputs, strengths, ranges)
+            else:
+                first_day, intervals = 0, np.empty(0)
+            self._table = (self.version, ranges, first_day, intervals)
+        return self._table[2], self._table[3]
+
+class FuzzyIntervals:
+    """The DaySpacing fuzzy system set up with the learning stages, and its
+    compiled interval table. EnhancedSpacedLearningSystem builds on it; the
+    fuzzy review scheduler uses it on its own."""
+
+    def __init__(self):
+        self.spacing_system = DaySpacing()
+        self._interval_table = None
+        self._interval_lookup = None
+        self._setup_fuzzy_system()
+        self.interval_table()
+
+    def _setup_fuzzy_system(self):
+        # Define fuzzy sets based on learning stages
+        self.spacing_system.add_fuzzy_set('first_time', [0, 0, 1, 2])
+        self.spacing_system.add_fuzzy_set('early_stage', [1, 2, 3, 5])
+        self.spacing_system.add_fuzzy_set('mid_stage', [3, 5, 10, 15])
+        self.spacing_system.add_fuzzy_set('late_stage', [10, 15, 20, 30])
+        self.spacing_system.add_fuzzy_set('mastered', [20, 30, 60, 60])
+
+        # Add rules for different learning stages
+        self.spacing_system.add_rule('first_time', 'same_day')
+        self.spacing_system.add_rule('early_stage', 'few_days')
+        self.spacing_system.add_rule('mid_stage', 'week_plus')
+        self.spacing_system.add_rule('late_stage', 'two_weeks')
+        self.spacing_system.add_rule('mastered', 'monthly')
+
+        # Define output ranges
+        self.output_ranges = {
+            'same_day': [0, 1],
+            'few_days': [2, 3],
+            'week_plus': [5, 10],
+            'two_weeks': [10, 20],
+            'monthly': [30, 60]
+        }
+
+    def next_interval(self, days_since_last, current_stage, difficulty):
+        """Interval and stage after a review, for one topic"""
+        interval = self._compiled_interval(days_since_last, difficulty)
+        if interval is None:
+            interval = self._fuzzy_interval(days_since_last, difficulty)
+
+        if difficulty == 'hard':
+            new_stage = self._decrease_stage(current_stage)
+        elif difficulty == 'easy':
+            new_stage = self._increase_stage(current_stage)
+        else:
+            new_stage = current_stage
+        return interval, new_stage
+
+    def interval_table(self):
+        """Compiled intervals as (first_day, table).
+
+        table[DIFFICULTIES.index(difficulty), days - first_day] is the
+        interval next_interval gives for a whole number of days. Rebuilt
+        when the fuzzy system or output ranges change.
+        """
+        first_day, base_intervals = self.spacing_system.compile(self.output_ranges)
+        if self._interval_table is None or self._interval_table[1] is not base_intervals:
+            codes = np.arange(len(DIFFICULTIES))[:, None]
+            table = _difficulty_intervals(base_intervals[None, :], codes)
+            self._interval_table = (first_day, base_intervals, table)
+            # Plain dict for the one-topic path, where numpy scalar indexing
+            # would cost more than the lookup itself
+            self._interval_lookup = (self.spacing_system.version, {
+                (difficulty, first_day + column): interval
+                for row, difficulty in enumerate(DIFFICULTIES)
+                for column, interval in enumerate(table[row].tolist())
+                if not np.isnan(interval)
+            })
+        return first_day, self._interval_table[2]
+
+    def _compiled_interval(self, days_since_last, difficulty):
+        # The lookup follows add_fuzzy_set/add_rule; output_ranges is read
+        # when the table is compiled, so call interval_table() after changing it
+        if self._interval_lookup is None or self._interval_lookup[0] != self.spacing_system.version:
+            self.interval_table()
+        return self._interval_lookup[1].get((difficulty, days_since_last))
+
+    def _fuzzy_interval(self, days_since_last, difficulty):
+        memberships = self.spacing_system.calculate_membership(days_since_last)
+        rule_strengths = self.spacing_system.evaluate_rules(memberships)
+        base_interval = self.spacing_system.defuzzify_centroid(rule_strengths, self.output_ranges)
+
+        if difficulty == 'hard':
+            return max(1, base_interval * 0.6)
+        elif difficulty == 'easy':
+            return base_interval * 1.4
+        return base_interval
+
+    def adjust_intervals_batch(self, days_since_last, stages, difficulties):
+        """Next intervals and stages for N topics at once.
+
+        `stages` and `difficulties` may be names or integer codes into
+        STAGES and DIFFICULTIES. Returns (intervals, stage_codes) as arrays;
+        an interval is NaN where next_interval would have no base interval
+        (no fuzzy set covers the day count). Whole-day inputs are read from
+        interval_table; anything else runs the fuzzy pipeline on arrays.
+        Nothing in self.topics changes.
+        """
+        days = np.asarray(days_since_last)
+        stage_codes = to_codes(stages, STAGES)
+        difficulty_codes = to_codes(difficulties, DIFFICULTIES)
+
+        if days.dtype.kind in 'iu' or np.array_equal(days, np.floor(days)):
+            first_day, table = self.interval_table()
+            columns = days.astype(np.int64) - first_day
+            covered = (columns >= 0) & (columns < table.shape[1])
+            np.clip(columns, 0, max(table.shape[1] - 1, 0), out=columns)
+            intervals = table[difficulty_codes, columns] if table.size else np.full(len(days), np.nan)
+            intervals = np.where(covered, intervals, np.nan)
+        else:
+            spacing = self.spacing_system
+            memberships = spacing.calculate_membership_batch(days)
+            outputs, strengths = spacing.evaluate_rules_batch(memberships)
+            base_intervals = spacing.defuzzify_centroid_batch(outputs, strengths, self.output_ranges)
+            intervals = _difficulty_intervals(base_intervals, difficulty_codes)
+
+        return intervals, next_stage_codes(stage_codes, difficulty_codes)
+
+    def _decrease_stage(self, current_stage):
+        stages = ['first_time', 'early_stage', 'mid_stage', 'late_stage', 'mastered']
+        current_idx = stages.index(current_stage)
+        return stages[max(0, current_idx - 1)]
+
+    def _increase_stage(self, current_stage):
+        stages = ['first_time', 'early_stage', 'mid_stage', 'late_stage', 'mastered']
+        current_idx = stages.index(current_stage)
+        return stages[min(len(stages) - 1, current_idx + 1)]
+
+def _difficulty_intervals(base_intervals, difficulty_codes):
+    # Array form of the difficulty adjustment in _fuzzy_interval; NaN stays NaN
+    hard = difficulty_codes == DIFFICULTIES.index('hard')
+    easy = difficulty_codes == DIFFICULTIES.index('easy')
+    intervals = np.where(hard, np.fmax(1, base_intervals * 0.6), base_intervals)
+    intervals = np.where(hard & np.isnan(base_intervals), np.nan, intervals)
+    return np.where(easy, base_intervals * 1.4, intervals)
+
+def next_stage(stage, difficulty):
+    """Stage after a review: down one for 'hard', up one for 'easy'"""
+    index = STAGES.index(stage)
+    if difficulty == 'hard':
+        index = max(0, index - 1)
+    elif difficulty == 'easy':
+        index = min(len(STAGES) - 1, index + 1)
+    return STAGES[index]
+
+def next_stage_codes(stage_codes, difficulty_codes):
+    """Array form of _decrease_stage/_increase_stage on stage codes"""
+    hard = difficulty_codes == DIFFICULTIES.index('hard')
+    easy = difficulty_codes == DIFFICULTIES.index('easy')
+    return np.clip(stage_codes - hard + easy, 0, len(STAGES) - 1)
+
+def to_codes(values, names):
+    """Integer codes into `names` for an array of names or codes"""
+    values = np.asarray(values)
+    if values.dtype.kind in 'iu':
+        return values.astype(np.int64)
+    lookup = {name: code for code, name in enumerate(names)}
+    return np.fromiter((lookup[value] for value in values), dtype=np.int64, count=len(values))
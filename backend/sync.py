@@ -0,0 +1,225 @@
+import json
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel
+from spacing import STAGES, DIFFICULTIES, STATUSES
+
+# Server side of the offline-first client's batch sync (see
+# frontend/lib/services/sync_service.dart). A batch of mixed changes is
+# validated here, grouped into one UNWIND statement per operation, and applied
+# by the database layer in a single transaction. Every applied change is also
+# written to a versioned change log so clients can pull only what changed
+# since their last sync.
+
+
+class SyncBatch(BaseModel):
+    # Items are validated one by one so a bad item fails on its own instead
+    # of rejecting the whole batch
+    changes: List[Dict[str, Any]]
+    since: Optional[int] = None
+
+
+class SyncConfirm(BaseModel):
+    change_ids: List[str]
+
+
+def prepare_batch(changes):
+    """Validate a batch and group it into per-operation rows.
+
+    Returns (operations, results, log): `operations` maps an operation name
+    to the rows for its UNWIND statement, `results` has one entry per input
+    item, and `log` holds the change-log entry for each item, keyed by the
+    item index. Rows carry that index as `key` so the database layer can
+    report which ones actually matched.
+    """
+    results = [None] * len(changes)
+    operations = {}
+    log = {}
+    latest = {}
+
+    # Within one batch the last change to an entity wins
+    for index, change in enumerate(changes):
+        try:
+            entity_type, action, data = _parse(change)
+        except ValueError as e:
+            results[index] = {"index": index, "status": "error", "error": str(e)}
+            continue
+        if entity_type == 'review':
+            latest[('review', index)] = index
+        else:
+            superseded = latest.get((entity_type, data['id']))
+            if superseded is not None:
+                results[superseded] = {"index": superseded, "id": data['id'], "status": "superseded"}
+            latest[(entity_type, data['id'])] = index
+
+    for index in sorted(latest.values()):
+        entity_type, action, data = _parse(changes[index])
+        try:
+            operation, row = NORMALIZERS[entity_type][action](data)
+        except (KeyError, TypeError, ValueError) as e:
+            results[index] = {"index": index, "status": "error", "error": f"Invalid {entity_type}: {e}"}
+            continue
+        row['key'] = index
+        operations.setdefault(operation, []).append(row)
+        entity_id = data['topic_id'] if entity_type == 'review' else data['id']
+        log[index] = {
+            'id': changes[index].get('change_id') or f"change:{uuid.uuid4()}",
+            'type': entity_type,
+            'action': action,
+            'entity_id': entity_id,
+            'data': json.dumps(data, default=_json_default),
+            'created_at': datetime.now().isoformat()
+        }
+        results[index] = {"index": index, "id": entity_id, "status": "pending"}
+
+    return operations, results, log
+
+
+def finish_results(results, log, applied, duplicates):
+    """Fill in the outcome of each pending item once the batch has run."""
+    for index, entry in log.items():
+        if entry['id'] in duplicates:
+            results[index]['status'] = 'duplicate'
+        elif index in applied:
+            results[index]['status'] = 'applied'
+            results[index]['change_id'] = entry['id']
+        else:
+            results[index]['status'] = 'error'
+            results[index]['error'] = 'Referenced topic not found'
+    return results
+
+
+def change_entry(entity_type, action, entity_id, data):
+    """Change-log entry for a write made outside the batch sync endpoint."""
+    return {
+        'id': f"change:{uuid.uuid4()}",
+        'type': entity_type,
+        'action': action,
+        'entity_id': entity_id,
+        'data': json.dumps(data, default=_json_default),
+        'created_at': datetime.now().isoformat()
+    }
+
+
+def change_from_record(change):
+    return {
+        'change_id': change['id'],
+        'version': change['version'],
+        'type': change['type'],
+        'action': change['action'],
+        'data': json.loads(change['data'])
+    }
+
+
+def _parse(change):
+    if not isinstance(change, dict):
+        raise ValueError("Change must be an object")
+    entity_type = change.get('type')
+    action = change.get('action', 'update')
+    data = change.get('data')
+    if entity_type not in NORMALIZERS:
+        raise ValueError(f"Unsupported change type: {entity_type}")
+    if action not in NORMALIZERS[entity_type]:
+        raise ValueError(f"Unsupported action for {entity_type}: {action}")
+    if not isinstance(data, dict):
+        raise ValueError("Change data must be an object")
+    if entity_type == 'review':
+        if not data.get('topic_id'):
+            raise ValueError("Review changes need a topic_id")
+    elif not data.get('id'):
+        raise ValueError("Change data needs an id")
+    return entity_type, action, data
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _datetime(value):
+    return value if isinstance(value, datetime) else datetime.fromisoformat(value)
+
+
+def _local_datetime(value):
+    # Schedules are stored and compared as naive local times, like the
+    # REST endpoints store them
+    value = _datetime(value)
+    return value.astimezone().replace(tzinfo=None) if value.tzinfo else value
+
+
+def _task_upsert(data):
+    return 'task_upsert', {
+        'id': data['id'],
+        'properties': {
+            'title': data['title'],
+            'is_completed': bool(data.get('is_completed', False)),
+            'created_at': _datetime(data.get('created_at') or datetime.now()).isoformat(),
+            'due_date': data.get('due_date'),
+            'energy_level': data.get('energy_level'),
+            'duration': data.get('duration')
+        }
+    }
+
+
+def _topic_upsert(data):
+    if data.get('stage', 'first_time') not in STAGES:
+        raise ValueError(f"unknown stage {data['stage']}")
+    if data.get('status', 'active') not in STATUSES:
+        raise ValueError(f"unknown status {data['status']}")
+    return 'topic_upsert', {
+        'id': data['id'],
+        'subject': data['subject'],
+        'properties': {
+            'name': data['name'],
+            'status': data.get('status', 'active'),
+            'stage': data.get('stage', 'first_time'),
+            'created_at': _datetime(data.get('created_at') or datetime.now()).isoformat(),
+            'next_review': _local_datetime(data.get('next_review') or datetime.now())
+        }
+    }
+
+
+def _content_upsert(data):
+    return 'content_upsert', {
+        'id': data['id'],
+        'properties': {
+            'title': data['title'],
+            'type': data['type'],
+            'content': data['content'],
+            'created_at': _datetime(data.get('created_at') or datetime.now()).isoformat()
+        },
+        'updated_at': datetime.now().isoformat(),
+        'related_topics': list(data.get('related_topics', []))
+    }
+
+
+def _review_create(data):
+    if data['difficulty'] not in DIFFICULTIES:
+        raise ValueError(f"unknown difficulty {data['difficulty']}")
+    if data.get('stage') is not None and data['stage'] not in STAGES:
+        raise ValueError(f"unknown stage {data['stage']}")
+    interval = data['interval']
+    if not isinstance(interval, int) or isinstance(interval, bool) or interval < 1:
+        raise ValueError(f"interval must be a positive number of days, not {interval!r}")
+    return 'review_create', {
+        'topic_id': data['topic_id'],
+        'date': _datetime(data.get('date') or datetime.now()).isoformat(),
+        'difficulty': data['difficulty'],
+        'interval': interval,
+        'stage': data.get('stage'),
+        'next_review': _local_datetime(data['next_review']) if data.get('next_review') else None
+    }
+
+
+def _delete(operation):
+    return lambda data: (operation, {'id': data['id']})
+
+
+NORMALIZERS = {
+    'task': {'create': _task_upsert, 'update': _task_upsert, 'delete': _delete('task_delete')},
+    'topic': {'create': _topic_upsert, 'update': _topic_upsert, 'delete': _delete('topic_delete')},
+    'content': {'create': _content_upsert, 'update': _content_upsert, 'delete': _delete('content_delete')},
+    'review': {'create': _review_create},
+}
@@ -0,0 +1,106 @@
+import asyncio
+from datetime import date, datetime
+from analytics import AnalyticsRollup
+from database import AsyncNeo4jConnection
+
+
+ROWS = (
+    [{"stage": "first_time", "topics": 2}, {"stage": "mid_stage", "topics": 1}],
+    [
+        {"day": "2025-03-01", "difficulty": "easy", "reviews": 2, "interval_total": 6},
+        {"day": "2025-03-01", "difficulty": "hard", "reviews": 1, "interval_total": 1},
+        {"day": "2025-03-02", "difficulty": "normal", "reviews": 1, "interval_total": 7},
+    ],
+    [{"topic_id": "Math:Limits", "minutes": 30, "sessions": 2}]
+)
+
+
+def warm_rollup():
+    rollup = AnalyticsRollup()
+    rollup.fill(*ROWS)
+    return rollup
+
+
+class TestAnalyticsRollup:
+    def test_aggregates(self):
+        """Test the read-side views over the aggregated rows"""
+        rollup = warm_rollup()
+        assert rollup.stage_distribution() == {
+            "first_time": 2, "early_stage": 0, "mid_stage": 1, "late_stage": 0, "mastered": 0
+        }
+        assert rollup.reviews_per_day() == [
+            {"date": "2025-03-01", "reviews": 3, "easy": 2, "normal": 0, "hard": 1},
+            {"date": "2025-03-02", "reviews": 1, "easy": 0, "normal": 1, "hard": 0},
+        ]
+        mix = rollup.difficulty_mix(since=date(2025, 3, 1), until=date(2025, 3, 1))
+        assert mix["total"] == 3 and mix["counts"] == {"easy": 2, "normal": 0, "hard": 1}
+        assert rollup.interval_progression()[0] == {
+            "date": "2025-03-01", "mean_interval": 7 / 3, "by_difficulty": {"easy": 3.0, "hard": 1.0}
+        }
+
+    def test_writes_patch_rollup(self):
+        """Test that reviews, new topics and study sessions update the rollup in place"""
+        rollup = warm_rollup()
+        rollup.add_review({"date": datetime(2025, 3, 2, 18), "difficulty": "easy", "interval": 4},
+                          "first_time", "early_stage", "active")
+        rollup.add_topic({"status": "active", "stage": "first_time",
+                          "review_history": [{"date": "2025-03-03T09:00:00", "difficulty": "hard", "interval": 1}]})
+        rollup.add_study([{"topic_id": "Math:Limits", "duration": 15}, {"topic_id": "Math:Series", "duration": 60}])
+
+        assert rollup.stage_distribution()["first_time"] == 2
+        assert rollup.stage_distribution()["early_stage"] == 1
+        assert [day["reviews"] for day in rollup.reviews_per_day()] == [3, 2, 1]
+        assert rollup.time_studied(limit=1) == [{"topic_id": "Math:Series", "minutes": 60, "sessions": 1}]
+        assert rollup.time_studied()[1] == {"topic_id": "Math:Limits", "minutes": 45, "sessions": 3}
+
+    def test_invalidate(self):
+        """Test that a cold rollup ignores writes until it is filled again"""
+        rollup = warm_rollup()
+        rollup.invalidate()
+        assert not rollup.is_warm
+        rollup.add_review({"date": datetime(2025, 3, 2), "difficulty": "easy", "interval": 4},
+                          "first_time", "early_stage", "active")
+        rollup.add_study([{"topic_id": "Math:Limits", "duration": 15}])
+        assert not rollup.is_warm
+
+    def test_fill_refused_after_write(self):
+        """Test that rows aggregated before a write, even on a cold rollup, are not installed"""
+        rollup = AnalyticsRollup()
+        generation = rollup.generation
+        rollup.add_study([{"topic_id": "Math:Limits", "duration": 15}])
+        assert not rollup.fill(*ROWS, generation=generation)
+        assert not rollup.is_warm
+        with rollup.writing():
+            assert not rollup.fill(*ROWS, generation=rollup.generation)
+        assert rollup.fill(*ROWS, generation=rollup.generation)
+        assert rollup.is_warm
+
+    def test_study_during_aggregation(self):
+        """Test get_analytics redoing the aggregations when a session is logged while they run"""
+        async def scenario():
+            db = AsyncNeo4jConnection()
+            now = datetime(2025, 3, 3, 9)
+            loads = []
+
+            async def load():
+                loads.append(1)
+                if len(loads) == 1:
+                    # The session commits after the aggregations read the database
+                    await db.create_study_sessions([{
+                        "id": "s1", "start_time": now, "end_time": now, "created_at": now,
+                        "topics": ["Math:Limits"], "durations": [15]
+                    }])
+                    return ROWS
+                return ROWS[:2] + ([{"topic_id": "Math:Limits", "minutes": 45, "sessions": 3}],)
+
+            async def write(query, **params):
+                return [{"created": ["s1"], "linked": [[{"topic_id": "Math:Limits", "duration": 15}]]}]
+
+            db._load_analytics = load
+            db._write = write
+            rollup = await db.get_analytics()
+            assert len(loads) == 2 and rollup is db.analytics and rollup.is_warm
+            assert rollup.time_studied() == [{"topic_id": "Math:Limits", "minutes": 45, "sessions": 3}]
+            await db.close()
+
+        asyncio.run(scenario())
@@ -1,16 +1,18 @@
 import pytest
 from datetime import datetime, timedelta
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock, patch
 from backend import app
 from fastapi.testclient import TestClient
-from database import Neo4jConnection
+from database import (
+    Neo4jConnection, driver_config, MIGRATIONS, SCHEMA_CONSTRAINTS, SCHEMA_INDEXES, _topic_page_query
+)
 from day_spacing_alogirthm import EnhancedSpacedLearningSystem, DaySpacing
 
 client = TestClient(app)
 
 @pytest.fixture
 def mock_db():
-    with patch('backend.Neo4jConnection') as mock:
+    with patch('backend.AsyncNeo4jConnection') as mock:
         yield mock
 
 @pytest.fixture
@@ -59,6 +61,65 @@ class TestInputValidation:
         response = client.post("/content/", json=invalid_data)
         assert response.status_code == 200
 
+    def test_due_review_pagination_validation(self, mock_db):
+        """Test validation of due-review limit and cursor parameters"""
+        response = client.get("/topics/review", params={"limit": 0})
+        assert response.status_code == 400
+        response = client.get("/topics/review", params={"limit": 10, "cursor": "not-a-cursor"})
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Invalid cursor"
+
+    def test_topic_page_validation(self, mock_db):
+        """Test validation of graph page limit and cursor parameters"""
+        response = client.get("/topics/", params={"limit": 0})
+        assert response.status_code == 400
+        response = client.get("/topics/", params={"stream": True, "cursor": "%%%"})
+        assert response.status_code == 400
+
+    def test_changes_limit_validation(self, mock_db):
+        """Test validation of the change feed limit parameter"""
+        assert client.get("/changes", params={"since": 0, "limit": 0}).status_code == 400
+        assert client.get("/unsynced", params={"limit": 5000}).status_code == 400
+
+    def test_study_session_validation(self, mock_db):
+        """Test validation of single and bulk study sessions before anything is written"""
+        session = {
+            "start_time": "2025-03-01T09:00:00",
+            "end_time": "2025-03-01T10:00:00",
+            "topics": ["Mathematics:Calculus:Limits"],
+            "durations": [30, 30]
+        }
+        assert client.post("/study-sessions/", json=session).status_code == 400
+        assert client.post("/study-sessions/bulk", json={"sessions": [session]}).status_code == 400
+        session = dict(session, durations=[30], end_time="2025-03-01T08:00:00")
+        assert client.post("/study-sessions/bulk", json={"sessions": [session]}).status_code == 400
+        session = dict(session, end_time="2025-02-27T10:00:00+02:00")
+        assert client.post("/study-sessions/", json=session).status_code == 400
+        session = dict(session, end_time="2025-03-01T10:00:00", durations=[0])
+        assert client.post("/study-sessions/", json=session).status_code == 400
+        session = dict(session, durations=[-30])
+        assert client.post("/study-sessions/bulk", json={"sessions": [session]}).status_code == 400
+        session = dict(session, durations=[30])
+        assert client.post("/study-sessions/bulk", json={"sessions": [session] * 1001}).status_code == 400
+        assert client.post("/study-sessions/bulk", json={"sessions": [{"topics": []}]}).status_code == 422
+
+    def test_analytics_validation(self, mock_db):
+        """Test validation of analytics date ranges and limits"""
+        params = {"since": "2025-03-02", "until": "2025-03-01"}
+        assert client.get("/analytics/reviews-per-day", params=params).status_code == 400
+        assert client.get("/analytics/difficulty", params=params).status_code == 400
+        assert client.get("/analytics/intervals", params={"since": "yesterday"}).status_code == 422
+        assert client.get("/analytics/time-studied", params={"limit": 0}).status_code == 400
+
+    def test_content_search_validation(self, mock_db):
+        """Test validation of content search paging parameters"""
+        response = client.get("/content/search", params={"query": "limits", "limit": 0})
+        assert response.status_code == 400
+        response = client.get("/content/search", params={"query": "limits", "offset": -1})
+        assert response.status_code == 400
+        response = client.get("/content/semantic-search", params={"query": "limits", "limit": 0})
+        assert response.status_code == 400
+
 class TestErrorHandling:
     def test_database_connection_error(self, mock_db):
         """Test handling of database connection errors"""
@@ -99,6 +160,47 @@ class TestCoreFunctionality:
         assert "next_review" in response.json()
         assert "new_stage" in response.json()
 
+    def test_synced_content_keeps_database_stamps(self):
+        """Test that synced content is indexed with the created_at and updated_at the database stores"""
+        from backend import _index_synced_changes
+        from search_index import SearchIndex
+        from sync import prepare_batch
+
+        operations, _, log = prepare_batch([{
+            "type": "content", "action": "create",
+            "data": {"id": "content:1", "title": "Limits", "type": "article", "content": "epsilon delta",
+                     "created_at": "2026-01-02T03:04:05Z"}
+        }])
+        row = operations['content_upsert'][0]
+        index = SearchIndex()
+        with patch('backend.search_index', index), patch('backend.embedding_worker'):
+            _index_synced_changes(operations, log, {0}, set())
+            assert index.reconcile({"content:1": row['updated_at']}) == []
+            assert index.get("content:1")['created_at'] == row['properties']['created_at']
+
+            # An unchanged body keeps the updated_at already stored
+            again, _, log = prepare_batch([{
+                "type": "content", "action": "update",
+                "data": {"id": "content:1", "title": "Limits", "type": "article", "content": "epsilon delta"}
+            }])
+            _index_synced_changes(again, log, {0}, set())
+            assert index.get("content:1")['updated_at'] == row['updated_at']
+
+    def test_cache_invalidation_reloads_outside_writes(self):
+        """Test that /cache/invalidate drops the cached graph and rebuilds the prerequisite index"""
+        import backend
+        backend.db.graph_cache.fill({"subjects": {}, "topics": {}, "relationships": []})
+        backend.prerequisite_index.build([("Mathematics:Sets", "Mathematics:Removed")])
+        edges = AsyncMock(return_value=[("Mathematics:Sets", "Mathematics:Limits")])
+        with patch.object(backend.db, 'get_prerequisite_edges', edges), \
+                patch('backend._load_search_index', AsyncMock()), patch('backend._load_embeddings', AsyncMock()), \
+                patch.object(backend.search_index, 'ready', False):
+            response = client.post("/cache/invalidate")
+        assert response.status_code == 200
+        assert not backend.db.graph_cache.is_warm
+        assert backend.prerequisite_index.prerequisites("Mathematics:Limits") == ["Mathematics:Sets"]
+        assert backend.prerequisite_index.prerequisites("Mathematics:Removed") == []
+
 class TestEdgeCases:
     def test_concurrent_topic_creation(self, mock_db):
         """Test handling of concurrent topic creation attempts"""
@@ -126,6 +228,60 @@ class TestEdgeCases:
         response = client.post("/topics/", json=special_path)
         assert response.status_code == 200
 
+class TestDatabaseConfig:
+    def test_driver_config_from_env(self, monkeypatch):
+        """Test that pool settings are read from the environment"""
+        monkeypatch.setenv("NEO4J_MAX_CONNECTION_POOL_SIZE", "25")
+        monkeypatch.setenv("NEO4J_CONNECTION_ACQUISITION_TIMEOUT", "2.5")
+        monkeypatch.delenv("NEO4J_MAX_CONNECTION_LIFETIME", raising=False)
+        config = driver_config()
+        assert config["max_connection_pool_size"] == 25
+        assert config["connection_acquisition_timeout"] == 2.5
+        assert "max_connection_lifetime" not in config
+
+    def test_migrations_run_once(self):
+        """Test that ensure_schema skips recorded migrations and reports failing ones"""
+        # Through the blocking facade, which runs the async connection's methods
+        db = Neo4jConnection()
+        written = []
+
+        async def write(query, **params):
+            written.append(query)
+
+        async def read(query, **params):
+            return [{"name": params["name"]}]
+
+        db._connection._write, db._connection._read = write, read
+        assert db.ensure_schema() == {}
+        assert len(written) == len(SCHEMA_CONSTRAINTS) + len(SCHEMA_INDEXES)
+
+        written.clear()
+        db._connection._read = AsyncMock(side_effect=Exception("unavailable"))
+        assert list(db.ensure_schema()) == list(MIGRATIONS)
+        assert len(written) == len(SCHEMA_CONSTRAINTS) + len(SCHEMA_INDEXES)
+        db.close()
+
+    def test_topic_pages_seek_the_id_index(self):
+        """Test that topic pages filter on t.id alone so the constraint index can seek and order"""
+        first, params = _topic_page_query(100, None, False)
+        assert "t.id IS NOT NULL" in first and "$after" not in first and "LIMIT $limit" in first
+        later, params = _topic_page_query(100, "Mathematics:Limits", False)
+        assert "WHERE t.id > $after" in later and params["after"] == "Mathematics:Limits"
+        assert "IS NULL" not in later
+
+    def test_facade_iterates_async_generators(self):
+        """Test that the blocking facade turns async generators into plain ones"""
+        db = Neo4jConnection()
+
+        async def iter_topics(limit=None):
+            for i in range(limit):
+                yield i
+
+        db._connection.iter_topics = iter_topics
+        assert list(db.iter_topics(limit=3)) == [0, 1, 2]
+        assert db.graph_cache is db._connection.graph_cache
+        db.close()
+
 class TestSpacedLearning:
     def test_day_spacing_calculation(self):
         """Test the day spacing algorithm calculations"""
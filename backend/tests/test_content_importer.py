@@ -0,0 +1,101 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "content"))
+from content_importer import (
+    MANIFEST_NAME, content_row, extract_title, import_root_for, load_manifest, parse_file, parse_front_matter,
+    parse_note, save_manifest, source_path_for, topics_from_path, vault_edges
+)
+
+
+class TestDirectoryImport:
+    def test_topics_from_path(self):
+        """Test topic ids derived from the directory layout"""
+        assert topics_from_path("vault", os.path.join("vault", "learning", "spaced_repetition.md")) == [
+            "learning:spaced_repetition"
+        ]
+        assert topics_from_path("vault", os.path.join("vault", "study", "elaboration", "notes.md")) == [
+            "study:elaboration"
+        ]
+        assert topics_from_path("vault", os.path.join("vault", "README.md")) == []
+
+    def test_extract_title(self):
+        """Test the markdown heading, quiz JSON and file name title rules"""
+        assert extract_title("a/recall.md", "article", "# Active Recall\n\nBody") == "Active Recall"
+        assert extract_title("a/recall.md", "guide", "No heading") == "recall"
+        assert extract_title("a/quiz.json", "quiz", '{"title": "Recall Quiz"}') == "Recall Quiz"
+        assert extract_title("a/quiz.json", "quiz", "not json") == "quiz"
+
+    def test_parse_file(self, tmp_path):
+        """Test that a file becomes a content row with parsed topics"""
+        path = tmp_path / "recall.md"
+        path.write_text("# Active Recall\n\nTest yourself.")
+        row = parse_file((str(path), "article", ["learning:active_recall", "invalid"], "learning/recall.md"))
+        assert row["title"] == "Active Recall"
+        assert row["topics"] == [{"id": "learning:active_recall", "subject": "learning", "name": "Active Recall"}]
+        assert row["source_path"] == "learning/recall.md"
+        assert "error" in parse_file((str(tmp_path / "missing.md"), "article", [], "missing.md"))
+
+    def test_ids_follow_path_and_hashes_follow_content(self):
+        """Test that edits keep the id but change the content hash"""
+        original = content_row("Recall", "article", "Body", ["learning:recall"], "learning/recall.md")
+        edited = content_row("Recall", "article", "New body", ["learning:recall"], "learning/recall.md")
+        relinked = content_row("Recall", "article", "Body", ["study:recall"], "learning/recall.md")
+        assert original["id"] == edited["id"] == relinked["id"]
+        assert len({original["content_hash"], edited["content_hash"], relinked["content_hash"]}) == 3
+        assert content_row("Recall", "article", "Body", [], "other.md")["id"] != original["id"]
+
+    def test_single_file_keyed_like_directory_import(self, tmp_path):
+        """Test that a lone file is keyed relative to the directory import root above it"""
+        path = tmp_path / "learning" / "recall.md"
+        path.parent.mkdir()
+        path.write_text("# Recall")
+        assert import_root_for(path) == str(path.parent)
+        save_manifest(tmp_path / MANIFEST_NAME, {})
+        assert import_root_for(path) == str(tmp_path)
+        assert source_path_for(import_root_for(path), str(path)) == "learning/recall.md"
+
+    def test_manifest_round_trip(self, tmp_path):
+        """Test that the checkpoint manifest survives a save and load"""
+        path = tmp_path / "manifest.json"
+        assert load_manifest(path) == {}
+        files = {"learning/recall.md": {"id": "content:1", "hash": "abc", "mtime_ns": 1, "size": 2}}
+        save_manifest(path, files)
+        assert load_manifest(path) == files
+
+
+class TestVaultImport:
+    def test_parse_front_matter(self):
+        """Test inline lists, block lists and scalar values"""
+        metadata, body = parse_front_matter("---\ntags: [a/b, c]\naliases:\n  - Recall\ntitle: \"Notes\"\n---\nBody")
+        assert metadata == {"tags": ["a/b", "c"], "aliases": ["Recall"], "title": "Notes"}
+        assert body == "Body"
+        assert parse_front_matter("No front matter") == ({}, "No front matter")
+
+    def test_parse_note(self, tmp_path):
+        """Test tags becoming topics and wiki links being collected"""
+        path = tmp_path / "Active Recall.md"
+        path.write_text("---\ntags: [learning/memory, review]\n---\n# Active Recall\nSee [[Spacing|spaced]] and [[Notes#Intro]].")
+        note = parse_note((str(path), "learning/Active Recall.md", "vault"))
+        assert note["row"]["title"] == "Active Recall"
+        assert [topic["id"] for topic in note["row"]["topics"]] == ["learning:memory", "learning:review"]
+        assert note["links"] == ["Notes", "Spacing"]
+
+        untagged = tmp_path / "Inbox.md"
+        untagged.write_text("plain note")
+        assert parse_note((str(untagged), "Inbox.md", "vault"))["row"]["topics"][0]["id"] == "vault:Inbox"
+
+    def test_vault_edges(self):
+        """Test that links resolve by name, alias or path and become prerequisite edges"""
+        notes = {
+            "learning/Recall.md": {"name": "Recall", "aliases": ["Active recall"], "topics": ["learning:recall"],
+                                   "links": ["spacing", "missing"]},
+            "learning/Spacing.md": {"name": "Spacing", "aliases": [], "topics": ["learning:spacing"], "links": []},
+            "Inbox.md": {"name": "Inbox", "aliases": [], "topics": ["vault:inbox"],
+                         "links": ["Active Recall", "learning/Spacing"]},
+        }
+        assert vault_edges(notes) == {
+            ("learning:spacing", "learning:recall"),
+            ("learning:recall", "vault:inbox"),
+            ("learning:spacing", "vault:inbox"),
+        }
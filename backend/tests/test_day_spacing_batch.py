@@ -0,0 +1,117 @@
+import numpy as np
+import pytest
+from day_spacing_alogirthm import EnhancedSpacedLearningSystem, DaySpacing, STAGES, DIFFICULTIES
+
+
+def scalar_path(learning_system, days, stages, difficulties):
+    intervals, new_stages = [], []
+    for day, stage, difficulty in zip(days, stages, difficulties):
+        # The uncompiled fuzzy pipeline is the reference
+        interval = learning_system._fuzzy_interval(day, difficulty)
+        _, new_stage = learning_system.next_interval(day, stage, difficulty)
+        intervals.append(np.nan if interval is None else interval)
+        new_stages.append(STAGES.index(new_stage))
+    return np.array(intervals), np.array(new_stages)
+
+
+class TestBatchScheduling:
+    def test_membership_matches_scalar(self):
+        """Test that batch membership agrees with calculate_membership, edges included"""
+        learning_system = EnhancedSpacedLearningSystem()
+        spacing = learning_system.spacing_system
+        days = np.array([0, 0.5, 1, 1.5, 2, 3, 5, 10, 12.5, 15, 20, 30, 45, 60, 90])
+        batch = spacing.calculate_membership_batch(days)
+        for column, day in enumerate(days):
+            expected = spacing.calculate_membership(day)
+            assert batch[:, column].tolist() == [expected[name] for name in spacing.sets]
+
+    def test_intervals_match_scalar(self):
+        """Test that adjust_intervals_batch reproduces next_interval for every combination"""
+        learning_system = EnhancedSpacedLearningSystem()
+        days = np.arange(0, 70)
+        grid = [(day, stage, difficulty) for day in days for stage in STAGES for difficulty in DIFFICULTIES]
+        grid = [(day, stage, difficulty) for day, stage, difficulty in grid
+                if difficulty == 'normal' or 0 < day < 60]
+        days, stages, difficulties = (list(column) for column in zip(*grid))
+
+        intervals, new_stages = learning_system.adjust_intervals_batch(days, stages, difficulties)
+        expected_intervals, expected_stages = scalar_path(learning_system, days, stages, difficulties)
+
+        np.testing.assert_allclose(intervals, expected_intervals, rtol=1e-12)
+        assert new_stages.tolist() == expected_stages.tolist()
+
+    def test_uncovered_days_are_nan(self):
+        """Test that day counts no fuzzy set covers give NaN instead of an interval"""
+        learning_system = EnhancedSpacedLearningSystem()
+        intervals, new_stages = learning_system.adjust_intervals_batch(
+            [0, 60, 100], ['mastered'] * 3, ['hard', 'easy', 'normal']
+        )
+        assert np.isnan(intervals).all()
+        assert new_stages.tolist() == [STAGES.index('late_stage'), STAGES.index('mastered'), STAGES.index('mastered')]
+
+    def test_accepts_codes(self):
+        """Test that integer stage and difficulty codes give the same result as names"""
+        learning_system = EnhancedSpacedLearningSystem()
+        days = [1, 4, 12]
+        by_name = learning_system.adjust_intervals_batch(days, ['first_time', 'mid_stage', 'mastered'], ['easy', 'hard', 'normal'])
+        by_code = learning_system.adjust_intervals_batch(days, [0, 2, 4], [0, 2, 1])
+        np.testing.assert_array_equal(by_name[0], by_code[0])
+        np.testing.assert_array_equal(by_name[1], by_code[1])
+
+    def test_custom_rules(self):
+        """Test that rules on unknown sets are ignored like in evaluate_rules"""
+        spacing = DaySpacing()
+        spacing.add_fuzzy_set('short', [0, 1, 2, 3])
+        spacing.add_rule('short', 'soon')
+        spacing.add_rule('missing', 'later')
+        memberships = spacing.calculate_membership_batch(np.array([1.5]))
+        outputs, strengths = spacing.evaluate_rules_batch(memberships)
+        assert outputs == ['soon', 'later']
+        assert strengths[:, 0].tolist() == [1.0, 0.0]
+
+    def test_fractional_days_use_fuzzy_pipeline(self):
+        """Test that non-integer day counts bypass the compiled table"""
+        learning_system = EnhancedSpacedLearningSystem()
+        days = [0.5, 1.5, 12.25, 45.5]
+        intervals, _ = learning_system.adjust_intervals_batch(days, ['mid_stage'] * 4, ['easy', 'normal', 'hard', 'normal'])
+        expected, _ = scalar_path(learning_system, days, ['mid_stage'] * 4, ['easy', 'normal', 'hard', 'normal'])
+        np.testing.assert_allclose(intervals, expected, rtol=1e-12)
+
+
+class TestCompiledTable:
+    def test_table_matches_fuzzy_pipeline(self):
+        """Test that every covered table cell equals the uncompiled per-topic interval"""
+        learning_system = EnhancedSpacedLearningSystem()
+        first_day, table = learning_system.interval_table()
+        for column in range(table.shape[1]):
+            day = first_day + column
+            if learning_system._fuzzy_interval(day, 'normal') is None:
+                assert np.isnan(table[:, column]).all()
+                continue
+            for row, difficulty in enumerate(DIFFICULTIES):
+                assert table[row, column] == pytest.approx(learning_system._fuzzy_interval(day, difficulty))
+
+    def test_next_interval_reads_table(self):
+        """Test that next_interval answers whole days from the table"""
+        learning_system = EnhancedSpacedLearningSystem()
+        first_day, table = learning_system.interval_table()
+        interval, stage = learning_system.next_interval(7, 'mid_stage', 'easy')
+        assert interval == table[DIFFICULTIES.index('easy'), 7 - first_day]
+        assert stage == 'late_stage'
+
+    def test_changes_invalidate_table(self):
+        """Test that add_fuzzy_set and add_rule recompile the table"""
+        learning_system = EnhancedSpacedLearningSystem()
+        spacing = learning_system.spacing_system
+        _, before = learning_system.interval_table()
+        assert np.isnan(before[:, -1]).all()
+
+        spacing.add_fuzzy_set('long_gap', [50, 70, 90, 100])
+        first_day, table = learning_system.interval_table()
+        assert table.shape[1] > before.shape[1]
+        assert np.isnan(table[DIFFICULTIES.index('normal'), 80 - first_day])
+
+        spacing.add_rule('long_gap', 'monthly')
+        first_day, table = learning_system.interval_table()
+        assert table[DIFFICULTIES.index('normal'), 80 - first_day] == 45
+        assert learning_system.next_interval(80, 'mastered', 'normal')[0] == 45
@@ -0,0 +1,58 @@
+import asyncio
+import numpy as np
+from embeddings import EmbeddingWorker, HashingEmbedder, VectorIndex
+
+
+class TestHashingEmbedder:
+    def test_vectors_are_normalised_and_deterministic(self):
+        """Test that embeddings are unit length and stable across instances"""
+        vectors = HashingEmbedder(64).embed(["spaced repetition", ""])
+        assert vectors.dtype == np.float32
+        assert np.isclose(np.linalg.norm(vectors[0]), 1.0)
+        assert not vectors[1].any()
+        assert np.array_equal(HashingEmbedder(64).embed(["spaced repetition"])[0], vectors[0])
+
+    def test_shared_words_are_closer(self):
+        """Test that texts sharing vocabulary score higher"""
+        query, near, far = HashingEmbedder().embed([
+            "memory techniques", "memory palace techniques", "pomodoro timer breaks"
+        ])
+        assert query @ near > query @ far
+
+
+class TestVectorIndex:
+    def test_search_upsert_and_remove(self):
+        """Test ranking, in-place updates and removal"""
+        index = VectorIndex(2)
+        index.upsert(["a", "b", "c"], [[1, 0], [0, 1], [0.6, 0.8]])
+        assert [item_id for item_id, _ in index.search([1, 0], limit=2)] == ["a", "c"]
+        index.upsert(["b"], [[1, 0]])
+        assert index.search([1, 0], limit=1, exclude=("a",))[0][0] == "b"
+        index.remove("a")
+        assert len(index) == 2 and "a" not in index
+        assert np.array_equal(index.get("c"), np.array([0.6, 0.8], dtype=np.float32))
+
+
+class TestEmbeddingWorker:
+    def test_batches_and_stores(self):
+        """Test that queued items are embedded in batches and stored"""
+        embedder = HashingEmbedder(32)
+        indexes = {"content": VectorIndex(32), "topic": VectorIndex(32)}
+        stored = []
+
+        async def store(kind, model, rows):
+            stored.append((kind, model, [row["id"] for row in rows]))
+
+        async def run():
+            worker = EmbeddingWorker(embedder, indexes, store=store, batch_size=2)
+            worker.start()
+            worker.submit("content", "content:1", "Active recall")
+            worker.submit("topic", "Learning:Recall", "Learning Recall")
+            worker.submit("content", "content:2", "Spaced repetition")
+            await worker.drain()
+            await worker.stop()
+
+        asyncio.run(run())
+        assert len(indexes["content"]) == 2 and len(indexes["topic"]) == 1
+        assert sorted(ids for _, _, ids in stored) == [["Learning:Recall"], ["content:1"], ["content:2"]]
+        assert {model for _, model, _ in stored} == {"hashing-32"}
@@ -0,0 +1,134 @@
+import asyncio
+import copy
+import pytest
+from datetime import datetime
+from database import AsyncNeo4jConnection
+from graph_cache import GraphCache
+
+
+@pytest.fixture
+def graph():
+    now = datetime.now()
+    return {
+        "subjects": {"Mathematics": {"name": "Mathematics", "topics": ["Mathematics:Limits"]}},
+        "topics": {
+            "Mathematics:Limits": {
+                "id": "Mathematics:Limits",
+                "name": "Limits",
+                "subject": "Mathematics",
+                "status": "active",
+                "stage": "first_time",
+                "created_at": now,
+                "next_review": now,
+                "review_history": []
+            }
+        },
+        "relationships": []
+    }
+
+@pytest.fixture
+def warm_cache(graph):
+    cache = GraphCache()
+    cache.get(lambda: graph)
+    return cache
+
+class TestGraphCache:
+    def test_first_read_warms_then_hits(self, graph):
+        """Test that only the first read calls the loader"""
+        cache = GraphCache()
+        calls = []
+        loader = lambda: calls.append(1) or graph
+        cache.get(loader)
+        cache.get(loader)
+        assert len(calls) == 1
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_snapshot_is_isolated(self, warm_cache):
+        """Test that mutating a returned graph leaves the cache untouched"""
+        snapshot = warm_cache.get(None)
+        snapshot["topics"]["Mathematics:Limits"]["review_history"].append({})
+        assert warm_cache.get(None)["topics"]["Mathematics:Limits"]["review_history"] == []
+
+    def test_write_through_patches(self, warm_cache):
+        """Test that topic and relationship writes patch the cached graph"""
+        topic = dict(warm_cache.get_topic("Mathematics:Limits"), id="Mathematics:Derivatives", name="Derivatives")
+        warm_cache.put_topic(topic)
+        warm_cache.add_relationship("Mathematics:Limits", "Mathematics:Derivatives", "PREREQUISITE_OF")
+        graph = warm_cache.get(None)
+        assert graph["subjects"]["Mathematics"]["topics"] == ["Mathematics:Limits", "Mathematics:Derivatives"]
+        assert len(graph["relationships"]) == 1
+
+        warm_cache.remove_relationship("Mathematics:Limits", "Mathematics:Derivatives", "PREREQUISITE_OF")
+        assert warm_cache.get(None)["relationships"] == []
+        warm_cache.add_relationship("Mathematics:Limits", "Mathematics:Derivatives", "PREREQUISITE_OF")
+
+        warm_cache.remove_topic("Mathematics:Derivatives")
+        graph = warm_cache.get(None)
+        assert "Mathematics:Derivatives" not in graph["topics"]
+        assert graph["relationships"] == []
+
+    def test_invalidate_reloads(self, warm_cache, graph):
+        """Test that invalidation forces the next read back to the loader"""
+        version = warm_cache.version
+        warm_cache.invalidate()
+        assert not warm_cache.is_warm
+        warm_cache.get(lambda: graph)
+        assert warm_cache.stats()["misses"] == 2
+        assert warm_cache.version > version
+
+    def test_write_during_load_is_not_lost(self, graph):
+        """Test that a graph loaded while a write committed is served but not cached"""
+        cache = GraphCache()
+        stale = copy.deepcopy(graph)
+
+        def loader():
+            # The write commits after the loader has read the graph; the
+            # hook has nothing to patch yet
+            with cache.writing():
+                cache.update_topic("Mathematics:Limits", stage="early_stage")
+            return stale
+
+        assert cache.get(loader)["topics"]["Mathematics:Limits"]["stage"] == "first_time"
+        assert not cache.is_warm
+        graph["topics"]["Mathematics:Limits"]["stage"] = "early_stage"
+        assert cache.get(lambda: graph)["topics"]["Mathematics:Limits"]["stage"] == "early_stage"
+        assert cache.is_warm
+
+    def test_review_during_slow_async_load(self, graph):
+        """Test record_review interleaved with a slow _load_full_graph on the async connection"""
+        async def scenario():
+            db = AsyncNeo4jConnection()
+            loading, release = asyncio.Event(), asyncio.Event()
+            stale = copy.deepcopy(graph)
+
+            async def slow_load():
+                loading.set()
+                await release.wait()
+                return stale
+
+            async def write(query, **params):
+                return [{"id": params["topic_id"], "previous_stage": "first_time", "status": "active"}]
+
+            db._load_full_graph = slow_load
+            db._write = write
+            load = asyncio.create_task(db.get_full_graph())
+            await loading.wait()
+            review = {"date": datetime.now(), "difficulty": "easy", "interval": 3}
+            assert await db.record_review("Mathematics:Limits", review, "early_stage", datetime.now())
+            release.set()
+            await load
+            assert not db.graph_cache.is_warm
+
+            fresh = copy.deepcopy(graph)
+            fresh["topics"]["Mathematics:Limits"]["stage"] = "early_stage"
+
+            async def load_fresh():
+                return fresh
+
+            db._load_full_graph = load_fresh
+            assert (await db.get_full_graph())["topics"]["Mathematics:Limits"]["stage"] == "early_stage"
+            assert db.graph_cache.is_warm
+            await db.close()
+
+        asyncio.run(scenario())
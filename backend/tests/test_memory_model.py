@@ -0,0 +1,115 @@
+import numpy as np
+import pytest
+from datetime import datetime, timedelta
+from spacing import STAGES
+from memory_model import MemoryModel, MemoryModelScheduler, ReviewLogs, DECAY, FACTOR, GRADES
+
+
+def records(topic_id, start, *steps):
+    """Review records for one topic: (days after the previous review, difficulty) pairs."""
+    date = start
+    result = []
+    for days, difficulty in steps:
+        date = date + timedelta(days=days)
+        result.append({"topic_id": topic_id, "date": date, "difficulty": difficulty})
+    return result
+
+
+def simulated_logs(model, topics=300, reviews=6, seed=0):
+    rng = np.random.default_rng(seed)
+    grades = np.full(topics, GRADES['normal'], dtype=np.int8)
+    stability, difficulty = model.update(np.full(topics, np.nan), np.full(topics, np.nan), np.zeros(topics), grades)
+    times, all_grades = [np.zeros(topics)], [grades]
+    for _ in range(reviews - 1):
+        elapsed = model.interval(stability) * rng.uniform(0.3, 2.5, topics)
+        recalled = rng.random(topics) < (1 + FACTOR * elapsed / stability) ** DECAY
+        grades = np.where(recalled, GRADES['normal'], GRADES['hard']).astype(np.int8)
+        stability, difficulty = model.update(stability, difficulty, elapsed, grades)
+        times.append(times[-1] + elapsed)
+        all_grades.append(grades)
+    return ReviewLogs.from_arrays(
+        np.arange(topics), np.tile(np.arange(topics), reviews), np.concatenate(times), np.concatenate(all_grades)
+    )
+
+
+class TestMemoryModel:
+    def test_interval_hits_target_retention(self):
+        """Test that the interval is where predicted recall falls to the target"""
+        model = MemoryModel(retention=0.8)
+        interval = float(model.interval(10.0))
+        assert (1 + FACTOR * interval / 10.0) ** DECAY == pytest.approx(0.8)
+        assert float(MemoryModel().interval(10.0)) == pytest.approx(10.0)
+
+    def test_logs_are_packed_longest_first(self):
+        """Test that packing sorts topics by history length and keeps review order"""
+        start = datetime(2025, 1, 1)
+        logs = ReviewLogs.from_records(
+            records("a", start, (0, 'normal'))
+            + records("b", start, (0, 'hard'), (2, 'normal'), (5, 'easy'))[::-1]
+        )
+        assert list(logs.topic_ids) == ["b", "a"]
+        assert logs.lengths.tolist() == [3, 1]
+        assert logs.active.tolist() == [2, 1, 1]
+        assert logs.grades[0].tolist() == [GRADES['hard'], GRADES['normal'], GRADES['easy']]
+        assert logs.elapsed[0, 1:].tolist() == pytest.approx([2, 5])
+
+    def test_replay_matches_stepwise_updates(self):
+        """Test that replaying packed logs equals applying update one review at a time"""
+        model = MemoryModel()
+        start = datetime(2025, 1, 1)
+        steps = [(0, 'normal'), (1, 'normal'), (4, 'hard'), (2, 'easy'), (9, 'normal')]
+        stability, difficulty = model.replay(ReviewLogs.from_records(records("a", start, *steps)))
+
+        expected = (np.array([np.nan]), np.array([np.nan]))
+        for days, difficulty_name in steps:
+            expected = model.update(expected[0], expected[1], [days], [GRADES[difficulty_name]])
+        assert stability[0] == pytest.approx(expected[0][0])
+        assert difficulty[0] == pytest.approx(expected[1][0])
+
+    def test_hard_is_a_lapse(self):
+        """Test that a 'hard' review lowers stability while 'normal' raises it"""
+        model = MemoryModel()
+        stability, difficulty = model.update([10.0, 10.0], [5.0, 5.0], [10, 10], [GRADES['hard'], GRADES['normal']])
+        assert stability[0] < 10 < stability[1]
+        assert difficulty[0] > difficulty[1]
+
+    def test_fit_reduces_loss(self):
+        """Test that fitting moves the default parameters towards the simulated ones"""
+        truth = MemoryModel(np.array(MemoryModel().parameters) * 1.5)
+        logs = simulated_logs(truth)
+        model = MemoryModel()
+        history = model.fit(logs, iterations=15)
+        assert model.loss(logs) < history[0]
+
+    def test_save_and_load(self, tmp_path):
+        """Test that fitted parameters round-trip through the saved file"""
+        model = MemoryModel(np.array(MemoryModel().parameters) * 1.1, retention=0.85)
+        path = str(tmp_path / "memory_model.json")
+        model.save(path)
+        loaded = MemoryModel.load(path)
+        assert loaded.parameters.tolist() == pytest.approx(model.parameters.tolist())
+        assert loaded.retention == 0.85
+        assert MemoryModel.load(str(tmp_path / "missing.json")) is None
+
+
+class TestMemoryModelScheduler:
+    def test_batch_matches_single(self):
+        """Test that schedule_batch with replayed memory agrees with schedule"""
+        scheduler = MemoryModelScheduler(MemoryModel())
+        now = datetime(2025, 3, 1, 12)
+        history = records("t", now - timedelta(days=20), (0, 'normal'), (3, 'normal'), (8, 'hard'))
+        topic = {"id": "t", "stage": "mid_stage", "review_history": history}
+
+        memory = scheduler.model.replay(ReviewLogs.from_records(history))
+        days = (now - history[-1]["date"]).total_seconds() / 86400
+        for difficulty in ('hard', 'normal', 'easy'):
+            intervals, stages = scheduler.schedule_batch([days], ['mid_stage'], [difficulty], memory=memory)
+            interval, stage = scheduler.schedule(topic, difficulty, now)
+            assert (interval, stage) == (intervals[0], STAGES[stages[0]])
+
+    def test_first_review(self):
+        """Test that a topic without history gets the initial stability for its grade"""
+        scheduler = MemoryModelScheduler(MemoryModel())
+        interval, stage = scheduler.schedule({"id": "t", "stage": "first_time", "review_history": []}, 'easy')
+        assert interval == max(1, round(float(scheduler.model.interval(scheduler.model.parameters[3]))))
+        assert stage == 'early_stage'
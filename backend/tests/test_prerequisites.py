@@ -0,0 +1,77 @@
+import random
+from prerequisites import PrerequisiteIndex
+
+
+def closure(edges, topic):
+    """Topics reachable from `topic` along the edges, by plain traversal."""
+    reached, stack = set(), [t for p, t in edges if p == topic]
+    while stack:
+        current = stack.pop()
+        if current not in reached:
+            reached.add(current)
+            stack.extend(t for p, t in edges if p == current)
+    return reached
+
+
+class TestPrerequisiteIndex:
+    def test_chain_order(self):
+        """Test that prerequisites come before the topics that need them"""
+        index = PrerequisiteIndex()
+        index.build([("Math:Algebra", "Math:Limits"), ("Math:Limits", "Math:Derivatives"),
+                     ("Math:Functions", "Math:Limits"), ("Math:Derivatives", "Math:Integrals")])
+        assert index.prerequisites("Math:Derivatives") == ["Math:Algebra", "Math:Functions", "Math:Limits"]
+        assert index.prerequisites("Math:Derivatives", transitive=False) == ["Math:Limits"]
+        assert index.unlocks("Math:Limits") == ["Math:Derivatives", "Math:Integrals"]
+        order, cycle = index.learning_order("Math:Integrals")
+        assert order == ["Math:Algebra", "Math:Functions", "Math:Limits", "Math:Derivatives", "Math:Integrals"]
+        assert cycle == []
+
+    def test_cycle_detection(self):
+        """Test that closing links are refused up front and imported cycles are reported"""
+        index = PrerequisiteIndex()
+        index.build([("a", "b"), ("b", "c")])
+        assert index.creates_cycle("c", "a")
+        assert index.creates_cycle("a", "a")
+        assert not index.creates_cycle("a", "c")
+
+        index.add_edge("c", "a")
+        index.add_edge("c", "d")
+        assert index.cycles() == ["a", "b", "c"]
+        order, cycle = index.learning_order("d")
+        assert order == ["a", "b", "c", "d"]
+        assert cycle == ["a", "b", "c"]
+
+    def test_incremental_matches_traversal(self):
+        """Test that the closure stays exact through random adds and removals"""
+        rng = random.Random(0)
+        topics = [f"t{i}" for i in range(12)]
+        index, edges = PrerequisiteIndex(), set()
+        for _ in range(300):
+            if rng.random() < 0.6 or not edges:
+                edge = tuple(rng.sample(topics, 2))
+                index.add_edge(*edge)
+                edges.add(edge)
+            elif rng.random() < 0.8:
+                edge = rng.choice(sorted(edges))
+                index.remove_edge(*edge)
+                edges.discard(edge)
+            else:
+                topic = rng.choice(topics)
+                index.remove_topic(topic)
+                edges = {edge for edge in edges if topic not in edge}
+            for topic in topics:
+                assert set(index.unlocks(topic)) == closure(edges, topic) - {topic}
+        assert len(index) == len(edges)
+
+    def test_order_respects_edges(self):
+        """Test that learning_order places every prerequisite ahead of its dependent"""
+        rng = random.Random(1)
+        index = PrerequisiteIndex()
+        # Edges only point from lower to higher ids, so the graph is acyclic
+        edges = {(f"t{a:03}", f"t{b:03}") for a, b in (sorted(rng.sample(range(200), 2)) for _ in range(600))}
+        index.build(edges)
+        order, cycle = index.learning_order("t199")
+        position = {topic: i for i, topic in enumerate(order)}
+        assert cycle == []
+        assert order[-1] == "t199"
+        assert all(position[p] < position[t] for p, t in edges if t in position)
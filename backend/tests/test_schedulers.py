@@ -0,0 +1,91 @@
+import os
+import subprocess
+import sys
+import numpy as np
+from datetime import datetime, timedelta
+from spacing import STAGES, DIFFICULTIES
+from memory_model import MemoryModelScheduler
+from schedulers import StageTableScheduler, FuzzyScheduler, create_scheduler
+
+
+def topic(stage, *days_ago, now=datetime(2025, 3, 1, 12)):
+    return {
+        "id": "Mathematics:Calculus:Limits",
+        "stage": stage,
+        "review_history": [
+            {"date": now - timedelta(days=days), "difficulty": "normal", "interval": 1}
+            for days in days_ago
+        ]
+    }
+
+
+class TestStageTableScheduler:
+    def test_matches_stage_table(self):
+        """Test the stage table intervals and stage moves the review endpoint has always used"""
+        scheduler = StageTableScheduler()
+        assert scheduler.schedule(topic('mid_stage'), 'normal') == (7, 'mid_stage')
+        assert scheduler.schedule(topic('mid_stage'), 'easy') == (10, 'late_stage')
+        assert scheduler.schedule(topic('first_time'), 'hard') == (1, 'first_time')
+        assert scheduler.schedule(topic('mastered'), 'easy') == (42, 'mastered')
+        assert scheduler.schedule(topic('early_stage'), 'unknown') == (3, 'early_stage')
+
+    def test_batch_matches_single(self):
+        """Test that schedule_batch agrees with schedule for every stage and difficulty"""
+        scheduler = StageTableScheduler()
+        pairs = [(stage, difficulty) for stage in STAGES for difficulty in DIFFICULTIES]
+        intervals, new_stages = scheduler.schedule_batch(
+            np.ones(len(pairs)), [stage for stage, _ in pairs], [difficulty for _, difficulty in pairs]
+        )
+        for (stage, difficulty), interval, new_stage in zip(pairs, intervals, new_stages):
+            assert scheduler.schedule(topic(stage), difficulty) == (interval, STAGES[new_stage])
+
+
+class TestFuzzyScheduler:
+    def test_uses_latest_review(self):
+        """Test that the interval follows the days since the most recent review"""
+        scheduler = FuzzyScheduler()
+        now = datetime(2025, 3, 1, 12)
+        recent = scheduler.schedule(topic('mid_stage', 40, 7), 'normal', now)
+        expected, _ = scheduler.system.next_interval(7, 'mid_stage', 'normal')
+        assert recent == (max(1, round(expected)), 'mid_stage')
+
+    def test_uncovered_days_are_clamped(self):
+        """Test that same-day and very late reviews still get a whole-day interval"""
+        scheduler = FuzzyScheduler()
+        now = datetime(2025, 3, 1, 12)
+        for difficulty in DIFFICULTIES:
+            same_day, _ = scheduler.schedule(topic('first_time', 0), difficulty, now)
+            late, _ = scheduler.schedule(topic('mastered', 400), difficulty, now)
+            assert isinstance(same_day, int) and same_day >= 1
+            assert isinstance(late, int) and late >= 1
+
+    def test_batch_matches_single(self):
+        """Test that schedule_batch agrees with schedule, clamping included"""
+        scheduler = FuzzyScheduler()
+        now = datetime(2025, 3, 1, 12)
+        rows = [(days, stage, difficulty) for days in (0, 1, 4, 12, 33, 59, 60, 365)
+                for stage in STAGES for difficulty in DIFFICULTIES]
+        days, stages, difficulties = (list(column) for column in zip(*rows))
+        intervals, new_stages = scheduler.schedule_batch(days, stages, difficulties)
+        for (day, stage, difficulty), interval, new_stage in zip(rows, intervals, new_stages):
+            assert scheduler.schedule(topic(stage, day, now=now), difficulty, now) == (interval, STAGES[new_stage])
+
+
+def test_create_scheduler(monkeypatch):
+    """Test that REVIEW_SCHEDULER selects the scheduler and unknown names fall back"""
+    monkeypatch.setenv("REVIEW_SCHEDULER", "fuzzy")
+    assert isinstance(create_scheduler(), FuzzyScheduler)
+    monkeypatch.setenv("REVIEW_SCHEDULER", "memory_model")
+    assert isinstance(create_scheduler(), MemoryModelScheduler)
+    monkeypatch.setenv("REVIEW_SCHEDULER", "nonsense")
+    assert isinstance(create_scheduler(), StageTableScheduler)
+    monkeypatch.delenv("REVIEW_SCHEDULER")
+    assert isinstance(create_scheduler(), StageTableScheduler)
+
+
+def test_server_modules_skip_plotting():
+    """Test that the schedulers and analytics load without matplotlib or seaborn"""
+    code = "import sys, schedulers, analytics; print(sorted({'matplotlib', 'seaborn'} & set(sys.modules)))"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    assert result.stdout.strip() == "[]"
@@ -0,0 +1,99 @@
+from datetime import datetime
+from search_index import SearchIndex
+
+
+def content(content_id, title, body):
+    return {
+        "id": content_id,
+        "title": title,
+        "type": "article",
+        "content": body,
+        "created_at": datetime(2024, 1, int(content_id[-1])),
+        "related_topic_ids": []
+    }
+
+
+def build():
+    index = SearchIndex()
+    index.build([
+        content("content:1", "Spaced repetition", "Review material at growing intervals."),
+        content("content:2", "Active recall", "Test yourself instead of rereading. Recall beats review."),
+        content("content:3", "Pomodoro technique", "Work in focused intervals with short breaks."),
+    ])
+    return index
+
+
+class TestSearchIndex:
+    def test_ranks_title_matches_first(self):
+        """Test that a title hit outranks a body hit for the same term"""
+        results = build().search("recall")
+        assert [result["id"] for result in results] == ["content:2"]
+        results = build().search("review")
+        assert [result["id"] for result in results] == ["content:1", "content:2"]
+        assert results[0]["score"] > 0
+
+    def test_prefix_matches_last_term(self):
+        """Test typeahead matching of a partially typed last word"""
+        results = build().search("interv")
+        assert {result["id"] for result in results} == {"content:1", "content:3"}
+        assert build().search("pomo")[0]["id"] == "content:3"
+
+    def test_prefix_keeps_common_completions(self):
+        """Test that a prefix with more than max_prefix_terms completions keeps the most frequent ones"""
+        index = build()
+        rare = ["re" + first + second for first in "abcdefgh" for second in "abcdefgh"]
+        for number, word in enumerate(rare):
+            index.add(dict(content("content:1", word, "Filler."), id=f"content:rare{number}"))
+        assert len(rare) > index.max_prefix_terms
+        results = index.search("re", limit=100)
+        assert {"content:1", "content:2"} <= {result["id"] for result in results}
+
+    def test_paging(self):
+        """Test limit and offset over the ranked results"""
+        index = build()
+        ranked = [result["id"] for result in index.search("review")]
+        assert [result["id"] for result in index.search("review", limit=1, offset=1)] == ranked[1:]
+
+    def test_incremental_update_and_remove(self):
+        """Test that re-adding replaces a document and remove drops it"""
+        index = build()
+        index.add(content("content:3", "Pomodoro technique", "Timeboxing with a kitchen timer."))
+        assert "content:3" not in {result["id"] for result in index.search("intervals")}
+        index.remove("content:2")
+        assert index.search("recall") == []
+        assert len(index) == 2
+
+    def test_snapshot_round_trip(self, tmp_path):
+        """Test that a loaded snapshot answers like the original index"""
+        index = build()
+        path = tmp_path / "search_index.json"
+        index.save(path)
+        restored = SearchIndex.load(path)
+        assert restored.ready
+        assert restored.search("review") == index.search("review")
+        assert SearchIndex.load(tmp_path / "missing.json") is None
+
+    def test_reconcile(self):
+        """Test that a snapshot drops deleted content and reports new and changed ids"""
+        index = build()
+        changed = index.reconcile({
+            "content:1": "2024-01-01T00:00:00",
+            "content:3": "2024-02-01T00:00:00",
+            "content:4": "2024-01-04T00:00:00",
+        })
+        assert sorted(changed) == ["content:3", "content:4"]
+        assert index.search("recall") == [] and len(index) == 2
+        index.add(dict(content("content:3", "Pomodoro technique", "Timeboxing."), updated_at="2024-02-01T00:00:00"))
+        assert index.reconcile({"content:1": "2024-01-01T00:00:00", "content:3": "2024-02-01T00:00:00"}) == []
+
+    def test_scores_follow_average_length(self):
+        """Test that adding a document rescales the length norm of the others"""
+        index = build()
+        before = index.search("review")
+        index.add(content("content:4", "Long read", " ".join(["filler"] * 200)))
+        after = index.search("review")
+        assert [result["id"] for result in after] == [result["id"] for result in before]
+        assert all(new["score"] != old["score"] for new, old in zip(after, before))
+        fresh = SearchIndex()
+        fresh.build(index._docs.values())
+        assert fresh.search("review") == after
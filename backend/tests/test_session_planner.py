@@ -0,0 +1,72 @@
+import itertools
+import random
+from datetime import datetime, timedelta
+from prerequisites import PrerequisiteIndex
+from session_planner import STAGE_MINUTES, plan_session, _pack
+
+START = datetime(2025, 3, 1, 9)
+
+
+def due_topics(count, seed=0):
+    rng = random.Random(seed)
+    return [
+        {
+            "id": f"Math:T{i:03}",
+            "name": f"T{i:03}",
+            "subject": "Math",
+            "stage": rng.choice(list(STAGE_MINUTES)),
+            "next_review": START - timedelta(days=rng.random() * 10)
+        }
+        for i in range(count)
+    ]
+
+
+class TestSessionPlanner:
+    def test_pack_is_optimal(self):
+        """Test the knapsack against every subset on small inputs"""
+        rng = random.Random(0)
+        for _ in range(200):
+            items = [f"t{i}" for i in range(rng.randint(0, 8))]
+            minutes = {item: rng.choice(list(STAGE_MINUTES.values())) for item in items}
+            values = {item: rng.random() for item in items}
+            capacity = rng.randint(1, 50)
+            chosen = _pack(items, minutes, values, capacity)
+            best = max(
+                sum(values[item] for item in subset)
+                for size in range(len(items) + 1) for subset in itertools.combinations(items, size)
+                if sum(minutes[item] for item in subset) <= capacity
+            )
+            assert sum(minutes[item] for item in chosen) <= capacity
+            assert abs(sum(values[item] for item in chosen) - best) < 1e-9
+
+    def test_blocks_fit_window(self):
+        """Test that blocks stay within their length and the window, with breaks between"""
+        plan = plan_session(due_topics(200), START, START + timedelta(hours=2), 'any')
+        assert plan["blocks"] and plan["unplanned"] == 200 - len(plan["topics"])
+        previous_end = None
+        for block in plan["blocks"]:
+            assert block["end_time"] - block["start_time"] <= timedelta(minutes=25)
+            assert block["end_time"] == block["start_time"] + timedelta(minutes=sum(t["minutes"] for t in block["topics"]))
+            if previous_end is not None:
+                assert block["start_time"] == previous_end + timedelta(minutes=5)
+            previous_end = block["end_time"]
+        assert previous_end <= START + timedelta(hours=2)
+
+    def test_prerequisites_come_first(self):
+        """Test that a topic is only planned after its due prerequisites"""
+        topics = due_topics(300, seed=1)
+        rng = random.Random(1)
+        index = PrerequisiteIndex()
+        index.build({(topics[a]["id"], topics[b]["id"]) for a, b in (sorted(rng.sample(range(300), 2)) for _ in range(400))})
+        plan = plan_session(topics, START, START + timedelta(hours=4), 'high', index)
+        position = {topic_id: i for i, topic_id in enumerate(plan["topics"])}
+        for topic_id in plan["topics"]:
+            assert all(position.get(p, len(position)) < position[topic_id] for p in index.prerequisites(topic_id))
+
+    def test_energy_favours_stages(self):
+        """Test that high energy leans towards late-stage topics and low energy towards new ones"""
+        topics = due_topics(200, seed=2)
+        high = plan_session(topics, START, START + timedelta(hours=2), 'high')
+        low = plan_session(topics, START, START + timedelta(hours=2), 'low')
+        late = lambda plan: sum(t["stage"] in ("late_stage", "mastered") for b in plan["blocks"] for t in b["topics"])
+        assert late(high) / len(high["topics"]) > late(low) / len(low["topics"])
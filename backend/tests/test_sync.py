@@ -0,0 +1,80 @@
+import json
+from datetime import datetime, timezone
+from sync import prepare_batch, finish_results
+
+
+def task(task_id, title, action='create', **extra):
+    return {'type': 'task', 'action': action, 'data': {'id': task_id, 'title': title, **extra}}
+
+
+class TestPrepareBatch:
+    def test_groups_changes_by_operation(self):
+        """Test that a mixed batch becomes one row list per operation"""
+        operations, results, log = prepare_batch([
+            task('task:1', 'Read chapter'),
+            {'type': 'topic', 'action': 'delete', 'data': {'id': 'Mathematics:Limits'}},
+            {'type': 'review', 'action': 'create', 'data': {
+                'topic_id': 'Mathematics:Limits', 'difficulty': 'easy', 'interval': 3
+            }},
+        ])
+        assert [row['key'] for row in operations['task_upsert']] == [0]
+        assert operations['topic_delete'] == [{'id': 'Mathematics:Limits', 'key': 1}]
+        assert operations['review_create'][0]['topic_id'] == 'Mathematics:Limits'
+        assert [result['status'] for result in results] == ['pending'] * 3
+        assert json.loads(log[0]['data'])['title'] == 'Read chapter'
+
+    def test_invalid_items_fail_individually(self):
+        """Test that bad items get an error result without dropping the rest"""
+        operations, results, log = prepare_batch([
+            {'type': 'energy_level', 'action': 'create', 'data': {'id': 'x'}},
+            task('task:1', 'Read chapter', action='archive'),
+            {'type': 'task', 'action': 'create', 'data': {'id': 'task:2'}},
+            task('task:3', 'Write summary'),
+        ])
+        assert [result['status'] for result in results] == ['error', 'error', 'error', 'pending']
+        assert list(log) == [3]
+        assert [row['id'] for row in operations['task_upsert']] == ['task:3']
+
+    def test_reviews_and_topics_are_validated(self):
+        """Test interval and status checks and that schedules are stored as naive local times"""
+        def review(interval, **extra):
+            return {'type': 'review', 'action': 'create', 'data': {
+                'topic_id': 'Mathematics:Limits', 'difficulty': 'easy', 'interval': interval, **extra
+            }}
+        def topic(status):
+            return {'type': 'topic', 'action': 'create', 'data': {
+                'id': f'Mathematics:{status}', 'subject': 'Mathematics', 'name': status, 'status': status
+            }}
+        operations, results, _ = prepare_batch([
+            review(0), review(-3), review('3'), review(True), review(2.5),
+            topic('archived'),
+            review(3, next_review='2025-03-01T12:00:00+00:00'),
+            topic('disabled'),
+        ])
+        assert [result['status'] for result in results] == ['error'] * 6 + ['pending'] * 2
+        next_review = operations['review_create'][0]['next_review']
+        assert next_review.tzinfo is None
+        assert next_review == datetime(2025, 3, 1, 12, tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+
+    def test_last_change_to_an_entity_wins(self):
+        """Test that earlier changes to the same entity are superseded"""
+        operations, results, log = prepare_batch([
+            task('task:1', 'Draft'),
+            task('task:1', 'Final', action='update'),
+        ])
+        assert results[0]['status'] == 'superseded'
+        assert operations['task_upsert'][0]['properties']['title'] == 'Final'
+
+    def test_finish_results(self):
+        """Test outcome reporting for applied, duplicate and unmatched items"""
+        review = {'type': 'review', 'action': 'create', 'data': {
+            'topic_id': 'Missing:Topic', 'difficulty': 'hard', 'interval': 1
+        }}
+        _, results, log = prepare_batch([
+            task('task:1', 'Read chapter'),
+            dict(task('task:2', 'Retry'), change_id='change:seen'),
+            review,
+        ])
+        results = finish_results(results, log, applied={0}, duplicates={'change:seen'})
+        assert [result['status'] for result in results] == ['applied', 'duplicate', 'error']
+        assert results[0]['change_id'] == log[0]['id']
@@ -0,0 +1,73 @@
+import random
+from day_spacing_alogirthm import (
+    COMPACT_REBUILD_READS, EnhancedSpacedLearningSystem, CompactTopicGraph, TopicGraph, TopicNode
+)
+
+
+def random_graph(count=500, seed=0):
+    rng = random.Random(seed)
+    graph = TopicGraph()
+    for _ in range(count):
+        path = "/".join(f"n{rng.randrange(4)}" for _ in range(rng.randint(1, 5)))
+        # Some intermediate segments never get review data of their own
+        graph.add_topic_path(path, {"status": "active"} if rng.random() < 0.7 else None)
+    return graph
+
+
+class TestCompactTopicGraph:
+    def test_subtopics_match_tree(self):
+        """Test that slice-based get_subtopics returns the tree's paths in the same order"""
+        graph = random_graph()
+        compact = CompactTopicGraph.from_graph(graph)
+        for path in compact.paths + ["missing", "n1/missing"]:
+            assert compact.get_subtopics(path) == graph.get_subtopics(path)
+
+    def test_related_topics_match_tree(self):
+        """Test that get_related_topics finds the same siblings, children and parent"""
+        graph = random_graph()
+        compact = CompactTopicGraph.from_graph(graph)
+        for path in compact.paths + ["missing"]:
+            assert set(compact.get_related_topics(path)) == set(graph.get_related_topics(path))
+
+    def test_layout(self):
+        """Test the preorder layout: subtree ranges, parents and interned names"""
+        graph = TopicGraph()
+        for path in ["Math/Calculus/Limits", "Math/Algebra", "Physics/Calculus"]:
+            graph.add_topic_path(path, {"status": "active"})
+        compact = CompactTopicGraph.from_graph(graph)
+        assert compact.paths == ["", "Math", "Math/Calculus", "Math/Calculus/Limits", "Math/Algebra",
+                                 "Physics", "Physics/Calculus"]
+        assert compact.ends.tolist() == [7, 5, 4, 4, 5, 7, 7]
+        assert compact.parents.tolist() == [-1, 0, 1, 2, 1, 0, 5]
+        assert compact.name(2) == compact.name(6) == "Calculus"
+        assert compact.vocabulary.count("Calculus") == 1
+        assert not hasattr(TopicNode("x"), "__dict__")
+
+    def test_system_rebuilds_snapshot(self):
+        """Test that the learning system's snapshot follows newly added topics"""
+        learning_system = EnhancedSpacedLearningSystem()
+        learning_system.add_topic_with_subtopics("Mathematics/Calculus/Limits")
+        assert learning_system.get_subtopics("Mathematics") == [
+            "Mathematics", "Mathematics/Calculus", "Mathematics/Calculus/Limits"
+        ]
+        learning_system.add_topic_with_subtopics("Mathematics/Calculus/Derivatives")
+        assert learning_system.get_subtopics("Mathematics/Calculus") == [
+            "Mathematics/Calculus", "Mathematics/Calculus/Limits", "Mathematics/Calculus/Derivatives"
+        ]
+        assert sorted(learning_system.get_related_topics("Mathematics/Calculus/Limits")) == [
+            "Calculus", "Derivatives", "Limits"
+        ]
+
+    def test_snapshot_rebuilt_once_graph_settles(self):
+        """Test that adds interleaved with lookups are answered from the tree without rebuilding"""
+        learning_system = EnhancedSpacedLearningSystem()
+        for i in range(2 * COMPACT_REBUILD_READS):
+            learning_system.add_topic_with_subtopics(f"Mathematics/Topic{i}")
+            assert learning_system.get_subtopics("Mathematics")[-1] == f"Mathematics/Topic{i}"
+        assert learning_system._compact_graph is None
+
+        graph = learning_system.topic_graph
+        expected = sorted(graph.get_related_topics("Mathematics/Topic0"))
+        for _ in range(COMPACT_REBUILD_READS + 1):
+            assert sorted(learning_system.get_related_topics("Mathematics/Topic0")) == expected
+        assert learning_system._compact_graph[0] == graph.version